@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Check core.compositor clients against fake Hyprland and Sway socket servers,
+# and benchmark cached position query with uncached query.
+#
+# Fake servers answer window list and move command, and push events to event socket,
+# so check doesn't need real compositor.
+#
+# Usage: python3 benchmarks/bench_compositor_ipc.py [--queries 2000]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.compositor import HyprlandClient, SwayClient, sway_send, sway_recv, SWAY_GET_TREE, SWAY_RUN_COMMAND, SWAY_SUBSCRIBE, SWAY_EVENT_WINDOW
+import argparse
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+class FakeCompositor(object):
+    ''' Window table shared by fake servers, move command update it.'''
+
+    def __init__(self):
+        self.windows = [
+            {"id": 1, "pid": 100, "title": "emacs", "x": 10, "y": 20, "width": 1600, "height": 1000},
+            {"id": 2, "pid": 200, "title": "eaf.py-12345", "x": 0, "y": 0, "width": 800, "height": 600},
+        ]
+        self.requests = 0
+        self.event_connections = []
+
+    def move(self, window_id, x, y):
+        for window in self.windows:
+            if window["id"] == window_id:
+                window["x"] = x
+                window["y"] = y
+
+def serve(socket_path, handler):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(16)
+
+    def accept_loop():
+        while True:
+            (connection, _) = server.accept()
+            threading.Thread(target=handler, args=(connection,), daemon=True).start()
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return server
+
+def start_fake_hyprland(compositor, socket_dir):
+    def handle_request(connection):
+        with connection:
+            command = connection.recv(65536).decode("utf-8")
+            compositor.requests += 1
+
+            if command == "j/clients":
+                reply = json.dumps([{"address": "0x{:x}".format(window["id"]), "pid": window["pid"],
+                                     "title": window["title"], "class": window["title"],
+                                     "at": [window["x"], window["y"]], "size": [window["width"], window["height"]]}
+                                    for window in compositor.windows])
+            elif command.startswith("dispatch movewindowpixel exact "):
+                (position, _, selector) = command[len("dispatch movewindowpixel exact "):].partition(",")
+                (x, y) = map(int, position.split())
+                for window in compositor.windows:
+                    if selector == "title:^({})$".format(window["title"]):
+                        compositor.move(window["id"], x, y)
+                reply = "ok"
+            else:
+                reply = "unknown request"
+
+            connection.sendall(reply.encode("utf-8"))
+
+    def handle_event(connection):
+        compositor.event_connections.append(("hyprland", connection))
+
+    serve(os.path.join(socket_dir, ".socket.sock"), handle_request)
+    serve(os.path.join(socket_dir, ".socket2.sock"), handle_event)
+
+def start_fake_sway(compositor, socket_path):
+    def handle(connection):
+        while True:
+            try:
+                (message_type, payload) = sway_recv(connection)
+            except OSError:
+                return
+
+            compositor.requests += 1
+
+            if message_type == SWAY_GET_TREE:
+                nodes = [{"id": window["id"], "pid": window["pid"], "name": window["title"], "app_id": window["title"],
+                          "rect": {"x": window["x"], "y": window["y"], "width": window["width"], "height": window["height"]},
+                          "nodes": [], "floating_nodes": []}
+                         for window in compositor.windows]
+                sway_send(connection, SWAY_GET_TREE, json.dumps({"id": 0, "nodes": nodes, "floating_nodes": []}).encode("utf-8"))
+            elif message_type == SWAY_RUN_COMMAND:
+                command = payload.decode("utf-8")
+                window_id = int(command[len("[con_id="):command.index("]")])
+                (x, y) = map(int, command.split()[-2:])
+                compositor.move(window_id, x, y)
+                sway_send(connection, SWAY_RUN_COMMAND, b'[{"success": true}]')
+            elif message_type == SWAY_SUBSCRIBE:
+                sway_send(connection, SWAY_SUBSCRIBE, b'{"success": true}')
+                compositor.event_connections.append(("sway", connection))
+                return
+
+    serve(socket_path, handle)
+
+def push_move_event(compositor, window_id, x, y):
+    ''' Move window behind client, and tell client through event socket.'''
+    compositor.move(window_id, x, y)
+
+    for (kind, connection) in compositor.event_connections:
+        if kind == "hyprland":
+            connection.sendall("movewindow>>{:x},1\n".format(window_id).encode("utf-8"))
+        else:
+            window = [window for window in compositor.windows if window["id"] == window_id][0]
+            container = {"id": window_id, "pid": window["pid"], "name": window["title"],
+                         "rect": {"x": x, "y": y, "width": window["width"], "height": window["height"]}}
+            payload = json.dumps({"change": "move", "container": container}).encode("utf-8")
+            sway_send(connection, SWAY_EVENT_WINDOW, payload)
+
+def wait_for(predicate, timeout=2):
+    end_time = time.time() + timeout
+    while time.time() < end_time:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+def check(name, client, compositor):
+    ok = True
+
+    def expect(description, value, expected):
+        nonlocal ok
+        if value != expected:
+            ok = False
+            print("{}: {} is {!r}, expected {!r}".format(name, description, value, expected))
+
+    client.start()
+    wait_for(lambda: len(compositor.event_connections) > 0)
+
+    window = client.get_window_by_pid(100)
+    expect("emacs position", (window["x"], window["y"]), (10, 20))
+
+    # Move same position again should not send request.
+    client.move_window("eaf.py-12345", 30, 40)
+    requests = compositor.requests
+    client.move_window("eaf.py-12345", 30, 40)
+    expect("duplicate move requests", compositor.requests, requests)
+    expect("moved window", compositor.windows[1]["x"], 30)
+
+    # Event from compositor must update table before max_age expire.
+    push_move_event(compositor, 1, 300, 400)
+    wait_for(lambda: client.get_window_by_pid(100)["x"] == 300)
+    window = client.get_window_by_pid(100)
+    expect("emacs position after event", (window["x"], window["y"]), (300, 400))
+
+    client.stop()
+    print("{:<9} check {}".format(name, "ok" if ok else "failed"))
+    return ok
+
+def benchmark(name, client, queries):
+    times = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        client.get_window_by_pid(100)
+        times.append(time.perf_counter() - start)
+
+    times.sort()
+    print("{:<24} queries={} p50={:.1f}us p99={:.1f}us".format(
+        name, queries,
+        times[len(times) // 2] * 1000000,
+        times[min(len(times) - 1, int(len(times) * 0.99))] * 1000000))
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark compositor IPC clients with fake servers.")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    socket_dir = tempfile.mkdtemp(prefix="eaf-bench-")
+    ok = True
+
+    hyprland = FakeCompositor()
+    start_fake_hyprland(hyprland, socket_dir)
+    hyprland_client = HyprlandClient(os.path.join(socket_dir, ".socket.sock"), os.path.join(socket_dir, ".socket2.sock"), max_age=60)
+    ok = check("hyprland", hyprland_client, hyprland) and ok
+
+    sway = FakeCompositor()
+    start_fake_sway(sway, os.path.join(socket_dir, "sway.sock"))
+    sway_client = SwayClient(os.path.join(socket_dir, "sway.sock"), max_age=60)
+    ok = check("sway", sway_client, sway) and ok
+
+    benchmark("hyprland cached", hyprland_client, args.queries)
+    benchmark("hyprland uncached", HyprlandClient(os.path.join(socket_dir, ".socket.sock"), "", max_age=-1), args.queries)
+    benchmark("sway cached", sway_client, args.queries)
+    benchmark("sway uncached", SwayClient(os.path.join(socket_dir, "sway.sock"), max_age=-1), args.queries)
+
+    shutil.rmtree(socket_dir)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compare EPC round trip latency of TCP and unix domain socket transport.
+#
+# Server and client are built by same functions that eaf.py use,
+# client call `echo' method synchronously, same as get_emacs_var does.
+#
+# Usage: python3 benchmarks/bench_epc_transport.py [--calls 2000] [--payload 64]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.utils import build_epc_server, connect_epc_address
+from epc.client import EPCClient
+import argparse
+import tempfile
+import threading
+import time
+
+def run(unix_socket_path, calls, payload):
+    server = build_epc_server(unix_socket_path)
+    server.register_function(lambda *args: args, "echo")
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    address = unix_socket_path if unix_socket_path is not None else server.server_address[1]
+    client = EPCClient(connect_epc_address(address))
+
+    message = "x" * payload
+
+    # Warm up.
+    for _ in range(100):
+        client.call_sync("echo", [message])
+
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client.call_sync("echo", [message])
+        times.append(time.perf_counter() - start)
+
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+    return sorted(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EPC round trip of TCP and unix domain socket.")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--payload", type=int, default=64)
+    args = parser.parse_args()
+
+    socket_dir = tempfile.mkdtemp(prefix="eaf-bench-")
+    unix_socket_path = os.path.join(socket_dir, "bench.sock")
+
+    for (name, path) in [("tcp", None), ("unix", unix_socket_path)]:
+        times = run(path, args.calls, args.payload)
+        print("{:<6} calls={} payload={} p50={:.1f}us p99={:.1f}us".format(
+            name, args.calls, args.payload,
+            times[len(times) // 2] * 1000000,
+            times[min(len(times) - 1, int(len(times) * 0.99))] * 1000000))
+
+    if os.path.exists(unix_socket_path):
+        os.remove(unix_socket_path)
+    os.rmdir(socket_dir)
+
+if __name__ == "__main__":
+    main()
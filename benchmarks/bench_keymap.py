@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Micro-benchmarks of key path: key description parsing and QKeyEvent construction.
+#
+# Usage: python3 benchmarks/bench_keymap.py [--number 100000]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import Qt, QEvent
+from PyQt6.QtGui import QKeyEvent
+from core.keymap import QT_KEY_DICT, QT_TEXT_DICT, QT_MODIFIER_DICT, parse_key, parse_key_sequence
+import argparse
+import timeit
+
+KEYS = ["a", "Z", "SPC", "RET", "<left>", "(", "}", "<backtab>", "1", "ü"]
+SEQUENCES = ["C-a", "M-f", "C-RET", "C-M-<left>", "S-RET", "s-x"]
+
+def legacy_send_key_event(event_string):
+    ''' Key event construction of Buffer.send_key before compiled keymap.'''
+    text = QT_TEXT_DICT.get(event_string, event_string)
+    modifier = Qt.KeyboardModifier.NoModifier
+
+    if event_string == "<backtab>" or (len(event_string) == 1 and event_string.isupper()):
+        modifier = Qt.KeyboardModifier.ShiftModifier
+
+    try:
+        return QKeyEvent(QEvent.Type.KeyPress, QT_KEY_DICT[event_string], modifier, text)
+    except:
+        return QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_unknown, modifier, text)
+
+def legacy_send_key_sequence_event(event_string):
+    ''' Key event construction of Buffer.send_key_sequence before compiled keymap.'''
+    event_list = event_string.split("-")
+    last_char = event_list[-1]
+    last_key = last_char.lower() if len(last_char) == 1 else last_char
+
+    modifier_flags = Qt.KeyboardModifier.NoModifier
+    for modifier in [QT_MODIFIER_DICT.get(modifier) for modifier in event_list[0:-1]]:
+        modifier_flags |= modifier
+
+    last_key = QT_TEXT_DICT.get(last_key, last_key)
+    return QKeyEvent(QEvent.Type.KeyPress, QT_KEY_DICT.get(last_key, Qt.Key.Key_unknown), modifier_flags, last_key)
+
+def parse_key_cold():
+    parse_key.cache_clear()
+    for key in KEYS:
+        parse_key(key)
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of key path.")
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    benchmarks = [
+        ("legacy send_key event", lambda: [legacy_send_key_event(key) for key in KEYS]),
+        ("parse_key (interned)", lambda: [parse_key(key) for key in KEYS]),
+        ("parse_key (cold cache)", parse_key_cold),
+        ("press + release event", lambda: [(parse_key(key).press_event(), parse_key(key).release_event()) for key in KEYS]),
+        ("legacy send_key_sequence event", lambda: [legacy_send_key_sequence_event(key) for key in SEQUENCES]),
+        ("parse_key_sequence (interned)", lambda: [parse_key_sequence(key) for key in SEQUENCES]),
+    ]
+
+    for (name, func) in benchmarks:
+        best = min(timeit.repeat(func, number=args.number // 10, repeat=5))
+        print("{:<32} {:>8.3f} us/key".format(name, best / (args.number // 10) / len(KEYS if "sequence" not in name else SEQUENCES) * 1000000))
+
+if __name__ == "__main__":
+    main()
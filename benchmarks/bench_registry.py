@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Check url index of core.registry against linear scan of buffers (what update_buffer_with_url did before index),
+# and benchmark get_buffer_by_url with linear scan.
+#
+# Fake buffer only has attributes that registry use, so check doesn't need Qt.
+#
+# Usage: python3 benchmarks/bench_registry.py [--buffers 500]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.registry import BufferRegistry
+import argparse
+import timeit
+
+MODULE_PATH = "app.browser.buffer"
+
+class FakeSignal(object):
+
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self.slots:
+            slot(*args)
+
+class FakeBuffer(object):
+
+    def __init__(self, buffer_id, url):
+        self.buffer_id = buffer_id
+        self.module_path = MODULE_PATH
+        self.buffer_widget = object()
+        self.url_change = FakeSignal()
+        self._url = url
+
+    @property
+    def url(self):
+        return self._url
+
+    @url.setter
+    def url(self, url):
+        old_url = self._url
+        self._url = url
+        if old_url != url:
+            self.url_change.emit(old_url, url)
+
+def linear_scan(registry, module_path, url):
+    for buffer in registry.buffers.values():
+        if buffer.module_path == module_path and buffer.url == url:
+            return buffer
+    return None
+
+def check():
+    ok = True
+
+    def expect(description, value, expected):
+        nonlocal ok
+        if value is not expected:
+            ok = False
+            print("{} is {!r}, expected {!r}".format(description, value, expected))
+
+    def lookup(url):
+        return registry.get_buffer_by_url(MODULE_PATH, url)
+
+    registry = BufferRegistry()
+    first = FakeBuffer("1", "https://a")
+    second = FakeBuffer("2", "https://a")
+    registry.add_buffer(first)
+    registry.add_buffer(second)
+    expect("buffer of two buffers on one url", lookup("https://a"), first)
+
+    # Navigate first buffer away, second buffer still open on url.
+    first.url = "https://b"
+    expect("buffer after first navigate away", lookup("https://a"), second)
+    expect("buffer of new url", lookup("https://b"), first)
+
+    # Navigate back, then kill second buffer.
+    first.url = "https://a"
+    registry.remove_buffer("2")
+    expect("buffer after second killed", lookup("https://a"), first)
+
+    registry.remove_buffer("1")
+    expect("buffer after all killed", lookup("https://a"), None)
+    expect("url index after all killed", len(registry.url_index) == 0, True)
+
+    # Signal of removed buffer must not touch index.
+    first.url = "https://c"
+    expect("buffer of removed buffer url", lookup("https://c"), None)
+
+    print("registry check {}".format("ok" if ok else "failed"))
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark url index of buffer registry.")
+    parser.add_argument("--buffers", type=int, default=500)
+    args = parser.parse_args()
+
+    ok = check()
+
+    registry = BufferRegistry()
+    for index in range(args.buffers):
+        registry.add_buffer(FakeBuffer(str(index), "https://example.com/{}".format(index)))
+
+    last_url = "https://example.com/{}".format(args.buffers - 1)
+    benchmarks = [
+        ("linear scan", lambda: linear_scan(registry, MODULE_PATH, last_url)),
+        ("get_buffer_by_url", lambda: registry.get_buffer_by_url(MODULE_PATH, last_url)),
+    ]
+
+    for (name, func) in benchmarks:
+        best = min(timeit.repeat(func, number=1000, repeat=5))
+        print("{:<20} buffers={} {:>8.3f} us/lookup".format(name, args.buffers, best / 1000 * 1000000))
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compare per-key path (send_key) with batched path (send_key_batch).
+#
+# Keys are sent from a sub-thread through PostGui, same as EPC server thread does,
+# timer stop when all characters arrive at widget.
+#
+# Usage: QT_QPA_PLATFORM=offscreen python3 benchmarks/bench_send_key.py [--chars 1000] [--repeat 5]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication, QLineEdit
+from core.utils import PostGui
+import argparse
+import string
+import threading
+import time
+
+import core.buffer
+from core.buffer import Buffer
+
+# Buffer read theme from Emacs when init, benchmark run without Emacs.
+core.buffer.get_emacs_theme_mode = lambda: "light"
+core.buffer.get_emacs_theme_foreground = lambda: "#000000"
+core.buffer.get_emacs_theme_background = lambda: "#FFFFFF"
+
+class BenchBuffer(Buffer):
+    def __init__(self):
+        Buffer.__init__(self, "bench", "", "", False)
+        self.add_widget(QLineEdit())
+        self.buffer_widget.setMaxLength(10000000)
+
+class Dispatcher(object):
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    @PostGui()
+    def send_key(self, event_string):
+        self.buffer.send_key(event_string)
+
+    @PostGui()
+    def send_key_batch(self, key_string):
+        self.buffer.send_key_batch(key_string)
+
+def wait_text_length(app, widget, length, timeout=60):
+    deadline = time.time() + timeout
+    while len(widget.text()) < length and time.time() < deadline:
+        app.processEvents()
+
+def run_once(app, buffer, dispatcher, text, batch):
+    buffer.buffer_widget.clear()
+    app.processEvents()
+
+    def send():
+        if batch:
+            dispatcher.send_key_batch(text)
+        else:
+            for char in text:
+                dispatcher.send_key("SPC" if char == " " else char)
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=send)
+    thread.start()
+    wait_text_length(app, buffer.buffer_widget, len(text))
+    elapsed = time.perf_counter() - start
+    thread.join()
+
+    return (elapsed, buffer.buffer_widget.text() == text)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-key and batched key path.")
+    parser.add_argument("--chars", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    buffer = BenchBuffer()
+    dispatcher = Dispatcher(buffer)
+
+    alphabet = string.ascii_letters + string.digits + " "
+    text = "".join(alphabet[i % len(alphabet)] for i in range(args.chars))
+
+    for (name, batch) in [("send_key", False), ("send_key_batch", True)]:
+        results = [run_once(app, buffer, dispatcher, text, batch) for _ in range(args.repeat)]
+        times = sorted(elapsed for (elapsed, _) in results)
+        in_order = all(ordered for (_, ordered) in results)
+        print("{:<16} chars={} best={:.2f}ms median={:.2f}ms in_order={}".format(
+            name, args.chars, times[0] * 1000, times[len(times) // 2] * 1000, in_order))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Fuzz check core.sexp against sexpdata, and benchmark both codecs.
+#
+# --traffic read recorded EPC messages, one s-expression per line,
+# otherwise benchmark use built-in sample of EAF traffic.
+#
+# Usage: python3 benchmarks/bench_sexp.py [--fuzz 20000] [--traffic FILE] [--number 20000]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import sexp
+from core.utils import handle_arg_types
+from sexpdata import Symbol
+import argparse
+import random
+import string
+import timeit
+
+SAMPLE_CALLS = [
+    ("eaf--show-message", ["Downloading video: https://www.youtube.com/watch?v=abc", True, True]),
+    ("eaf--update-buffer-details", ["3a2b-4c5d", "GitHub - emacs-eaf/emacs-application-framework", "https://github.com/emacs-eaf"]),
+    ("eaf-update-focus-state", ["3a2b-4c5d", "'t"]),
+    ("eaf--input-message", ["3a2b-4c5d", "Save current webpage as PDF?", "save_as_pdf", "yes-or-no", "", []]),
+    ("eaf--show-resource-dashboard", [[["eaf.py", "", "EAF", 1234, 204800, 12.5, 3.1, 0, 0, 0, "active"]]]),
+]
+
+SAMPLE_MESSAGES = [
+    '(return 12 ("#FFFFFF" "t"))',
+    '(call 3 send_key ("3a2b-4c5d" "a"))',
+    '(return 13 (("localhost" nil) ("1080" nil) ("socks5" nil)))',
+    '(call 4 update_views ("3a2b-4c5d:96469321:0:0:1600:1000,4c5d-6e7f:96469321:0:1000:1600:500"))',
+    '(return 14 "Text with \\"quotes\\" and \\\\ backslash")',
+]
+
+def random_string(rand):
+    alphabet = string.ascii_letters + string.digits + " \"\\'()[].,?;#`\n\tä中"
+    return "".join(rand.choice(alphabet) for _ in range(rand.randint(0, 12)))
+
+def random_value(rand, depth=0):
+    kind = rand.randint(0, 7 if depth < 3 else 5)
+    if kind == 0:
+        return random_string(rand)
+    elif kind == 1:
+        return rand.randint(-100000, 100000)
+    elif kind == 2:
+        return rand.random() * rand.choice([1, 1000, -1])
+    elif kind == 3:
+        return rand.choice([True, False, None])
+    elif kind == 4:
+        return Symbol(rand.choice(["eaf-mode", "t", "nil", "a.b", "x y", "1+", random_string(rand) or "s"]))
+    elif kind == 5:
+        return "'" + rand.choice(["t", "nil", "eaf-mode"])
+    else:
+        return [random_value(rand, depth + 1) for _ in range(rand.randint(0, 5))]
+
+def fuzz_check(count, seed):
+    import sexpdata
+
+    rand = random.Random(seed)
+    failures = 0
+
+    for _ in range(count):
+        method_name = rand.choice(["eaf--show-message", "eaf-update-focus-state", "a.b"])
+        args = [random_value(rand) for _ in range(rand.randint(0, 4))]
+
+        expected = sexpdata.dumps([Symbol(method_name)] + list(map(handle_arg_types, args)))
+        result = sexp.dumps_call(method_name, args)
+        if result != expected:
+            failures += 1
+            print("dumps_call mismatch: {!r} != {!r}".format(result, expected))
+            continue
+
+        # Strings that start with "'" are only symbols at top level of call, quote them as plain value here.
+        value = [arg for arg in args if not (type(arg) is str and arg.startswith("'"))]
+        text = sexpdata.dumps(value)
+        if sexp.dumps(value) != text:
+            failures += 1
+            print("dumps mismatch: {!r} != {!r}".format(sexp.dumps(value), text))
+            continue
+
+        if sexp.loads(text) != sexpdata.loads(text):
+            failures += 1
+            print("loads mismatch: {!r}".format(text))
+
+    print("fuzz cases={} failures={}".format(count, failures))
+    return failures == 0
+
+def benchmark(name, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    print("{:<36} {:.3f}us".format(name, seconds / number * 1000000))
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz check and benchmark s-expression codecs.")
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--traffic", help="file of recorded EPC messages, one per line")
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    import sexpdata
+
+    ok = fuzz_check(args.fuzz, args.seed)
+
+    messages = SAMPLE_MESSAGES
+    if args.traffic:
+        with open(args.traffic, "r") as f:
+            messages = [line.rstrip("\n") for line in f if line.strip()]
+
+    def sexpdata_dumps_calls():
+        for (method_name, call_args) in SAMPLE_CALLS:
+            sexpdata.dumps([Symbol(method_name)] + list(map(handle_arg_types, call_args)))
+
+    def fast_dumps_calls():
+        for (method_name, call_args) in SAMPLE_CALLS:
+            sexp.dumps_call(method_name, call_args)
+
+    def sexpdata_loads_messages():
+        for message in messages:
+            sexpdata.loads(message)
+
+    def fast_loads_messages():
+        for message in messages:
+            sexp.loads(message)
+
+    benchmark("sexpdata dumps ({} calls)".format(len(SAMPLE_CALLS)), sexpdata_dumps_calls, args.number)
+    benchmark("core.sexp dumps_call ({} calls)".format(len(SAMPLE_CALLS)), fast_dumps_calls, args.number)
+    benchmark("sexpdata loads ({} messages)".format(len(messages)), sexpdata_loads_messages, args.number)
+    benchmark("core.sexp loads ({} messages)".format(len(messages)), fast_loads_messages, args.number)
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
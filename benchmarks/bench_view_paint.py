@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compare paint time of View through QGraphicsScene with direct embedding View.
+#
+# Each frame invalidates buffer widget and renders whole view with QWidget.grab,
+# so scene path pays proxy widget and QGraphicsView compositing.
+#
+# Usage: QT_QPA_PLATFORM=offscreen python3 benchmarks/bench_view_paint.py [--frames 200] [--size 1600x1000]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QApplication, QWidget
+import argparse
+import time
+
+import core.buffer
+import core.view
+from core.buffer import Buffer
+from core.view import View
+
+# Buffer and View read settings from Emacs, benchmark run without Emacs.
+core.buffer.get_emacs_theme_mode = lambda: "light"
+core.buffer.get_emacs_theme_foreground = lambda: "#000000"
+core.buffer.get_emacs_theme_background = lambda: "#FFFFFF"
+core.view.get_emacs_var = lambda var_name: False
+core.view.eval_in_emacs = lambda method_name, args: None
+# Don't reparent view to Emacs window.
+core.view.get_emacs_func_cache_result = lambda func_name, func_args: func_name == "eaf-emacs-not-use-reparent-technology"
+
+class PaintWidget(QWidget):
+    ''' Widget that paint many rectangles and text, similar to cost of web page raster.'''
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for i in range(200):
+            painter.fillRect((i * 37) % self.width(), (i * 53) % self.height(), 120, 40, QColor((i * 7) % 255, 120, 200))
+            painter.drawText((i * 37) % self.width(), (i * 53) % self.height() + 20, "Emacs Application Framework")
+
+class BenchBuffer(Buffer):
+    def __init__(self, direct_embedding):
+        Buffer.__init__(self, "bench", "", "", False)
+        self.direct_embedding = direct_embedding
+        self.add_widget(PaintWidget())
+
+def run(app, direct_embedding, width, height, frames):
+    buffer = BenchBuffer(direct_embedding)
+    buffer.buffer_widget.resize(width, height)
+
+    view = View(buffer, "bench:0:0:0:{}:{}".format(width, height))
+    if direct_embedding:
+        view.embed_direct()
+    app.processEvents()
+
+    times = []
+    for _ in range(frames):
+        buffer.buffer_widget.update()
+        start = time.perf_counter()
+        view.grab()
+        times.append(time.perf_counter() - start)
+
+    view.destroy_view()
+    buffer.destroy_buffer()
+    app.processEvents()
+
+    return sorted(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark paint time of scene and direct embedding view.")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--size", default="1600x1000")
+    args = parser.parse_args()
+
+    (width, height) = map(int, args.size.split("x"))
+
+    app = QApplication(sys.argv)
+
+    for (name, direct_embedding) in [("scene", False), ("direct", True)]:
+        times = run(app, direct_embedding, width, height, args.frames)
+        print("{:<8} frames={} size={}x{} median={:.3f}ms p99={:.3f}ms".format(
+            name, args.frames, width, height,
+            times[len(times) // 2] * 1000,
+            times[min(len(times) - 1, int(len(times) * 0.99))] * 1000))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Replay EPC calls against EAF without Emacs, report latency of each call type.
+#
+# Fake Emacs EPC server answer get-emacs-var and get-emacs-vars with defaults of eaf.el defcustoms,
+# and get-emacs-func-result with FAKE_FUNC_RESULTS.
+# EAF run in this process under offscreen Qt, replayer send recorded calls to EAF EPC server,
+# latency of call is time until Qt main thread finish work that call queued.
+#
+# Record real session with M-x eaf-start-epc-record and M-x eaf-stop-epc-record,
+# or use --synthetic to replay generated session with simple test app, it doesn't need any app installed.
+#
+# Usage:
+#   python3 benchmarks/replay_epc.py RECORD_FILE [--speed 1.0] [--vars VARS.json]
+#   python3 benchmarks/replay_epc.py --synthetic [--buffers 20] [--keys 500]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAKE_FUNC_RESULTS = {
+    "eaf--get-theme-info": ["light", "#000000", "#FFFFFF"],
+    "eaf-get-theme-mode": "light",
+    "eaf-get-theme-foreground-color": "#000000",
+    "eaf-get-theme-background-color": "#FFFFFF",
+    # Don't reparent view to Emacs window, there is no Emacs window.
+    "eaf-emacs-not-use-reparent-technology": True,
+    "eaf-emacs-running-in-wayland-native": False,
+    "minibufferp": False,
+}
+
+SYNTHETIC_APP = """
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QWidget
+from core.buffer import Buffer
+
+class PaintWidget(QWidget):
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        for i in range(100):
+            painter.fillRect((i * 37) % max(self.width(), 1), (i * 53) % max(self.height(), 1), 120, 40, QColor((i * 7) % 255, 120, 200))
+
+class AppBuffer(Buffer):
+    def __init__(self, buffer_id, url, arguments):
+        Buffer.__init__(self, buffer_id, url, arguments, False)
+        self.add_widget(PaintWidget())
+"""
+
+DEFCUSTOM_PATTERN = re.compile(r'^\(def(?:custom|var) (\S+)\s+("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|t|nil)\s*$', re.MULTILINE)
+FUNC_NAME_PATTERN = re.compile(r'\(\s*([^\s()]+)')
+
+def load_emacs_defaults(el_path):
+    ''' Return dict of variable name to default value of simple defcustom and defvar in EL_PATH.'''
+    variables = {}
+
+    with open(el_path, "r") as f:
+        for (name, value) in DEFCUSTOM_PATTERN.findall(f.read()):
+            if value == "t":
+                variables[name] = True
+            elif value == "nil":
+                variables[name] = None
+            elif value.startswith('"'):
+                try:
+                    variables[name] = json.loads(value)
+                except ValueError:
+                    variables[name] = value[1:-1]
+            elif "." in value:
+                variables[name] = float(value)
+            else:
+                variables[name] = int(value)
+
+    return variables
+
+def build_emacs_variables(work_dir, vars_file=None):
+    ''' Return Emacs variables for EAF that run without Emacs, config directory is in WORK_DIR.'''
+    variables = load_emacs_defaults(os.path.join(ROOT_DIR, "eaf.el"))
+    variables["eaf-config-location"] = os.path.join(work_dir, "config")
+    # Watchdog heartbeat and resource sampler add noise to latency.
+    variables["eaf-stall-watchdog-threshold"] = 0
+    variables["eaf-resource-monitor-interval"] = 3600
+
+    if vars_file is not None:
+        with open(vars_file, "r") as f:
+            variables.update(json.load(f))
+
+    return variables
+
+class FakeEmacsServer(object):
+    ''' EPC server that answer EAF requests like Emacs, answers come from VARIABLES and FUNC_RESULTS.'''
+
+    def __init__(self, variables, func_results):
+        from epc.server import ThreadingEPCServer
+
+        self.variables = variables
+        self.func_results = func_results
+        self.emacs_calls = Counter()
+
+        self.server = ThreadingEPCServer(('localhost', 0), log_traceback=True)
+        self.server.allow_reuse_address = True
+        self.server.register_function(self.eval_in_emacs, "eval-in-emacs")
+        self.server.register_function(self.get_emacs_func_result, "get-emacs-func-result")
+        self.server.register_function(self.get_emacs_var, "get-emacs-var")
+        self.server.register_function(self.get_emacs_vars, "get-emacs-vars")
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address[1]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_func_name(self, sexp_string):
+        match = FUNC_NAME_PATTERN.match(sexp_string)
+        return match.group(1) if match is not None else ""
+
+    def eval_in_emacs(self, sexp_string):
+        self.emacs_calls[self.get_func_name(sexp_string)] += 1
+        return None
+
+    def get_emacs_func_result(self, sexp_string):
+        func_name = self.get_func_name(sexp_string)
+        self.emacs_calls[func_name] += 1
+        return self.func_results.get(func_name)
+
+    def get_emacs_var(self, var_name):
+        self.emacs_calls[var_name] += 1
+        value = self.variables.get(var_name)
+        return [value, "t" if value is None or value is True else "nil"]
+
+    def get_emacs_vars(self, *var_names):
+        return [self.get_emacs_var(var_name) for var_name in var_names]
+
+def load_record(path):
+    ''' Return (header, calls) of record file.'''
+    header = {}
+    calls = []
+
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip() == "":
+                continue
+
+            entry = json.loads(line)
+            if entry.get("type") == "header":
+                header = entry
+            else:
+                calls.append(entry)
+
+    return (header, calls)
+
+def build_synthetic_session(app_dir, buffer_count, key_count, width, height):
+    ''' Return (header, calls) of generated session: create buffers, switch views, split window, type keys and kill buffers.'''
+    module_path = os.path.join(app_dir, "buffer.py")
+    with open(module_path, "w") as f:
+        f.write(SYNTHETIC_APP)
+
+    buffer_ids = ["synthetic-{}".format(index) for index in range(buffer_count)]
+    calls = []
+
+    def add(method, *args):
+        calls.append({"time": len(calls) * 0.01, "method": method, "args": list(args)})
+
+    def view_info(buffer_id, x, y, w, h):
+        return "{}:0:{}:{}:{}:{}".format(buffer_id, x, y, w, h)
+
+    for buffer_id in buffer_ids:
+        add("new_buffer", buffer_id, "synthetic://" + buffer_id, module_path, "")
+
+    # Switch buffer in one window.
+    for buffer_id in buffer_ids:
+        add("update_views", view_info(buffer_id, 0, 0, width, height))
+
+    # Split window to 2, 4 and 8 views of different buffers.
+    for count in [2, 4, 8]:
+        views = [view_info(buffer_ids[index % buffer_count], 0, index * height // count, width, height // count) for index in range(count)]
+        add("update_views", ",".join(views))
+
+    # Drag window divider.
+    for offset in range(0, 200, 10):
+        add("update_views", ",".join([view_info(buffer_ids[0], 0, 0, width // 2 + offset, height),
+                                      view_info(buffer_ids[-1], width // 2 + offset, 0, width // 2 - offset, height)]))
+
+    add("update_views", view_info(buffer_ids[0], 0, 0, width, height))
+    for index in range(key_count):
+        add("send_key", buffer_ids[0], "abcdefghij"[index % 10])
+
+    for buffer_id in buffer_ids:
+        add("kill_buffer", buffer_id)
+
+    header = {"emacs_width": width, "emacs_height": height, "buffers": []}
+
+    return (header, calls)
+
+class Replayer(threading.Thread):
+    ''' Send calls to EAF EPC server from this thread, like EPC handler thread of Emacs connection.'''
+
+    def __init__(self, app, eaf, header, calls, speed):
+        threading.Thread.__init__(self, daemon=True)
+
+        self.app = app
+        self.eaf = eaf
+        self.header = header
+        self.calls = calls
+        self.speed = speed
+
+        self.latencies = {}
+        self.errors = 0
+        self.elapsed = 0
+
+    def wait_main_thread(self, timeout=30):
+        ''' Wait Qt main thread finish all tasks that queued before.'''
+        from core.dispatcher import main_thread_dispatcher, PRIORITY_HOUSEKEEPING
+
+        done = threading.Event()
+        main_thread_dispatcher.post(lambda args, kwargs: done.set(), (), {}, "replay_barrier", PRIORITY_HOUSEKEEPING)
+        done.wait(timeout)
+
+    def run(self):
+        from core.dispatcher import main_thread_dispatcher
+        from core.utils import connect_epc_address
+        from epc.client import EPCClient
+
+        # Server address is (host, port) for TCP, or path for unix domain socket.
+        address = self.eaf.server.server_address
+        client = EPCClient(connect_epc_address(address[1] if isinstance(address, tuple) else address))
+
+        # Create buffers that exist when record started.
+        for (buffer_id, url, module_path, arguments) in self.header.get("buffers", []):
+            client.call_sync("new_buffer", [buffer_id, url, module_path, arguments])
+        self.wait_main_thread()
+
+        start_time = time.time()
+        for call in self.calls:
+            if self.speed > 0:
+                delay = start_time + call["time"] / self.speed - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+            call_start = time.time()
+            try:
+                client.call_sync(call["method"], call["args"])
+            except Exception as e:
+                self.errors += 1
+                print("{} failed: {}".format(call["method"], e))
+            self.wait_main_thread()
+
+            self.latencies.setdefault(call["method"], []).append(time.time() - call_start)
+
+        self.elapsed = time.time() - start_time
+
+        client.close()
+        self.eaf.cleanup()
+        self.eaf.server.shutdown()
+
+        main_thread_dispatcher.post(lambda args, kwargs: self.app.quit(), (), {}, "replay_quit")
+
+    def get_report(self):
+        ''' Return dict of method to count, p50, p99 and max latency (milliseconds).'''
+        report = {}
+        for (method, times) in sorted(self.latencies.items()):
+            times = sorted(times)
+            report[method] = {
+                "count": len(times),
+                "p50_ms": round(times[len(times) // 2] * 1000, 3),
+                "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 3),
+                "max_ms": round(times[-1] * 1000, 3)
+            }
+        return report
+
+def start_eaf(variables, width, height):
+    ''' Start fake Emacs and EAF in this process, return (app, eaf, fake_emacs).'''
+    # QtWebEngine must import before QApplication is created, eaf.py import it.
+    import eaf as eaf_module
+    from PyQt6.QtWidgets import QApplication
+
+    fake_emacs = FakeEmacsServer(variables, dict(FAKE_FUNC_RESULTS))
+    port = fake_emacs.start()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    # Globals that eaf.py set in its main block.
+    eaf_module.proxy_string = ""
+    eaf_module.destroy_view_list = []
+
+    eaf = eaf_module.EAF([width, height, str(port)])
+
+    return (app, eaf, fake_emacs)
+
+def replay(header, calls, variables, speed):
+    ''' Start fake Emacs and EAF, replay CALLS, return (report, emacs call counts, elapsed seconds, error count).'''
+    (app, eaf, fake_emacs) = start_eaf(variables, header.get("emacs_width", 1600), header.get("emacs_height", 1000))
+
+    replayer = Replayer(app, eaf, header, calls, speed)
+    replayer.start()
+    app.exec()
+    replayer.join()
+
+    fake_emacs.stop()
+
+    return (replayer.get_report(), dict(fake_emacs.emacs_calls), replayer.elapsed, replayer.errors)
+
+def print_report(report, emacs_calls, elapsed, errors):
+    print("{:<28} {:>7} {:>10} {:>10} {:>10}".format("Method", "Count", "p50(ms)", "p99(ms)", "max(ms)"))
+    for (method, stats) in report.items():
+        print("{:<28} {:>7} {:>10} {:>10} {:>10}".format(method, stats["count"], stats["p50_ms"], stats["p99_ms"], stats["max_ms"]))
+
+    print("\nelapsed={:.2f}s errors={} emacs round trips={}".format(elapsed, errors, sum(emacs_calls.values())))
+    for (name, count) in sorted(emacs_calls.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print("  {:<44} {}".format(name, count))
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay EPC calls against EAF with fake Emacs.")
+    parser.add_argument("record", nargs="?", help="record file from eaf-start-epc-record")
+    parser.add_argument("--synthetic", action="store_true", help="replay generated session with test app")
+    parser.add_argument("--buffers", type=int, default=20)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--speed", type=float, default=0, help="1 replay with recorded timing, 0 replay as fast as possible")
+    parser.add_argument("--vars", help="JSON file of Emacs variables that override eaf.el defaults")
+    parser.add_argument("--json", help="write report to JSON file")
+    args = parser.parse_args()
+
+    if args.record is None and not args.synthetic:
+        parser.error("need RECORD file or --synthetic")
+
+    work_dir = tempfile.mkdtemp(prefix="eaf-replay-")
+
+    variables = build_emacs_variables(work_dir, args.vars)
+
+    if args.synthetic:
+        (header, calls) = build_synthetic_session(work_dir, args.buffers, args.keys, 1600, 1000)
+    else:
+        (header, calls) = load_record(args.record)
+
+    (report, emacs_calls, elapsed, errors) = replay(header, calls, variables, args.speed)
+    print_report(report, emacs_calls, elapsed, errors)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"replay": report, "emacs_calls": emacs_calls, "elapsed": elapsed, "errors": errors}, f, indent=2)
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(1 if errors > 0 else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Benchmark suite of EAF core hot paths, save results as JSON and compare two results.
+#
+# EAF run in this process under offscreen Qt with fake Emacs of replay_epc.py,
+# all pages are generated local files, suite doesn't need network, Emacs or installed apps.
+# Benchmarks run in Qt main thread, same as EPC calls that Qt main thread dispatch.
+#
+# Usage:
+#   python3 benchmarks/suite.py run [--output results.json] [--filter update_views] [--repeat 5]
+#   python3 benchmarks/suite.py compare BASE.json NEW.json [--threshold 10]
+#
+# compare exit with status 1 when some benchmark is slower than THRESHOLD percent.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from replay_epc import ROOT_DIR, build_emacs_variables, start_eaf
+
+EMACS_WIDTH = 1600
+EMACS_HEIGHT = 1000
+
+WIDGET_APP = """
+from PyQt6.QtWidgets import QLineEdit
+from core.buffer import Buffer
+
+class AppBuffer(Buffer):
+    def __init__(self, buffer_id, url, arguments):
+        Buffer.__init__(self, buffer_id, url, arguments, False)
+        self.add_widget(QLineEdit())
+        self.buffer_widget.setMaxLength(10000000)
+"""
+
+BROWSER_APP = """
+from PyQt6.QtCore import QUrl
+from core.webengine import BrowserBuffer
+
+class AppBuffer(BrowserBuffer):
+    def __init__(self, buffer_id, url, arguments):
+        BrowserBuffer.__init__(self, buffer_id, url, arguments, False)
+        self.buffer_widget.setUrl(QUrl.fromLocalFile(url))
+"""
+
+BENCHMARKS = []
+
+def benchmark(name, params=[None]):
+    '''
+    Register benchmark function, it's called with (context, param) for each param of PARAMS.
+
+    Function return list of samples, sample is dict of metric name to seconds.
+    '''
+    def decorator(func):
+        BENCHMARKS.append((name, params, func))
+        return func
+    return decorator
+
+class BenchContext(object):
+    ''' Running EAF and helpers that benchmarks share.'''
+
+    def __init__(self, app, eaf, work_dir, repeat):
+        self.app = app
+        self.eaf = eaf
+        self.work_dir = work_dir
+        self.repeat = repeat
+
+        self.buffer_count = 0
+        self.widget_app = self.write_file("widget_app/buffer.py", WIDGET_APP)
+        self.browser_app = self.write_file("browser_app/buffer.py", BROWSER_APP)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.work_dir, name)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, "w") as f:
+            f.write(content)
+
+        return path
+
+    def wait_until(self, predicate, timeout=60):
+        ''' Run Qt event loop until PREDICATE return true.'''
+        from PyQt6.QtCore import QEventLoop
+
+        deadline = time.perf_counter() + timeout
+        while not predicate():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Benchmark wait timeout")
+            self.app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+
+    def drain(self):
+        ''' Handle pending Qt events and main thread tasks.'''
+        for _ in range(3):
+            self.app.processEvents()
+
+    def create_buffer(self, module_path, url):
+        self.buffer_count += 1
+        return self.eaf.create_buffer("bench-{}".format(self.buffer_count), url, module_path, "")
+
+    def create_browser_buffer(self, html_file):
+        ''' Create browser buffer of HTML_FILE, return it after page loaded.'''
+        loaded = []
+        buffer = self.create_buffer(self.browser_app, html_file)
+        buffer.buffer_widget.loadFinished.connect(lambda ok: loaded.append(ok))
+        self.wait_until(lambda: len(loaded) > 0)
+        return buffer
+
+    def kill_buffer(self, buffer):
+        self.eaf.kill_buffer(buffer.buffer_id)
+        self.drain()
+
+    def run_js(self, buffer, js):
+        ''' Run JS in page of BUFFER, return result after it finish.'''
+        results = []
+        buffer.buffer_widget.web_page.runJavaScript(js, lambda result: results.append(result))
+        self.wait_until(lambda: len(results) > 0)
+        return results[0]
+
+def elapsed_since(start):
+    return time.perf_counter() - start
+
+@benchmark("create_buffer.browser_html")
+def bench_create_buffer(context, param):
+    paragraphs = "\n".join("<h2>Section {0}</h2><p>Emacs Application Framework paragraph {0}, <a href='#s{0}'>link {0}</a>.</p>".format(index)
+                           for index in range(200))
+    html_file = context.write_file("pages/local.html", "<html><head><style>p {{ font-family: serif; }}</style></head><body>{}</body></html>".format(paragraphs))
+
+    samples = []
+    for _ in range(context.repeat):
+        loaded = []
+
+        start = time.perf_counter()
+        buffer = context.create_buffer(context.browser_app, html_file)
+        created = elapsed_since(start)
+
+        buffer.buffer_widget.loadFinished.connect(lambda ok: loaded.append(elapsed_since(start)))
+        context.wait_until(lambda: len(loaded) > 0)
+
+        samples.append({"create": created, "load": loaded[0]})
+
+        context.kill_buffer(buffer)
+
+    return samples
+
+@benchmark("update_views", [1, 10, 100])
+def bench_update_views(context, view_count):
+    buffers = [context.create_buffer(context.widget_app, "") for _ in range(view_count)]
+    view_height = max(EMACS_HEIGHT // view_count, 1)
+
+    def layout(x):
+        return ",".join("{}:0:{}:{}:{}:{}".format(buffer.buffer_id, x, index * view_height, EMACS_WIDTH - x, view_height)
+                        for (index, buffer) in enumerate(buffers))
+
+    def measure(args):
+        start = time.perf_counter()
+        context.eaf.update_views(args)
+        duration = elapsed_since(start)
+        context.drain()
+        return duration
+
+    samples = []
+    for _ in range(context.repeat):
+        samples.append({
+            # Show views of hidden buffers.
+            "show": measure(layout(0)),
+            # Emacs call update_views when window configuration change, even nothing changed.
+            "unchanged": measure(layout(0)),
+            # Window divider moved, all views are replaced.
+            "relayout": measure(layout(1)),
+            "hide": measure("")
+        })
+
+    for buffer in buffers:
+        context.kill_buffer(buffer)
+
+    return samples
+
+@benchmark("send_key", [1000])
+def bench_send_key(context, key_count):
+    buffer = context.create_buffer(context.widget_app, "")
+    text = "".join("abcdefghijklmnopqrstuvwxyz0123456789"[index % 36] for index in range(key_count))
+
+    samples = []
+    for _ in range(context.repeat):
+        buffer.buffer_widget.clear()
+        context.drain()
+
+        start = time.perf_counter()
+        for char in text:
+            buffer.send_key(char)
+        posted = elapsed_since(start)
+
+        context.wait_until(lambda: len(buffer.buffer_widget.text()) >= key_count)
+        samples.append({"post": posted, "deliver": elapsed_since(start)})
+
+    context.kill_buffer(buffer)
+
+    return samples
+
+@benchmark("markers", [1000, 10000, 100000])
+def bench_markers(context, link_count):
+    links = "\n".join("<a href='https://example.org/{0}'>link {0}</a>".format(index) for index in range(link_count))
+    html_file = context.write_file("pages/links_{}.html".format(link_count), "<html><body>{}</body></html>".format(links))
+
+    buffer = context.create_browser_buffer(html_file)
+    browser_view = buffer.buffer_widget
+
+    samples = []
+    for _ in range(context.repeat):
+        browser_view.load_marker_file()
+
+        start = time.perf_counter()
+        context.run_js(buffer, "Marker.generateMarker(Marker.generateClickMarkerList()); 0")
+        samples.append({"generate": elapsed_since(start)})
+
+        context.run_js(buffer, "Marker.cleanupLinks(); 0")
+
+    context.kill_buffer(buffer)
+
+    return samples
+
+@benchmark("load_cookie", [10000])
+def bench_load_cookie(context, cookie_count):
+    from PyQt6.QtCore import QUrl
+
+    html_file = context.write_file("pages/blank.html", "<html><body></body></html>")
+    buffer = context.create_browser_buffer(html_file)
+    cookies_manager = buffer.buffer_widget.cookies_manager
+
+    # Real cookie directory has many sites with few cookies each.
+    domain_count = max(cookie_count // 10, 1)
+    for index in range(cookie_count):
+        domain = "site{}.example.org".format(index % domain_count)
+        context.write_file(os.path.join(cookies_manager.cookies_dir, domain, "cookie{}".format(index)),
+                           "name{0}=value{0}; expires=Fri, 01 Jan 2038 00:00:00 GMT; domain={1}; path=/".format(index, domain))
+
+    host = "site0.example.org"
+    url = QUrl("https://{}/".format(host))
+
+    samples = []
+    for _ in range(context.repeat):
+        # load_cookie read cookie files of host and set them to cookie store.
+        start = time.perf_counter()
+        cookie_list = cookies_manager.read_cookie_files(host)
+        read_time = elapsed_since(start)
+
+        start = time.perf_counter()
+        cookies_manager.set_cookies(cookie_list, url)
+        samples.append({"read": read_time, "set": elapsed_since(start)})
+
+        context.drain()
+
+    context.kill_buffer(buffer)
+    shutil.rmtree(cookies_manager.cookies_dir, ignore_errors=True)
+
+    return samples
+
+@benchmark("save_buffer_session", [1000, 10000])
+def bench_save_buffer_session(context, session_count):
+    module_path = context.browser_app
+    session_data = json.dumps({"scroll": 12345, "zoom": 1.25, "history": ["https://example.org/page/{}".format(index) for index in range(5)]})
+
+    with open(context.eaf.session_file, "w") as f:
+        json.dump({module_path: {"https://example.org/{}".format(index): session_data for index in range(session_count)}}, f)
+
+    samples = []
+    for index in range(context.repeat):
+        url = "https://example.org/{}".format(index)
+
+        # save_buffer_session and restore_buffer_session do file work in worker pool, measure it directly.
+        start = time.perf_counter()
+        context.eaf.write_session_file(module_path, url, session_data)
+        write_time = elapsed_since(start)
+
+        start = time.perf_counter()
+        context.eaf.read_session_file(module_path, url)
+        samples.append({"write": write_time, "read": elapsed_since(start)})
+
+    os.remove(context.eaf.session_file)
+
+    return samples
+
+@benchmark("convert_index_html", [100, 1000])
+def bench_convert_index_html(context, tag_count):
+    from core.webengine import BrowserBuffer
+
+    # Index file of web app build output, many scripts and style sheets.
+    head = "\n".join("<link rel='stylesheet' href='css/chunk{0}.css'><script src='js/chunk{0}.js'></script>".format(index)
+                     for index in range(tag_count))
+    body = "\n".join("<div class='item'>{}</div>".format(index) for index in range(tag_count))
+    index_html = "<html><head>{}</head><body><div id='app'>{}</div></body></html>".format(head, body)
+
+    # convert_index_html only read theme colors of buffer.
+    class ThemeBuffer(object):
+        theme_background_color = "#FFFFFF"
+        theme_foreground_color = "#000000"
+
+    samples = []
+    for _ in range(context.repeat):
+        start = time.perf_counter()
+        BrowserBuffer.convert_index_html(ThemeBuffer(), index_html, context.work_dir, True)
+        samples.append({"convert": elapsed_since(start)})
+
+    return samples
+
+def summarize(times):
+    times_ms = [round(duration * 1000, 4) for duration in times]
+    return {
+        "unit": "ms",
+        "samples": times_ms,
+        "min": min(times_ms),
+        "median": round(statistics.median(times_ms), 4),
+        "mean": round(statistics.mean(times_ms), 4),
+        "stdev": round(statistics.stdev(times_ms), 4) if len(times_ms) > 1 else 0
+    }
+
+def get_metadata(args):
+    from PyQt6.QtCore import QT_VERSION_STR
+
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+
+    return {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat
+    }
+
+def run_benchmarks(context, name_filter):
+    results = {}
+
+    for (name, params, func) in BENCHMARKS:
+        for param in params:
+            full_name = name if param is None else "{}.{}".format(name, param)
+            if name_filter and name_filter not in full_name:
+                continue
+
+            try:
+                samples = func(context, param)
+            except ImportError as e:
+                print("{:<44} skipped: {}".format(full_name, e), flush=True)
+                continue
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                continue
+
+            for metric in samples[0]:
+                result_name = "{}.{}".format(full_name, metric)
+                results[result_name] = summarize([sample[metric] for sample in samples])
+                print("{:<44} median={:>10.3f}ms min={:>10.3f}ms".format(
+                    result_name, results[result_name]["median"], results[result_name]["min"]), flush=True)
+
+    return results
+
+def run(args):
+    from PyQt6.QtCore import QTimer
+
+    work_dir = tempfile.mkdtemp(prefix="eaf-bench-")
+    variables = build_emacs_variables(work_dir, args.vars)
+    (app, eaf, fake_emacs) = start_eaf(variables, EMACS_WIDTH, EMACS_HEIGHT)
+
+    context = BenchContext(app, eaf, work_dir, args.repeat)
+    results = {}
+
+    def run_in_main_thread():
+        results.update(run_benchmarks(context, args.filter))
+        app.quit()
+
+    QTimer.singleShot(0, run_in_main_thread)
+    app.exec()
+
+    eaf.cleanup()
+    eaf.server.shutdown()
+    fake_emacs.stop()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"metadata": get_metadata(args), "results": results}, f, indent=2)
+        print("Save results to {}".format(args.output))
+
+def compare(args):
+    with open(args.base, "r") as f:
+        base = json.load(f)
+    with open(args.new, "r") as f:
+        new = json.load(f)
+
+    print("base: {}".format(" ".join("{}={}".format(key, value) for (key, value) in base["metadata"].items())))
+    print("new:  {}\n".format(" ".join("{}={}".format(key, value) for (key, value) in new["metadata"].items())))
+    print("{:<44} {:>12} {:>12} {:>9}".format("Benchmark", "base(ms)", "new(ms)", "change"))
+
+    regressions = []
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        if name not in base["results"] or name not in new["results"]:
+            print("{:<44} {}".format(name, "only in new" if name in new["results"] else "only in base"))
+            continue
+
+        base_median = base["results"][name]["median"]
+        new_median = new["results"][name]["median"]
+        change = (new_median - base_median) / base_median * 100 if base_median > 0 else 0
+
+        mark = ""
+        if change > args.threshold:
+            mark = "slower"
+            regressions.append(name)
+        elif change < -args.threshold:
+            mark = "faster"
+
+        print("{:<44} {:>12.3f} {:>12.3f} {:>+8.1f}% {}".format(name, base_median, new_median, change, mark))
+
+    sys.exit(1 if len(regressions) > 0 else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of EAF core hot paths.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("--output", help="write results to JSON file")
+    run_parser.add_argument("--filter", help="only run benchmarks that name contain FILTER")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--vars", help="JSON file of Emacs variables that override eaf.el defaults")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two results")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="percent of median change that is reported")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+if __name__ == "__main__":
+    main()
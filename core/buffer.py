@@ -20,113 +20,31 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from PyQt6.QtCore import Qt, QEvent, QThread, pyqtSignal
-from PyQt6.QtGui import QKeyEvent, QCursor, QFocusEvent, QColor
+from PyQt6.QtGui import QCursor, QFocusEvent, QColor
 from PyQt6.QtWidgets import QGraphicsScene, QApplication
 from core.utils import (interactive, abstract, get_clipboard_text,
                         set_clipboard_text, eval_in_emacs, message_to_emacs,
                         input_message, get_emacs_var, get_emacs_func_result,
                         get_emacs_theme_mode, get_emacs_theme_foreground, get_emacs_theme_background)
+# Key dicts are imported here too, applications import them from core.buffer.
+from core.keymap import QT_KEY_DICT, QT_TEXT_DICT, QT_MODIFIER_DICT, parse_key, parse_key_sequence # noqa
+from core.trace import key_tracer
 import abc
-import string
 import time
 
-QT_KEY_DICT = {}
-
-# Build char event.
-for char in string.ascii_lowercase:
-    upper_char = char.upper()
-    QT_KEY_DICT[char] = eval("Qt.Key.Key_{}".format(upper_char))
-    QT_KEY_DICT[upper_char] = eval("Qt.Key.Key_{}".format(upper_char))
-
-# Build number event.
-for number in range(0, 10):
-    QT_KEY_DICT[str(number)] = eval("Qt.Key.Key_{}".format(number))
-
-QT_KEY_DICT.update({
-    ''':''': Qt.Key.Key_Colon,
-    ''';''': Qt.Key.Key_Semicolon,
-    '''.''': Qt.Key.Key_Period,
-    ''',''': Qt.Key.Key_Comma,
-    '''+''': Qt.Key.Key_Plus,
-    '''-''': Qt.Key.Key_Minus,
-    '''=''': Qt.Key.Key_Equal,
-    '''_''': Qt.Key.Key_Underscore,
-    '''[''': Qt.Key.Key_BracketLeft,
-    ''']''': Qt.Key.Key_BracketRight,
-    '''(''': Qt.Key.Key_BraceLeft,
-    ''')''': Qt.Key.Key_BraceRight,
-    '''{''': Qt.Key.Key_ParenLeft,
-    '''}''': Qt.Key.Key_ParenRight,
-    '''<''': Qt.Key.Key_Less,
-    '''>''': Qt.Key.Key_Greater,
-    '''@''': Qt.Key.Key_At,
-    '''\\''': Qt.Key.Key_Backslash,
-    '''|''': Qt.Key.Key_Bar,
-    '''/''': Qt.Key.Key_Slash,
-    '''#''': Qt.Key.Key_NumberSign,
-    '''$''': Qt.Key.Key_Dollar,
-    '''?''': Qt.Key.Key_Question,
-    '''"''': Qt.Key.Key_QuoteDbl,
-    '''`''': Qt.Key.Key_QuoteLeft,
-    '''%''': Qt.Key.Key_Percent,
-    '''^''': Qt.Key.Key_AsciiCircum,
-    '''&''': Qt.Key.Key_Ampersand,
-    '''*''': Qt.Key.Key_Asterisk,
-    '''~''': Qt.Key.Key_AsciiTilde,
-    '''!''': Qt.Key.Key_Exclam,
-    '''\'''': Qt.Key.Key_Apostrophe,
-    '''SPC''': Qt.Key.Key_Space,
-    '''RET''': Qt.Key.Key_Return,
-    '''DEL''': Qt.Key.Key_Backspace,
-    '''TAB''': Qt.Key.Key_Tab,
-    '''<backtab>''': Qt.Key.Key_Backtab,
-    '''<home>''': Qt.Key.Key_Home,
-    '''<end>''': Qt.Key.Key_End,
-    '''<left>''': Qt.Key.Key_Left,
-    '''<right>''': Qt.Key.Key_Right,
-    '''<up>''': Qt.Key.Key_Up,
-    '''<down>''': Qt.Key.Key_Down,
-    '''<prior>''': Qt.Key.Key_PageUp,
-    '''<next>''': Qt.Key.Key_PageDown,
-    '''<delete>''': Qt.Key.Key_Delete,
-    '''<backspace>''': Qt.Key.Key_Backspace,
-    '''<return>''': Qt.Key.Key_Return,
-    '''<escape>''': Qt.Key.Key_Escape
-})
-
-# NOTE:
-# We need convert return or backspace to correct text,
-# otherwise EAF browser will crash when user type return/backspace key.
-QT_TEXT_DICT = {
-    "SPC": " ",
-    "<return>": "RET",
-    "<backtab>": "",
-    "<home>": "",
-    "<end>": "",
-    "<left>": "",
-    "<right>": "",
-    "<up>": "",
-    "<down>": "",
-    "<prior>": "",
-    "<next>": "",
-    "<delete>": "",
-    "<backspace>": "",
-    "<escape>": ""
-}
-
-QT_MODIFIER_DICT = {
-    "C": Qt.KeyboardModifier.ControlModifier,
-    "M": Qt.KeyboardModifier.AltModifier,
-    "S": Qt.KeyboardModifier.ShiftModifier,
-    "s": Qt.KeyboardModifier.MetaModifier
-}
-
 class Buffer(QGraphicsScene):
     __metaclass__ = abc.ABCMeta
 
     aspect_ratio_change = pyqtSignal()
     enter_fullscreen_request = pyqtSignal()
     exit_fullscreen_request = pyqtSignal()
+    # Emit old url and new url when app change url of buffer, such as browser navigate to new page.
+    url_change = pyqtSignal(object, object)
+
+    # Embed buffer widget in view directly when buffer has single view,
+    # skip QGraphicsScene compositing pass. Only used when fit_to_view is False and aspect_ratio is 0,
+    # view fallback to QGraphicsScene when buffer show in several windows.
+    direct_embedding = False
 
     def __init__(self, buffer_id, url, arguments, fit_to_view):
         super(QGraphicsScene, self).__init__()
@@ -154,6 +72,18 @@ class Buffer(QGraphicsScene):
         self.enter_fullscreen_request.connect(self.enable_fullscreen)
         self.exit_fullscreen_request.connect(self.disable_fullscreen)
 
+    @property
+    def url(self):
+        return self._url
+
+    @url.setter
+    def url(self, url):
+        old_url = getattr(self, "_url", None)
+        self._url = url
+
+        if old_url is not None and old_url != url:
+            self.url_change.emit(old_url, url)
+
     def base_class_name(self):
         return self.__class__.__bases__[0].__name__
 
@@ -382,42 +312,45 @@ class Buffer(QGraphicsScene):
 
     def send_key(self, event_string):
         ''' Fake key event.'''
-        # Init.
-        text = QT_TEXT_DICT.get(event_string, event_string)
-        modifier = Qt.KeyboardModifier.NoModifier
-
-        if event_string == "<backtab>" or (len(event_string) == 1 and event_string.isupper()):
-            modifier = Qt.KeyboardModifier.ShiftModifier
+        key = parse_key(event_string)
 
-        # NOTE: don't ignore text argument, otherwise QWebEngineView not respond key event.
-        try:
-            key_press = QKeyEvent(QEvent.Type.KeyPress, QT_KEY_DICT[event_string], modifier, text)
-        except:
-            key_press = QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_unknown, modifier, text)
+        if key_tracer.enabled:
+            key_tracer.mark("build")
 
         for widget in self.get_key_event_widgets():
-            QApplication.postEvent(widget, key_press)
+            QApplication.postEvent(widget, key.press_event())
+            QApplication.postEvent(widget, key.release_event())
+
+        if key_tracer.enabled:
+            key_tracer.mark("post")
 
         self.send_key_filter(event_string)
 
+    def send_key_batch(self, key_string):
+        ''' Fake key events of self-inserting characters in KEY_STRING.
+
+        Emacs coalesces typed characters and send them with one call,
+        events are posted in order, so characters never arrive out of order.
+
+        NOTE: each character go through send_key, so app that override send_key get every key.'''
+        for char in key_string:
+            self.send_key("SPC" if char == " " else char)
+
     def send_key_sequence(self, event_string):
         ''' Fake key sequence.'''
-        event_list = event_string.split("-")
+        key = parse_key_sequence(event_string)
 
-        if len(event_list) > 1:
+        if key is not None:
             widget = self.buffer_widget.focusProxy()
-            last_char = event_list[-1]
-            last_key = last_char.lower() if len(last_char) == 1 else last_char
 
-            modifier_keys = [QT_MODIFIER_DICT.get(modifier) for modifier in event_list[0:-1]]
-            modifier_flags = Qt.KeyboardModifier.NoModifier
-            for modifier in modifier_keys:
-                modifier_flags |= modifier
+            if key_tracer.enabled:
+                key_tracer.mark("build")
 
-            last_key = QT_TEXT_DICT.get(last_key, last_key)
+            QApplication.postEvent(widget, key.press_event())
+            QApplication.postEvent(widget, key.release_event())
 
-            key_event = QKeyEvent(QEvent.Type.KeyPress, QT_KEY_DICT[last_key], modifier_flags, last_key)
-            QApplication.postEvent(widget, key_event)
+            if key_tracer.enabled:
+                key_tracer.mark("post")
 
     def get_url(self):
         ''' Get url.'''
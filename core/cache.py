@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+import threading
+import time
+
+class EmacsFuncCache(object):
+    '''
+    LRU cache of Emacs function results, key is function name and arguments.
+
+    Policy of function is TTL in seconds, or None that mean result is valid until it's invalidated,
+    Emacs push invalidation or new value when result changed.
+    FETCH is called with function name and arguments when cache miss.
+    '''
+
+    def __init__(self, fetch, max_size=256, policies={}):
+        self.fetch = fetch
+        self.max_size = max_size
+        self.policies = dict(policies)
+
+        self.lock = threading.Lock()
+        # Key is (function name, arguments), value is (result, expire time).
+        self.entries = OrderedDict()
+
+        # Metrics.
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(self, func_name, func_args):
+        # Arguments are list of strings and numbers, repr is hashable and exact.
+        return (func_name, repr(func_args))
+
+    def set_policy(self, func_name, ttl):
+        with self.lock:
+            self.policies[func_name] = ttl
+
+    def get(self, func_name, func_args):
+        key = self.make_key(func_name, func_args)
+
+        with self.lock:
+            if key in self.entries:
+                (result, expire_time) = self.entries[key]
+                if expire_time is None or time.time() < expire_time:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+
+                del self.entries[key]
+                self.expired += 1
+
+            self.misses += 1
+
+        # Don't hold lock during round trip to Emacs.
+        result = self.fetch(func_name, func_args)
+        self.put(func_name, func_args, result)
+
+        return result
+
+    def put(self, func_name, func_args, result):
+        key = self.make_key(func_name, func_args)
+
+        with self.lock:
+            ttl = self.policies.get(func_name)
+            self.entries[key] = (result, None if ttl is None else time.time() + ttl)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, func_name=None, func_args=None):
+        ''' Drop results of FUNC_NAME, drop all results if FUNC_NAME is None.
+        Only drop result of FUNC_ARGS if it's not None.'''
+        with self.lock:
+            if func_name is None:
+                keys = list(self.entries)
+            elif func_args is not None:
+                keys = [self.make_key(func_name, func_args)]
+            else:
+                keys = [key for key in self.entries if key[0] == func_name]
+
+            for key in keys:
+                if self.entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def get_stats(self):
+        ''' Return size, max size, hits, misses, expired, evictions and invalidations.'''
+        with self.lock:
+            return [len(self.entries), self.max_size, self.hits, self.misses, self.expired, self.evictions, self.invalidations]
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# IPC clients of Hyprland and Sway, talk to compositor socket directly instead of run hyprctl or swaymsg.
+#
+# Window table is cached in memory, event stream of compositor mark table dirty,
+# table is refreshed with one IPC request when it's dirty or older than `max_age'.
+# Socket paths can pass to constructor, so clients can test with fake socket server.
+
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+class CompositorClient(object):
+    '''
+    Base class of compositor IPC client.
+
+    Subclass implement fetch_windows, read_events and move_window.
+    Window is dict with keys: id, pid, title, class, x, y, width, height, focused.
+    '''
+
+    # Seconds that event socket wait before reconnect.
+    RECONNECT_DELAY = 3
+
+    # Seconds that request wait compositor reply, Emacs is waiting when EAF ask window coordinate.
+    REQUEST_TIMEOUT = 1
+
+    def __init__(self, max_age=0.5):
+        # Compositor don't send event for every geometry change (such as resize tiled sibling window),
+        # so we refresh table when it's older than max_age seconds.
+        self.max_age = max_age
+
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.dirty = True
+        self.update_time = 0
+
+        self.event_thread = None
+        self.running = False
+
+        # Metrics.
+        self.query_count = 0
+        self.fetch_count = 0
+        self.event_count = 0
+
+    def start(self):
+        ''' Start thread that read event stream of compositor.'''
+        if self.event_thread is None:
+            self.running = True
+            self.event_thread = threading.Thread(target=self.event_loop, daemon=True)
+            self.event_thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def event_loop(self):
+        while self.running:
+            try:
+                for event in self.read_events():
+                    if not self.running:
+                        return
+                    self.event_count += 1
+                    self.handle_event(event)
+            except OSError:
+                pass
+
+            # Event stream closed, table can't trust any more.
+            self.mark_dirty()
+            time.sleep(self.RECONNECT_DELAY)
+
+    def handle_event(self, event):
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        with self.lock:
+            self.dirty = True
+
+    def get_windows(self):
+        ''' Return cached window list, refresh it when it's dirty or too old.'''
+        with self.lock:
+            self.query_count += 1
+            need_fetch = self.dirty or time.time() - self.update_time > self.max_age
+
+        if need_fetch:
+            windows = self.fetch_windows()
+            with self.lock:
+                self.fetch_count += 1
+                self.windows = {window["id"]: window for window in windows}
+                self.dirty = False
+                self.update_time = time.time()
+
+        with self.lock:
+            return list(self.windows.values())
+
+    def find_window(self, predicate):
+        for window in self.get_windows():
+            if predicate(window):
+                return window
+        return None
+
+    def get_window_by_title(self, title):
+        return self.find_window(lambda window: window["title"] == title)
+
+    def get_window_by_pid(self, pid):
+        ''' Return focused window of PID, or last window of PID if none of them is focused.
+
+        Emacs has one window per frame, coordinate of focused frame is what Emacs want.'''
+        windows = [window for window in self.get_windows() if window["pid"] == pid]
+        for window in windows:
+            if window["focused"]:
+                return window
+        return windows[-1] if len(windows) > 0 else None
+
+    def set_focused_window(self, window_id):
+        with self.lock:
+            for window in self.windows.values():
+                window["focused"] = window["id"] == window_id
+
+    def update_window_position(self, window_id, x, y):
+        with self.lock:
+            if window_id in self.windows:
+                self.windows[window_id]["x"] = x
+                self.windows[window_id]["y"] = y
+
+    def get_stats(self):
+        ''' Return query count, fetch count and event count.'''
+        with self.lock:
+            return [self.query_count, self.fetch_count, self.event_count]
+
+    def fetch_windows(self):
+        raise NotImplementedError
+
+    def read_events(self):
+        raise NotImplementedError
+
+    def move_window(self, title, x, y):
+        raise NotImplementedError
+
+def get_hyprland_socket_dir():
+    signature = os.getenv("HYPRLAND_INSTANCE_SIGNATURE")
+    if not signature:
+        return None
+
+    # New Hyprland put sockets in XDG_RUNTIME_DIR, old Hyprland put them in /tmp.
+    for base_dir in [os.path.join(os.getenv("XDG_RUNTIME_DIR", "/run/user/{}".format(os.getuid())), "hypr"), "/tmp/hypr"]:
+        socket_dir = os.path.join(base_dir, signature)
+        if os.path.exists(os.path.join(socket_dir, ".socket.sock")):
+            return socket_dir
+
+    return None
+
+class HyprlandClient(CompositorClient):
+
+    # Events that only change focus, window geometry is not changed.
+    FOCUS_EVENTS = set(["activewindow", "activewindowv2", "focusedmon", "activelayout", "submap"])
+
+    def __init__(self, request_socket_path, event_socket_path, max_age=0.5):
+        CompositorClient.__init__(self, max_age)
+
+        self.request_socket_path = request_socket_path
+        self.event_socket_path = event_socket_path
+
+    def request(self, command):
+        ''' Send COMMAND to request socket, Hyprland close connection after reply.'''
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.REQUEST_TIMEOUT)
+            sock.connect(self.request_socket_path)
+            sock.sendall(command.encode("utf-8"))
+
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+
+        return b"".join(chunks).decode("utf-8")
+
+    def fetch_windows(self):
+        windows = []
+        for client in json.loads(self.request("j/clients")):
+            windows.append({
+                "id": client["address"],
+                "pid": client["pid"],
+                "title": client["title"],
+                "class": client["class"],
+                "x": client["at"][0],
+                "y": client["at"][1],
+                "width": client["size"][0],
+                "height": client["size"][1],
+                "focused": client.get("focusHistoryID") == 0
+            })
+        return windows
+
+    def read_events(self):
+        ''' Yield (event name, data) of Hyprland event stream, line format is "event>>data".'''
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.event_socket_path)
+
+            buffer = b""
+            while self.running:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return
+                buffer += chunk
+
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    (name, _, data) = line.decode("utf-8", "replace").partition(">>")
+                    yield (name, data)
+
+    def handle_event(self, event):
+        (name, data) = event
+
+        if name == "activewindowv2":
+            # Data is window address without "0x" prefix.
+            self.set_focused_window("0x" + data)
+        elif name not in self.FOCUS_EVENTS:
+            self.mark_dirty()
+
+    def move_window(self, title, x, y):
+        window = self.get_window_by_title(title)
+        if window is None:
+            return
+
+        if window["x"] != x or window["y"] != y:
+            self.request("dispatch movewindowpixel exact {} {},title:^({})$".format(x, y, title))
+            self.update_window_position(window["id"], x, y)
+
+SWAY_IPC_MAGIC = b"i3-ipc"
+SWAY_IPC_HEADER = struct.Struct("<6sII")
+
+SWAY_RUN_COMMAND = 0
+SWAY_SUBSCRIBE = 2
+SWAY_GET_TREE = 4
+SWAY_EVENT_WINDOW = 0x80000003
+
+def sway_send(sock, message_type, payload=b""):
+    sock.sendall(SWAY_IPC_HEADER.pack(SWAY_IPC_MAGIC, len(payload), message_type) + payload)
+
+def sway_recv(sock):
+    ''' Return (message type, payload) of one Sway IPC message.'''
+    def recv_exactly(size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionResetError("Sway IPC socket closed")
+            data += chunk
+        return data
+
+    (magic, length, message_type) = SWAY_IPC_HEADER.unpack(recv_exactly(SWAY_IPC_HEADER.size))
+    if magic != SWAY_IPC_MAGIC:
+        raise ConnectionError("Invalid Sway IPC message")
+
+    return (message_type, recv_exactly(length))
+
+def sway_window_from_node(node):
+    return {
+        "id": node["id"],
+        "pid": node.get("pid"),
+        "title": node.get("name") or "",
+        "class": node.get("app_id") or (node.get("window_properties") or {}).get("class") or "",
+        "x": node["rect"]["x"],
+        "y": node["rect"]["y"],
+        "width": node["rect"]["width"],
+        "height": node["rect"]["height"],
+        "focused": node.get("focused", False)
+    }
+
+class SwayClient(CompositorClient):
+
+    def __init__(self, socket_path, max_age=0.5):
+        CompositorClient.__init__(self, max_age)
+
+        self.socket_path = socket_path
+
+    def request(self, message_type, payload=b""):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.REQUEST_TIMEOUT)
+            sock.connect(self.socket_path)
+            sway_send(sock, message_type, payload)
+            return json.loads(sway_recv(sock)[1])
+
+    def fetch_windows(self):
+        windows = []
+        nodes = [self.request(SWAY_GET_TREE)]
+
+        while len(nodes) > 0:
+            node = nodes.pop()
+            if node.get("pid") is not None:
+                windows.append(sway_window_from_node(node))
+            nodes += node.get("nodes", []) + node.get("floating_nodes", [])
+
+        return windows
+
+    def read_events(self):
+        ''' Yield (event type, payload) of Sway event stream.'''
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sway_send(sock, SWAY_SUBSCRIBE, json.dumps(["window", "workspace", "output"]).encode("utf-8"))
+
+            # Reply of subscribe.
+            sway_recv(sock)
+
+            while self.running:
+                yield sway_recv(sock)
+
+    def handle_event(self, event):
+        (event_type, payload) = event
+
+        if event_type != SWAY_EVENT_WINDOW:
+            # Workspace or output change, geometry of many windows maybe changed.
+            self.mark_dirty()
+            return
+
+        # Window event carry container, update table directly.
+        event_info = json.loads(payload)
+        container = event_info.get("container", {})
+        with self.lock:
+            if event_info.get("change") == "close":
+                self.windows.pop(container.get("id"), None)
+            elif container.get("pid") is not None:
+                self.windows[container["id"]] = sway_window_from_node(container)
+
+                # Only one window is focused.
+                if event_info.get("change") == "focus":
+                    for window in self.windows.values():
+                        window["focused"] = window["id"] == container["id"]
+
+    def move_window(self, title, x, y):
+        window = self.get_window_by_title(title)
+        if window is None:
+            return
+
+        if window["x"] != x or window["y"] != y:
+            self.request(SWAY_RUN_COMMAND, '[con_id={}] move absolute position {} {}'.format(window["id"], x, y).encode("utf-8"))
+            self.update_window_position(window["id"], x, y)
+
+compositor_client = None
+
+def get_compositor_client():
+    ''' Return IPC client of current compositor, or None if compositor is not Hyprland or Sway.'''
+    global compositor_client
+
+    if compositor_client is None:
+        current_desktop = os.getenv("XDG_CURRENT_DESKTOP")
+
+        if current_desktop == "Hyprland":
+            socket_dir = get_hyprland_socket_dir()
+            if socket_dir is not None:
+                compositor_client = HyprlandClient(os.path.join(socket_dir, ".socket.sock"),
+                                                   os.path.join(socket_dir, ".socket2.sock"))
+        elif current_desktop == "sway" and os.getenv("SWAYSOCK"):
+            compositor_client = SwayClient(os.getenv("SWAYSOCK"))
+
+        if compositor_client is not None:
+            compositor_client.start()
+
+    return compositor_client
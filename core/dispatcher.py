@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from PyQt6.QtCore import QObject, QThread, Qt, pyqtSignal
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, InvalidStateError
+import threading
+import time
+
+# Priority classes, smaller value run first.
+#
+# Input events and buffer lifecycle calls share normal priority,
+# so key events never overtake `new_buffer' of same buffer.
+PRIORITY_NORMAL = 0
+PRIORITY_HOUSEKEEPING = 1
+
+# Coalescing modes.
+#
+# latest: pending call is dropped when same key call arrive, only latest call run.
+# accumulate: calls with same key merge into one queue entry and run in order when entry is dispatched,
+#             call only merge when pending entry is tail of its queue, so it never overtake calls queued after pending entry.
+COALESCE_LATEST = "latest"
+COALESCE_ACCUMULATE = "accumulate"
+
+class Task(object):
+
+    __slots__ = ("run", "calls", "name", "priority", "key", "enqueue_time", "cancelled")
+
+    def __init__(self, run, args, kwargs, name, priority, key):
+        self.run = run
+        self.calls = [(args, kwargs)]
+        self.name = name
+        self.priority = priority
+        self.key = key
+        self.enqueue_time = time.time()
+        self.cancelled = False
+
+class MainThreadDispatcher(QObject):
+    '''
+    Run functions on Qt main thread, replace one queued Qt signal per call.
+
+    Tasks are queued by priority class, one queued signal wake up main thread to drain the queues.
+    Call from main thread run immediately, same as direct connected signal.
+    '''
+
+    wakeup = pyqtSignal()
+
+    # Max time (seconds) that one drain run, give Qt event loop chance to paint and handle input.
+    DRAIN_BUDGET = 0.02
+
+    def __init__(self, history_size=1000):
+        super(MainThreadDispatcher, self).__init__()
+
+        self.lock = threading.Lock()
+        self.queues = [deque() for _ in range(PRIORITY_HOUSEKEEPING + 1)]
+        self.coalesce_dict = {}
+        self.queue_depth = 0
+        self.wakeup_pending = False
+
+        # Metrics.
+        self.max_queue_depth = 0
+        self.dispatched_count = 0
+        self.coalesced_count = 0
+        self.wait_times = {}
+        self.history_size = history_size
+
+        self.wakeup.connect(self.drain, Qt.ConnectionType.QueuedConnection)
+
+    def is_main_thread(self):
+        return QThread.currentThread() == self.thread()
+
+    def post(self, run, args, kwargs, name, priority=PRIORITY_NORMAL, coalesce=None, key=None):
+        ''' Queue RUN(args, kwargs) to main thread, KEY is used to coalesce calls when COALESCE is not None.'''
+        if self.is_main_thread():
+            run(args, kwargs)
+            return
+
+        need_wakeup = False
+
+        with self.lock:
+            pending = self.coalesce_dict.get(key) if coalesce is not None else None
+
+            if pending is not None and coalesce == COALESCE_ACCUMULATE and self.queues[pending.priority][-1] is pending:
+                pending.calls.append((args, kwargs))
+                self.coalesced_count += 1
+            else:
+                if pending is not None and coalesce == COALESCE_LATEST:
+                    # Latest wins, drop pending call, new call queue at tail to keep order with other calls.
+                    pending.cancelled = True
+                    self.queue_depth -= 1
+                    self.coalesced_count += 1
+
+                task = Task(run, args, kwargs, name, priority, key)
+                self.queues[priority].append(task)
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+                if coalesce is not None:
+                    self.coalesce_dict[key] = task
+
+            if not self.wakeup_pending:
+                self.wakeup_pending = True
+                need_wakeup = True
+
+        if need_wakeup:
+            self.wakeup.emit()
+
+    def pop_task(self):
+        with self.lock:
+            for queue in self.queues:
+                while len(queue) > 0:
+                    task = queue.popleft()
+                    if task.cancelled:
+                        continue
+
+                    self.queue_depth -= 1
+                    if self.coalesce_dict.get(task.key) is task:
+                        self.coalesce_dict.pop(task.key)
+
+                    return task
+
+            self.wakeup_pending = False
+            return None
+
+    def drain(self):
+        start_time = time.time()
+
+        while True:
+            task = self.pop_task()
+            if task is None:
+                return
+
+            self.record_wait_time(task.name, time.time() - task.enqueue_time)
+
+            # NOTE: exception must not leave drain, wakeup_pending stay True and queue never drain again,
+            # and PyQt6 abort process when exception raise from slot.
+            for (args, kwargs) in task.calls:
+                try:
+                    task.run(args, kwargs)
+                except Exception:
+                    import traceback
+                    traceback.print_exc()
+
+            if time.time() - start_time > self.DRAIN_BUDGET:
+                # Queue not empty yet, wake up again after Qt handle pending events.
+                self.wakeup.emit()
+                return
+
+    def record_wait_time(self, name, wait_time):
+        with self.lock:
+            self.dispatched_count += 1
+            if name not in self.wait_times:
+                self.wait_times[name] = deque(maxlen=self.history_size)
+            self.wait_times[name].append(wait_time)
+
+    def get_stats(self):
+        ''' Return dispatcher metrics: queue depth, max queue depth, dispatched count, coalesced count,
+        and list of (name, count, p50 wait ms, p99 wait ms) for each function.'''
+        with self.lock:
+            wait_times = {name: sorted(times) for (name, times) in self.wait_times.items()}
+            stats = [self.queue_depth, self.max_queue_depth, self.dispatched_count, self.coalesced_count]
+
+        function_stats = []
+        for name in sorted(wait_times):
+            times = wait_times[name]
+            function_stats.append([name, len(times),
+                                   round(times[len(times) // 2] * 1000, 3),
+                                   round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 3)])
+
+        return stats + [function_stats]
+
+main_thread_dispatcher = MainThreadDispatcher()
+
+class SyncCallBridge(object):
+    '''
+    Run function on Qt main thread and wait result in caller thread, used by EPC calls that need return value.
+
+    Function get a RESOLVE callback, it can call RESOLVE immediately or later (such as in callback of runJavaScript),
+    so many outstanding calls can wait at same time without nesting QEventLoop in main thread.
+    '''
+
+    def __init__(self, dispatcher, timeout=5, history_size=1000):
+        self.dispatcher = dispatcher
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.call_count = 0
+        self.timeout_count = 0
+        self.latencies = {}
+        self.history_size = history_size
+
+    def call(self, name, func):
+        ''' Call FUNC(resolve) on main thread, return resolved result, or None if timeout.'''
+        future = Future()
+
+        def resolve(result):
+            try:
+                future.set_result(result)
+            except InvalidStateError:
+                # Caller has timeout and give up this call.
+                pass
+
+        if self.dispatcher.is_main_thread():
+            # Main thread can't wait itself, resolve must be called synchronously.
+            func(resolve)
+            return future.result() if future.done() else None
+
+        def run(args, kwargs):
+            if future.set_running_or_notify_cancel():
+                try:
+                    func(resolve)
+                except Exception as e:
+                    import traceback
+                    traceback.print_exc()
+                    if not future.done():
+                        future.set_exception(e)
+
+        start_time = time.time()
+        self.dispatcher.post(run, (), {}, name)
+
+        try:
+            result = future.result(self.timeout)
+            self.record_call(name, time.time() - start_time, False)
+            return result
+        except FutureTimeoutError:
+            future.cancel()
+            self.record_call(name, time.time() - start_time, True)
+            print("Sync call {} timeout after {} seconds.".format(name, self.timeout))
+            return None
+        except Exception:
+            self.record_call(name, time.time() - start_time, False)
+            return None
+
+    def record_call(self, name, latency, is_timeout):
+        with self.lock:
+            self.call_count += 1
+            if is_timeout:
+                self.timeout_count += 1
+            if name not in self.latencies:
+                self.latencies[name] = deque(maxlen=self.history_size)
+            self.latencies[name].append(latency)
+
+    def get_stats(self):
+        ''' Return call count, timeout count, and list of (name, count, p50 ms, p99 ms) for each function.'''
+        with self.lock:
+            latencies = {name: sorted(times) for (name, times) in self.latencies.items()}
+            stats = [self.call_count, self.timeout_count]
+
+        function_stats = []
+        for name in sorted(latencies):
+            times = latencies[name]
+            function_stats.append([name, len(times),
+                                   round(times[len(times) // 2] * 1000, 3),
+                                   round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 3)])
+
+        return stats + [function_stats]
+
+sync_call_bridge = SyncCallBridge(main_thread_dispatcher)
@@ -296,13 +296,20 @@ channel : Event channels for incoming messages."
 
 (defun eaf-epc-connect (host port)
   "[internal] Connect the server, initialize the process and
-return eaf-epc-connection object."
+return eaf-epc-connection object.
+
+If PORT is a string, connect to unix domain socket file PORT, HOST is ignored."
   (eaf-epc-log ">> Connection start: %s:%s" host port)
   (let* ((connection-id (eaf-epc-uid))
          (connection-name (format "eaf-epc con %s" connection-id))
          (connection-buf (eaf-epc-make-procbuf (format "*%s*" connection-name)))
          (connection-process
-          (open-network-stream connection-name connection-buf host port))
+          (if (stringp port)
+              (make-network-process :name connection-name
+                                    :buffer connection-buf
+                                    :family 'local
+                                    :service port)
+            (open-network-stream connection-name connection-buf host port)))
          (channel (list connection-name nil))
          (connection (make-eaf-epc-connection
                       :name connection-name
@@ -738,22 +745,37 @@ This variable is used for the management purpose.")
       nil))))
 
 (defun eaf-epc-server-start (connect-function &optional port)
-  "Start TCP Server and return the main process object."
+  "Start TCP Server and return the main process object.
+
+If PORT is a string, start server on unix domain socket file PORT."
   (let*
       ((connect-function connect-function)
        (name (format "EAF EPC Server %s" (eaf-epc-uid)))
        (buf (eaf-epc-make-procbuf (format " *%s*" name)))
+       (sentinel
+        (lambda (process message)
+          (eaf-epc-server-sentinel process message connect-function)))
        (main-process
-        (make-network-process
-         :name name
-         :buffer buf
-         :family 'ipv4
-         :server t
-         :host "127.0.0.1"
-         :service (or port t)
-         :sentinel
-         (lambda (process message)
-           (eaf-epc-server-sentinel process message connect-function)))))
+        (if (stringp port)
+            (progn
+              ;; Remove socket file that left by crashed Emacs.
+              (when (file-exists-p port)
+                (delete-file port))
+              (make-network-process
+               :name name
+               :buffer buf
+               :family 'local
+               :server t
+               :service port
+               :sentinel sentinel))
+          (make-network-process
+           :name name
+           :buffer buf
+           :family 'ipv4
+           :server t
+           :host "127.0.0.1"
+           :service (or port t)
+           :sentinel sentinel))))
     (push (cons main-process
                 (make-eaf-epc-server
                  :name name :process main-process
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWebEngineCore import QWebEnginePage
+from core.utils import get_process_rss
+from collections import OrderedDict
+import time
+
+STAGE_ACTIVE = "active"
+STAGE_FROZEN = "frozen"
+STAGE_DISCARDED = "discarded"
+
+class IdleBufferManager(object):
+    '''
+    Move hidden browser buffers through freeze and discard stages.
+
+    Stage one freezes the page (renderer stops running JavaScript and timers),
+    stage two discards the page (renderer memory is released) when the renderers
+    exceed memory budget, least recently hidden buffer goes first.
+
+    Buffer is restored to active stage when any view of buffer show again.
+    '''
+
+    def __init__(self, buffer_dict, freeze_delay, memory_budget, check_interval=10, hide_stop_painting=False):
+        self.buffer_dict = buffer_dict
+
+        # Mark page invisible when buffer hide, renderer stop painting hidden page.
+        self.hide_stop_painting = hide_stop_painting
+
+        # Seconds that a buffer must stay hidden before freeze, 0 mean never freeze.
+        self.freeze_delay = freeze_delay
+        # Renderer memory budget in bytes, 0 mean never discard.
+        self.memory_budget = memory_budget * 1024 * 1024
+
+        # Hidden buffer id -> hide time, least recently hidden first.
+        self.hidden_buffers = OrderedDict()
+        self.buffer_stages = {}
+        self.session_data_dict = {}
+
+        self.check_timer = QTimer()
+        self.check_timer.timeout.connect(self.check_idle_buffers)
+        if self.freeze_delay > 0 or self.memory_budget > 0:
+            self.check_timer.start(check_interval * 1000)
+
+    def get_web_page(self, buffer_id):
+        if buffer_id in self.buffer_dict:
+            return getattr(self.buffer_dict[buffer_id].buffer_widget, "web_page", None)
+
+        return None
+
+    def is_audible(self, buffer_id):
+        # Don't stop page that play media in background.
+        web_page = self.get_web_page(buffer_id)
+        return web_page is not None and web_page.recentlyAudible()
+
+    def get_stage(self, buffer_id):
+        return self.buffer_stages.get(buffer_id, STAGE_ACTIVE)
+
+    def buffer_hide(self, buffer_id):
+        ''' Record buffer when all views of buffer hide.'''
+        web_page = self.get_web_page(buffer_id)
+        if web_page is not None:
+            self.hidden_buffers.pop(buffer_id, None)
+            self.hidden_buffers[buffer_id] = time.time()
+
+            if self.hide_stop_painting:
+                web_page.setVisible(False)
+
+    def buffer_show(self, buffer_id):
+        ''' Restore buffer to active stage when some view of buffer show.'''
+        self.hidden_buffers.pop(buffer_id, None)
+
+        stage = self.buffer_stages.pop(buffer_id, STAGE_ACTIVE)
+
+        web_page = self.get_web_page(buffer_id)
+        if web_page is not None:
+            # NOTE: page must be active before visible, Qt not allow visible page in frozen or discarded state.
+            if stage != STAGE_ACTIVE:
+                web_page.setLifecycleState(QWebEnginePage.LifecycleState.Active)
+            web_page.setVisible(True)
+
+        # Discarded page reload when it active again, restore session data after reload finished,
+        # otherwise reload reset scroll position.
+        session_data = self.session_data_dict.pop(buffer_id, "")
+        if stage == STAGE_DISCARDED and session_data != "" and web_page is not None:
+            buffer = self.buffer_dict[buffer_id]
+
+            def restore(ok):
+                web_page.loadFinished.disconnect(restore)
+                if buffer_id in self.buffer_dict:
+                    buffer.restore_session_data(session_data)
+
+            web_page.loadFinished.connect(restore)
+
+    def remove_buffer(self, buffer_id):
+        ''' Clean buffer record when buffer is killed.'''
+        self.hidden_buffers.pop(buffer_id, None)
+        self.buffer_stages.pop(buffer_id, None)
+        self.session_data_dict.pop(buffer_id, None)
+
+    def get_session_data(self, buffer_id):
+        ''' Return session data captured before discard, None if buffer is not discarded.'''
+        if self.get_stage(buffer_id) == STAGE_DISCARDED:
+            return self.session_data_dict.get(buffer_id, "")
+
+        return None
+
+    def freeze_buffer(self, buffer_id):
+        web_page = self.get_web_page(buffer_id)
+        if web_page is not None:
+            web_page.setVisible(False)
+            web_page.setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+            self.buffer_stages[buffer_id] = STAGE_FROZEN
+
+    def discard_buffer(self, buffer_id):
+        web_page = self.get_web_page(buffer_id)
+        if web_page is not None:
+            # Capture session data before renderer drop page content.
+            self.session_data_dict[buffer_id] = self.buffer_dict[buffer_id].save_session_data()
+
+            web_page.setVisible(False)
+            web_page.setLifecycleState(QWebEnginePage.LifecycleState.Discarded)
+            self.buffer_stages[buffer_id] = STAGE_DISCARDED
+
+    def check_idle_buffers(self):
+        ''' Advance stages of hidden buffers, called by timer in Qt main thread.'''
+        # Drop buffers that killed by other way.
+        for buffer_id in list(self.hidden_buffers):
+            if buffer_id not in self.buffer_dict:
+                self.remove_buffer(buffer_id)
+
+        # Stage one: freeze buffers that hidden long enough.
+        if self.freeze_delay > 0:
+            now = time.time()
+            for (buffer_id, hide_time) in self.hidden_buffers.items():
+                if self.get_stage(buffer_id) == STAGE_ACTIVE and now - hide_time >= self.freeze_delay and \
+                   not self.is_audible(buffer_id):
+                    self.freeze_buffer(buffer_id)
+
+        # Stage two: discard least recently hidden buffers until renderers fit memory budget.
+        if self.memory_budget > 0:
+            renderer_rss_dict = {}
+            for (_, pid, rss, _) in self.get_renderer_memory_info():
+                renderer_rss_dict[pid] = rss
+
+            total_rss = sum(renderer_rss_dict.values())
+            for buffer_id in list(self.hidden_buffers):
+                if total_rss <= self.memory_budget:
+                    break
+
+                if self.get_stage(buffer_id) != STAGE_DISCARDED and not self.is_audible(buffer_id):
+                    pid = self.get_web_page(buffer_id).renderProcessPid()
+                    self.discard_buffer(buffer_id)
+
+                    # Renderer process maybe shared with other pages, count it once.
+                    total_rss -= renderer_rss_dict.pop(pid, 0)
+
+    def get_renderer_memory_info(self):
+        ''' Return list of (buffer_id, renderer pid, rss bytes, stage) for all browser buffers.'''
+        memory_info = []
+
+        for buffer_id in list(self.buffer_dict):
+            web_page = self.get_web_page(buffer_id)
+            if web_page is not None:
+                pid = web_page.renderProcessPid()
+                memory_info.append((buffer_id, pid, get_process_rss(pid), self.get_stage(buffer_id)))
+
+        return memory_info
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque, OrderedDict
+from core.dispatcher import main_thread_dispatcher
+import itertools
+import re
+import subprocess
+import threading
+import time
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Parse progress percent from stdout line of tool.
+JOB_PROGRESS_PATTERNS = {
+    "youtube-dl": re.compile(r"\[download\]\s+(\d+(?:\.\d+)?)%"),
+}
+
+class Job(object):
+
+    def __init__(self, job_id, tool, args, buffer_id, description, on_exit, cwd, shell, stderr):
+        self.job_id = job_id
+        self.tool = tool
+        self.args = args
+        self.buffer_id = buffer_id
+        self.description = description
+        self.on_exit = on_exit
+        self.cwd = cwd
+        self.shell = shell
+        self.stderr = stderr
+
+        self.state = JOB_QUEUED
+        self.progress = None
+        self.returncode = None
+        self.output = deque(maxlen=100)
+        self.process = None
+        self.thread = None
+
+        self.submit_time = time.time()
+        self.start_time = None
+        self.end_time = None
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0
+        return round((self.end_time or time.time()) - self.start_time, 1)
+
+class JobManager(object):
+    '''
+    Own all subprocesses of external tools (youtube-dl, monolith, OCR...).
+
+    Jobs of same tool run at most `limit' at same time, other jobs wait in queue.
+    Each running job has one reader thread that parse progress from stdout,
+    thread is dropped when job finish, finished jobs are kept in short history for job list.
+    ON_EXIT(job) is called in Qt main thread when job finish or fail, not called when job is cancelled.
+    '''
+
+    def __init__(self, default_limit=2, tool_limits={}, history_size=50):
+        self.default_limit = default_limit
+        self.tool_limits = dict(tool_limits)
+
+        self.lock = threading.Lock()
+        self.job_counter = itertools.count(1)
+        self.jobs = OrderedDict()
+        self.history = deque(maxlen=history_size)
+
+    def get_limit(self, tool):
+        return max(1, self.tool_limits.get(tool, self.default_limit))
+
+    def submit(self, tool, args, buffer_id=None, description="", on_exit=None, cwd=None, shell=False, stderr=subprocess.STDOUT):
+        ''' Queue external tool job, return Job.
+
+        Output of stderr is merged into stdout by default, pass subprocess.DEVNULL to ignore it.'''
+        with self.lock:
+            job = Job(next(self.job_counter), tool, args, buffer_id, description, on_exit, cwd, shell, stderr)
+            self.jobs[job.job_id] = job
+
+        self.start_queued_jobs()
+
+        return job
+
+    def start_queued_jobs(self):
+        with self.lock:
+            running = {}
+            for job in self.jobs.values():
+                # Cancelled job still count until its process exit, keep heavy subprocesses bounded.
+                if job.thread is not None:
+                    running[job.tool] = running.get(job.tool, 0) + 1
+
+            for job in self.jobs.values():
+                if job.state == JOB_QUEUED and running.get(job.tool, 0) < self.get_limit(job.tool):
+                    running[job.tool] = running.get(job.tool, 0) + 1
+
+                    job.state = JOB_RUNNING
+                    job.start_time = time.time()
+                    job.thread = threading.Thread(target=self.run_job, args=(job,), daemon=True)
+                    job.thread.start()
+
+    def run_job(self, job):
+        progress_pattern = JOB_PROGRESS_PATTERNS.get(job.tool)
+
+        try:
+            # Universal newlines mode split "\r" progress line of youtube-dl too.
+            job.process = subprocess.Popen(job.args, cwd=job.cwd, shell=job.shell, text=True,
+                                           stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.PIPE,
+                                           stderr=job.stderr)
+
+            # Job is cancelled before process start.
+            if job.state == JOB_CANCELLED:
+                job.process.terminate()
+
+            for line in job.process.stdout:    # type: ignore
+                line = line.rstrip()
+                job.output.append(line)
+
+                if progress_pattern is not None:
+                    match = progress_pattern.search(line)
+                    if match:
+                        job.progress = float(match.group(1))
+
+            job.returncode = job.process.wait()
+        except OSError:
+            import traceback
+            traceback.print_exc()
+            job.returncode = -1
+
+        self.finish_job(job)
+
+    def finish_job(self, job):
+        with self.lock:
+            job.end_time = time.time()
+            job.process = None
+            job.thread = None
+
+            if job.state != JOB_CANCELLED:
+                job.state = JOB_DONE if job.returncode == 0 else JOB_FAILED
+
+            # Reap finished job.
+            self.jobs.pop(job.job_id, None)
+            self.history.append(job)
+
+        if job.state != JOB_CANCELLED and job.on_exit is not None:
+            main_thread_dispatcher.post(lambda args, kwargs: self.run_on_exit(job), (), {}, "job:{}".format(job.tool))
+
+        self.start_queued_jobs()
+
+    def run_on_exit(self, job):
+        # Callback run in Qt main thread, exception of app callback must not kill EAF process.
+        try:
+            job.on_exit(job)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+
+    def cancel(self, job_id):
+        ''' Cancel queued or running job.'''
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+
+            if job.state == JOB_QUEUED:
+                job.state = JOB_CANCELLED
+                job.end_time = time.time()
+                self.jobs.pop(job_id)
+                self.history.append(job)
+                return True
+
+            job.state = JOB_CANCELLED
+            process = job.process
+
+        # Reader thread finish job when process exit.
+        if process is not None:
+            process.terminate()
+
+        return True
+
+    def cancel_buffer_jobs(self, buffer_id):
+        ''' Cancel all jobs of buffer, such as when buffer is killed.'''
+        with self.lock:
+            job_ids = [job.job_id for job in self.jobs.values() if job.buffer_id == buffer_id]
+
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def running_job_count(self, buffer_id=None):
+        with self.lock:
+            return len([job for job in self.jobs.values()
+                        if job.state == JOB_RUNNING and (buffer_id is None or job.buffer_id == buffer_id)])
+
+    def get_job_list(self):
+        ''' Return list of (job id, tool, buffer id, description, state, progress, elapsed seconds),
+        active jobs first, then finished jobs from newest to oldest.'''
+        with self.lock:
+            jobs = list(self.jobs.values()) + list(reversed(self.history))
+
+        return [[job.job_id, job.tool, job.buffer_id or "", job.description, job.state,
+                 job.progress if job.progress is not None else -1, job.elapsed()]
+                for job in jobs]
+
+    def shutdown(self):
+        with self.lock:
+            job_ids = list(self.jobs)
+
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+# OCR load big model, only run one at same time.
+job_manager = JobManager(tool_limits={"ocr": 1})
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from PyQt6.QtCore import Qt, QEvent
+from PyQt6.QtGui import QKeyEvent
+from collections import namedtuple
+from functools import lru_cache
+import string
+
+QT_KEY_DICT = {}
+
+# Build char event.
+for char in string.ascii_lowercase:
+    QT_KEY_DICT[char] = QT_KEY_DICT[char.upper()] = getattr(Qt.Key, "Key_{}".format(char.upper()))
+
+# Build number event.
+for number in range(0, 10):
+    QT_KEY_DICT[str(number)] = getattr(Qt.Key, "Key_{}".format(number))
+
+QT_KEY_DICT.update({
+    ''':''': Qt.Key.Key_Colon,
+    ''';''': Qt.Key.Key_Semicolon,
+    '''.''': Qt.Key.Key_Period,
+    ''',''': Qt.Key.Key_Comma,
+    '''+''': Qt.Key.Key_Plus,
+    '''-''': Qt.Key.Key_Minus,
+    '''=''': Qt.Key.Key_Equal,
+    '''_''': Qt.Key.Key_Underscore,
+    '''[''': Qt.Key.Key_BracketLeft,
+    ''']''': Qt.Key.Key_BracketRight,
+    '''(''': Qt.Key.Key_ParenLeft,
+    ''')''': Qt.Key.Key_ParenRight,
+    '''{''': Qt.Key.Key_BraceLeft,
+    '''}''': Qt.Key.Key_BraceRight,
+    '''<''': Qt.Key.Key_Less,
+    '''>''': Qt.Key.Key_Greater,
+    '''@''': Qt.Key.Key_At,
+    '''\\''': Qt.Key.Key_Backslash,
+    '''|''': Qt.Key.Key_Bar,
+    '''/''': Qt.Key.Key_Slash,
+    '''#''': Qt.Key.Key_NumberSign,
+    '''$''': Qt.Key.Key_Dollar,
+    '''?''': Qt.Key.Key_Question,
+    '''"''': Qt.Key.Key_QuoteDbl,
+    '''`''': Qt.Key.Key_QuoteLeft,
+    '''%''': Qt.Key.Key_Percent,
+    '''^''': Qt.Key.Key_AsciiCircum,
+    '''&''': Qt.Key.Key_Ampersand,
+    '''*''': Qt.Key.Key_Asterisk,
+    '''~''': Qt.Key.Key_AsciiTilde,
+    '''!''': Qt.Key.Key_Exclam,
+    '''\'''': Qt.Key.Key_Apostrophe,
+    '''SPC''': Qt.Key.Key_Space,
+    '''RET''': Qt.Key.Key_Return,
+    '''DEL''': Qt.Key.Key_Backspace,
+    '''TAB''': Qt.Key.Key_Tab,
+    '''<backtab>''': Qt.Key.Key_Backtab,
+    '''<home>''': Qt.Key.Key_Home,
+    '''<end>''': Qt.Key.Key_End,
+    '''<left>''': Qt.Key.Key_Left,
+    '''<right>''': Qt.Key.Key_Right,
+    '''<up>''': Qt.Key.Key_Up,
+    '''<down>''': Qt.Key.Key_Down,
+    '''<prior>''': Qt.Key.Key_PageUp,
+    '''<next>''': Qt.Key.Key_PageDown,
+    '''<delete>''': Qt.Key.Key_Delete,
+    '''<backspace>''': Qt.Key.Key_Backspace,
+    '''<return>''': Qt.Key.Key_Return,
+    '''<escape>''': Qt.Key.Key_Escape
+})
+
+# NOTE:
+# We need convert return or backspace to correct text,
+# otherwise EAF browser will crash when user type return/backspace key.
+QT_TEXT_DICT = {
+    "SPC": " ",
+    "<return>": "RET",
+    "<backtab>": "",
+    "<home>": "",
+    "<end>": "",
+    "<left>": "",
+    "<right>": "",
+    "<up>": "",
+    "<down>": "",
+    "<prior>": "",
+    "<next>": "",
+    "<delete>": "",
+    "<backspace>": "",
+    "<escape>": ""
+}
+
+QT_MODIFIER_DICT = {
+    "C": Qt.KeyboardModifier.ControlModifier,
+    "M": Qt.KeyboardModifier.AltModifier,
+    "S": Qt.KeyboardModifier.ShiftModifier,
+    "s": Qt.KeyboardModifier.MetaModifier
+}
+
+class KeyRecord(namedtuple("KeyRecord", ["key", "modifiers", "text"])):
+    '''
+    Parsed Emacs key description, records are interned by parse_key and parse_key_sequence.
+
+    NOTE: we can't cache QKeyEvent self, Qt delete event after posted event is handled,
+    so we build new event from record every time.
+    '''
+
+    __slots__ = ()
+
+    def press_event(self):
+        return QKeyEvent(QEvent.Type.KeyPress, self.key, self.modifiers, self.text)
+
+    def release_event(self):
+        return QKeyEvent(QEvent.Type.KeyRelease, self.key, self.modifiers, self.text)
+
+@lru_cache(maxsize=None)
+def parse_key(event_string):
+    ''' Parse single key description, such as "a", "A", "SPC" or "<left>".'''
+    modifiers = Qt.KeyboardModifier.NoModifier
+    if event_string == "<backtab>" or (len(event_string) == 1 and event_string.isupper()):
+        modifiers = Qt.KeyboardModifier.ShiftModifier
+
+    # NOTE: don't ignore text, otherwise QWebEngineView not respond key event.
+    return KeyRecord(QT_KEY_DICT.get(event_string, Qt.Key.Key_unknown),
+                     modifiers,
+                     QT_TEXT_DICT.get(event_string, event_string))
+
+@lru_cache(maxsize=None)
+def parse_key_sequence(event_string):
+    ''' Parse key description with modifiers, such as "C-a" or "C-M-<left>".
+
+    Return None if description has no modifier.'''
+    modifiers = Qt.KeyboardModifier.NoModifier
+    has_modifier = False
+    key_string = event_string
+
+    # Modifier prefix is one char and "-", so "C--" parse as Control + "-".
+    while len(key_string) > 2 and key_string[1] == "-" and key_string[0] in QT_MODIFIER_DICT:
+        modifiers |= QT_MODIFIER_DICT[key_string[0]]
+        has_modifier = True
+        key_string = key_string[2:]
+
+    if not has_modifier:
+        return None
+
+    if len(key_string) == 1:
+        key_string = key_string.lower()
+
+    return KeyRecord(QT_KEY_DICT.get(key_string, Qt.Key.Key_unknown),
+                     modifiers,
+                     QT_TEXT_DICT.get(key_string, key_string))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from PyQt6.QtCore import QTimer
+from collections import OrderedDict
+import traceback
+
+class LazyRestoreManager(object):
+    '''
+    Placeholder buffers of restored session.
+
+    Placeholder only keeps buffer id, url, module path, arguments and title,
+    app module is imported and buffer is created when any view of placeholder show first time.
+
+    Trickle loader creates placeholders in background when CONCURRENCY is bigger than 0,
+    at most CONCURRENCY pages are loading at same time, next placeholder is created after page load finished.
+    '''
+
+    def __init__(self, create_buffer, concurrency=0, trickle_delay=1):
+        self.create_buffer = create_buffer
+        self.concurrency = concurrency
+
+        # Buffer id -> [url, module path, arguments, title], oldest placeholder first.
+        self.placeholders = OrderedDict()
+        # Buffers that trickle loader created, and their pages are loading.
+        self.loading_buffer_ids = set()
+
+        # Wait some time between two loads, give Qt main thread chance to handle user input.
+        self.trickle_timer = QTimer()
+        self.trickle_timer.setSingleShot(True)
+        self.trickle_timer.setInterval(int(trickle_delay * 1000))
+        self.trickle_timer.timeout.connect(self.trickle_load)
+
+    def add_placeholder(self, buffer_id, url, module_path, arguments, title):
+        self.placeholders[buffer_id] = [url, module_path, arguments, title]
+        self.schedule_trickle()
+
+    def is_placeholder(self, buffer_id):
+        return buffer_id in self.placeholders
+
+    def remove_buffer(self, buffer_id):
+        self.placeholders.pop(buffer_id, None)
+
+        if buffer_id in self.loading_buffer_ids:
+            self.loading_buffer_ids.discard(buffer_id)
+            self.schedule_trickle()
+
+    def get_placeholders(self):
+        ''' Return list of placeholders, each placeholder is list: buffer id, url, module path, title.'''
+        return [[buffer_id, url, module_path, title] for (buffer_id, (url, module_path, _, title)) in self.placeholders.items()]
+
+    def materialize(self, buffer_id):
+        ''' Create buffer of placeholder BUFFER_ID, return buffer, or None if placeholder not exists or create failed.'''
+        placeholder = self.placeholders.pop(buffer_id, None)
+        if placeholder is None:
+            return None
+
+        (url, module_path, arguments, _) = placeholder
+        try:
+            return self.create_buffer(buffer_id, url, module_path, arguments)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def schedule_trickle(self):
+        if self.concurrency > 0 and len(self.placeholders) > 0 and \
+           len(self.loading_buffer_ids) < self.concurrency and not self.trickle_timer.isActive():
+            self.trickle_timer.start()
+
+    def trickle_load(self):
+        ''' Create next placeholder in background.'''
+        if len(self.placeholders) == 0 or len(self.loading_buffer_ids) >= self.concurrency:
+            return
+
+        buffer_id = next(iter(self.placeholders))
+        buffer = self.materialize(buffer_id)
+
+        # Count browser buffer as loading until page load finished, other buffers are ready after create.
+        if buffer is not None and hasattr(buffer.buffer_widget, "web_page"):
+            self.loading_buffer_ids.add(buffer_id)
+            buffer.buffer_widget.loadFinished.connect(lambda _: self.load_finished(buffer_id))
+
+        self.schedule_trickle()
+
+    def load_finished(self, buffer_id):
+        if buffer_id in self.loading_buffer_ids:
+            self.loading_buffer_ids.discard(buffer_id)
+            self.schedule_trickle()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Log pipeline of EAF process.
+#
+# Qt messages and JavaScript console messages are kept in ring buffer instead of print to stdout,
+# stdout is *eaf* buffer of Emacs, noisy page print thousands lines per second.
+# Emacs fetch recent logs with EPC method when user need them.
+
+from collections import deque
+import threading
+import time
+
+LOG_LEVELS = ["debug", "info", "warning", "error"]
+
+# Messages that are never useful.
+IGNORE_MESSAGE_SUFFIXES = ("value updates in HTML will be broken!", )
+
+class LogPipeline(object):
+    '''
+    Ring buffer of log records, with deduplication and rate limit per source.
+
+    Record is list: [time, level, source, buffer id, message, repeat count].
+    Same message from same source is merged to last record.
+    Source that log more than RATE_LIMIT records in RATE_INTERVAL seconds is suppressed,
+    count of suppressed records is logged when next interval start.
+    Records at or above ECHO_LEVEL are printed to stdout too.
+    '''
+
+    def __init__(self, capacity=2000, rate_limit=50, rate_interval=1.0, echo_level="error"):
+        self.rate_limit = rate_limit
+        self.rate_interval = rate_interval
+        self.set_echo_level(echo_level)
+
+        self.lock = threading.Lock()
+        self.records = deque(maxlen=capacity)
+
+        # Key is (source, buffer id), value is [interval start time, count, suppressed count].
+        self.rates = {}
+        # Key is (source, buffer id), value is last record.
+        self.last_records = {}
+
+        # Metrics.
+        self.logged = 0
+        self.merged = 0
+        self.suppressed = 0
+
+    def set_echo_level(self, echo_level):
+        self.echo_level = LOG_LEVELS.index(echo_level) if echo_level in LOG_LEVELS else len(LOG_LEVELS)
+
+    def log(self, level, source, message, buffer_id=None):
+        if message.endswith(IGNORE_MESSAGE_SUFFIXES):
+            return
+
+        now = time.time()
+        key = (source, buffer_id)
+        echo_lines = []
+
+        with self.lock:
+            self.logged += 1
+
+            last_record = self.last_records.get(key)
+            if last_record is not None and last_record[4] == message and last_record[1] == level:
+                last_record[0] = now
+                last_record[5] += 1
+                self.merged += 1
+                return
+
+            rate = self.rates.get(key)
+            if rate is None or now - rate[0] > self.rate_interval:
+                if rate is not None and rate[2] > 0:
+                    echo_lines.append(self.append_record(now, "warning", source, buffer_id,
+                                                         "{} messages suppressed".format(rate[2]), key))
+                rate = self.rates[key] = [now, 0, 0]
+
+            if rate[1] >= self.rate_limit:
+                rate[2] += 1
+                self.suppressed += 1
+                return
+
+            rate[1] += 1
+            echo_lines.append(self.append_record(now, level, source, buffer_id, message, key))
+
+        for line in echo_lines:
+            if line is not None:
+                print(line, flush=True)
+
+    def append_record(self, now, level, source, buffer_id, message, key):
+        record = [now, level, source, buffer_id, message, 1]
+        self.records.append(record)
+        self.last_records[key] = record
+
+        if LOG_LEVELS.index(level) >= self.echo_level:
+            return "[EAF/{}] {}".format(source, message)
+
+    def debug(self, source, message, buffer_id=None):
+        self.log("debug", source, message, buffer_id)
+
+    def info(self, source, message, buffer_id=None):
+        self.log("info", source, message, buffer_id)
+
+    def warning(self, source, message, buffer_id=None):
+        self.log("warning", source, message, buffer_id)
+
+    def error(self, source, message, buffer_id=None):
+        self.log("error", source, message, buffer_id)
+
+    def get_records(self, count=200, level="debug", buffer_id=None):
+        ''' Return last COUNT records at or above LEVEL, only return records of BUFFER_ID if it's not None.'''
+        min_level = LOG_LEVELS.index(level) if level in LOG_LEVELS else 0
+
+        with self.lock:
+            records = [list(record) for record in self.records
+                       if LOG_LEVELS.index(record[1]) >= min_level and (buffer_id is None or record[3] == buffer_id)]
+
+        return records[-count:]
+
+    def remove_buffer(self, buffer_id):
+        with self.lock:
+            for key in [key for key in set(self.rates) | set(self.last_records) if key[1] == buffer_id]:
+                self.rates.pop(key, None)
+                self.last_records.pop(key, None)
+
+    def get_stats(self):
+        ''' Return size, capacity, logged count, merged count and suppressed count.'''
+        with self.lock:
+            return [len(self.records), self.records.maxlen, self.logged, self.merged, self.suppressed]
+
+    def qt_message_handler(self, mode, context, message):
+        from PyQt6.QtCore import QtMsgType
+
+        level = {QtMsgType.QtDebugMsg: "debug",
+                 QtMsgType.QtInfoMsg: "info",
+                 QtMsgType.QtWarningMsg: "warning"}.get(mode, "error")
+
+        self.log(level, context.category or "qt", message)
+
+    def install_qt_message_handler(self):
+        ''' Install process-wide Qt message handler, call once from main thread.'''
+        from PyQt6.QtCore import qInstallMessageHandler
+
+        qInstallMessageHandler(self.qt_message_handler)
+
+log_pipeline = LogPipeline()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.utils import get_process_rss
+import os
+import threading
+import time
+
+def get_process_cpu_time(pid):
+    ''' Get user + system CPU time (seconds) of process, return 0 if process not exists or /proc not available.'''
+    try:
+        with open("/proc/{}/stat".format(pid), "r") as f:
+            # Process name maybe include space, so we split fields after last ')'.
+            fields = f.read().rpartition(")")[2].split()
+            # Field 14 (utime) and 15 (stime) in proc(5), counting from field 3 (state).
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class ResourceMonitor(threading.Thread):
+    '''
+    Sample RSS and CPU time of EAF process and browser renderer processes.
+
+    Buffer information (renderer pid, Python object counts) is pushed by Qt main thread with update_buffer_info,
+    sampling of /proc run in this thread, so Qt main thread never block on it.
+    '''
+
+    def __init__(self, interval):
+        threading.Thread.__init__(self, daemon=True)
+
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+        # buffer_id -> dict of buffer information, update by Qt main thread.
+        self.buffer_info_dict = {}
+        # pid -> (rss bytes, cpu seconds, cpu percent), update by monitor thread.
+        self.process_samples = {}
+        self.last_cpu_times = {}
+        self.last_sample_time = 0
+
+    def update_buffer_info(self, buffer_id, info):
+        with self.lock:
+            self.buffer_info_dict[buffer_id] = info
+
+    def remove_buffer(self, buffer_id):
+        with self.lock:
+            self.buffer_info_dict.pop(buffer_id, None)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.sample()
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def sample(self):
+        with self.lock:
+            pids = set([os.getpid()] + [info["pid"] for info in self.buffer_info_dict.values() if info["pid"] > 0])
+
+        now = time.time()
+        elapsed = now - self.last_sample_time if self.last_sample_time > 0 else 0
+
+        process_samples = {}
+        cpu_times = {}
+        for pid in pids:
+            cpu_time = get_process_cpu_time(pid)
+            cpu_percent = 0.0
+            if elapsed > 0 and pid in self.last_cpu_times:
+                cpu_percent = max(cpu_time - self.last_cpu_times[pid], 0) * 100 / elapsed
+
+            cpu_times[pid] = cpu_time
+            process_samples[pid] = (get_process_rss(pid), cpu_time, cpu_percent)
+
+        with self.lock:
+            self.process_samples = process_samples
+        self.last_cpu_times = cpu_times
+        self.last_sample_time = now
+
+    def get_resource_table(self):
+        '''
+        Return list of rows: buffer id, app, title, pid, rss (KB), cpu time (seconds), cpu percent,
+        view count, script count, thread count, stage.
+
+        First row is EAF process self, its buffer id is empty string.
+        '''
+        with self.lock:
+            process_samples = self.process_samples
+            buffer_info_list = list(self.buffer_info_dict.items())
+
+        def build_row(buffer_id, app, title, pid, views, scripts, threads, stage):
+            (rss, cpu_time, cpu_percent) = process_samples.get(pid, (0, 0, 0.0))
+            return [buffer_id, app, title, pid, rss // 1024, round(cpu_time, 1), round(cpu_percent, 1),
+                    views, scripts, threads, stage]
+
+        total_views = sum(info["views"] for (_, info) in buffer_info_list)
+        total_threads = sum(info["threads"] for (_, info) in buffer_info_list)
+        rows = [build_row("", "eaf", "eaf.py", os.getpid(), total_views, 0, total_threads, "active")]
+
+        for (buffer_id, info) in buffer_info_list:
+            rows.append(build_row(buffer_id, info["app"], info["title"], info["pid"],
+                                  info["views"], info["scripts"], info["threads"], info["stage"]))
+
+        return rows
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Statistical profiler that sample Python stacks of all threads in running EAF process.
+#
+# Output is collapsed stacks (for flamegraph.pl or speedscope) or speedscope JSON,
+# open speedscope file at https://www.speedscope.app.
+
+from collections import Counter
+import json
+import os
+import sys
+import threading
+import time
+
+class SamplingProfiler(object):
+    '''
+    Sample stacks of all threads every INTERVAL seconds in profiler thread.
+
+    Stack is tuple of frame labels "function (file:line)", outermost first,
+    line is first line of function, so samples of same function are merged.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+        self.interval = 0.01
+        self.samples = Counter()
+        self.sample_count = 0
+        self.start_time = 0
+        self.stop_time = 0
+
+        # Cache labels of code objects, build label is slower than sample.
+        self.code_labels = {}
+
+    def is_running(self):
+        return self.thread is not None
+
+    def start(self, interval=0.01):
+        if self.is_running():
+            return False
+
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self.start_time = time.time()
+        self.stop_event.clear()
+
+        self.thread = threading.Thread(target=self.run, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+
+        return True
+
+    def stop(self):
+        if not self.is_running():
+            return False
+
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.stop_time = time.time()
+
+        return True
+
+    def get_label(self, code):
+        label = self.code_labels.get(code)
+        if label is None:
+            label = "{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+            self.code_labels[code] = label
+        return label
+
+    def run(self):
+        own_thread_id = threading.get_ident()
+        thread_names = {}
+
+        while not self.stop_event.wait(self.interval):
+            frames = sys._current_frames()
+
+            # Thread names only change when thread start, refresh them when new thread found.
+            if not all(thread_id in thread_names for thread_id in frames):
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            stacks = []
+            for (thread_id, frame) in frames.items():
+                if thread_id == own_thread_id:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(self.get_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                stack.reverse()
+
+                stacks.append(tuple(stack))
+
+            with self.lock:
+                self.samples.update(stacks)
+                self.sample_count += 1
+
+    def get_stats(self):
+        ''' Return running state, sample count and count of unique stacks.'''
+        with self.lock:
+            return [self.is_running(), self.sample_count, len(self.samples)]
+
+    def dump_collapsed(self, path):
+        ''' Dump samples as collapsed stacks, one line "thread;frame;frame count" per stack.'''
+        with self.lock:
+            samples = list(self.samples.items())
+
+        with open(path, "w") as f:
+            for (stack, count) in samples:
+                f.write("{} {}\n".format(";".join(label.replace(";", ":") for label in stack), count))
+
+        return path
+
+    def dump_speedscope(self, path):
+        ''' Dump samples as speedscope JSON, one sampled profile per thread.'''
+        with self.lock:
+            samples = list(self.samples.items())
+
+        frame_indexes = {}
+        frames = []
+        profiles = {}
+
+        for (stack, count) in samples:
+            (thread_name, labels) = (stack[0], stack[1:])
+
+            indexes = []
+            for label in labels:
+                if label not in frame_indexes:
+                    frame_indexes[label] = len(frames)
+                    frames.append({"name": label})
+                indexes.append(frame_indexes[label])
+
+            profile = profiles.setdefault(thread_name, {"samples": [], "weights": []})
+            profile["samples"].append(indexes)
+            profile["weights"].append(count * self.interval)
+
+        duration = (self.stop_time or time.time()) - self.start_time
+
+        with open(path, "w") as f:
+            json.dump({
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "shared": {"frames": frames},
+                "profiles": [{
+                    "type": "sampled",
+                    "name": thread_name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": duration,
+                    "samples": profile["samples"],
+                    "weights": profile["weights"]
+                } for (thread_name, profile) in profiles.items()],
+                "name": "eaf.py {}".format(os.getpid()),
+                "exporter": "eaf"
+            }, f)
+
+        return path
+
+    def dump(self, directory, output_format="collapsed"):
+        ''' Dump samples to timestamped file in DIRECTORY, return file path.'''
+        file_name = time.strftime("profile-%Y%m%d-%H%M%S", time.localtime(self.start_time))
+
+        if output_format == "speedscope":
+            return self.dump_speedscope(os.path.join(directory, file_name + ".speedscope.json"))
+        else:
+            return self.dump_collapsed(os.path.join(directory, file_name + ".collapsed.txt"))
+
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Record EPC calls that Emacs send to EAF process, replay them with benchmarks/replay_epc.py.
+#
+# Record file is JSON lines, first line is header with Emacs window size,
+# other lines are calls: {"time": seconds since record start, "method": name, "args": arguments}.
+
+import json
+import threading
+import time
+
+class EPCRecorder(object):
+
+    # Methods that control recorder self are not recorded.
+    SKIP_METHODS = set(["start_epc_record", "stop_epc_record"])
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.record_file = None
+        self.start_time = 0
+        self.call_count = 0
+
+    def is_recording(self):
+        return self.record_file is not None
+
+    def start(self, path, header={}):
+        with self.lock:
+            if self.record_file is not None:
+                return False
+
+            self.record_file = open(path, "w")
+            self.start_time = time.time()
+            self.call_count = 0
+
+            self.record_file.write(json.dumps(dict(header, type="header")) + "\n")
+
+        return True
+
+    def stop(self):
+        with self.lock:
+            if self.record_file is None:
+                return False
+
+            self.record_file.close()
+            self.record_file = None
+
+        return True
+
+    def record(self, method, args):
+        if method in self.SKIP_METHODS:
+            return
+
+        with self.lock:
+            if self.record_file is not None:
+                # Symbols from Emacs are saved as strings.
+                self.record_file.write(json.dumps({"time": round(time.time() - self.start_time, 6),
+                                                   "method": method,
+                                                   "args": list(args)}, default=str) + "\n")
+                self.call_count += 1
+
+class RecordingProxy(object):
+    '''
+    Register this proxy to EPC server instead of EAF instance,
+    it record call before forward it to EAF method when recorder is recording.
+    '''
+
+    def __init__(self, target, recorder):
+        self._target = target
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+
+        if not self._recorder.is_recording() or name.startswith("_") or not callable(attr):
+            return attr
+
+        def recorded_call(*args):
+            self._recorder.record(name, args)
+            return attr(*args)
+
+        return recorded_call
+
+epc_recorder = EPCRecorder()
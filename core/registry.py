@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+class BufferRegistry(object):
+    '''
+    Buffers and views of EAF with secondary indexes, all methods must call in Qt main thread.
+
+    Indexes:
+    buffers: buffer id -> buffer
+    views: view key -> view
+    url_index: (module_path, url) -> {buffer id: None}, buffer ids in create order
+    buffer_views: buffer id -> {view key: view}
+    pressed_widgets: buffer widgets that mouse button is pressed
+
+    Each method update all indexes together, so indexes never disagree with each other.
+    '''
+
+    def __init__(self):
+        self.buffers = {}
+        self.views = {}
+        self.url_index = {}
+        self.buffer_views = {}
+        self.pressed_widgets = set()
+
+        # Widgets that have `is_button_press' attribute but no `button_press_changed' signal, we poll them.
+        self.poll_press_widgets = {}
+
+    def add_buffer(self, buffer):
+        buffer_id = buffer.buffer_id
+
+        if buffer_id in self.buffers:
+            self.remove_buffer(buffer_id)
+
+        self.buffers[buffer_id] = buffer
+        self.add_url_index(buffer.module_path, buffer.url, buffer_id)
+        self.buffer_views.setdefault(buffer_id, {})
+
+        buffer.url_change.connect(lambda old_url, new_url: self.update_buffer_url(buffer, old_url, new_url))
+
+        buffer_widget = buffer.buffer_widget
+        if hasattr(buffer_widget, "button_press_changed"):
+            buffer_widget.button_press_changed.connect(lambda pressed: self.set_widget_press(buffer_id, buffer_widget, pressed))
+        elif hasattr(buffer_widget, "is_button_press"):
+            self.poll_press_widgets[buffer_id] = buffer_widget
+
+    def remove_buffer(self, buffer_id):
+        ''' Remove buffer from registry, return buffer or None.
+
+        Views of buffer are not removed, they are removed by remove_view when destroyed.'''
+        buffer = self.buffers.pop(buffer_id, None)
+
+        if buffer is not None:
+            self.remove_url_index(buffer.module_path, buffer.url, buffer_id)
+
+            self.pressed_widgets.discard(buffer.buffer_widget)
+            self.poll_press_widgets.pop(buffer_id, None)
+
+        return buffer
+
+    def get_buffer(self, buffer_id):
+        return self.buffers.get(buffer_id)
+
+    def update_buffer_url(self, buffer, old_url, new_url):
+        ''' Move url index entry of BUFFER when app change buffer.url, such as browser navigate to new page.'''
+        buffer_id = buffer.buffer_id
+
+        # Ignore signal of buffer that registry has removed.
+        if self.buffers.get(buffer_id) is not buffer:
+            return
+
+        self.remove_url_index(buffer.module_path, old_url, buffer_id)
+        self.add_url_index(buffer.module_path, new_url, buffer_id)
+
+    def add_url_index(self, module_path, url, buffer_id):
+        self.url_index.setdefault((module_path, url), {})[buffer_id] = None
+
+    def remove_url_index(self, module_path, url, buffer_id):
+        # NOTE: several buffers can open same url, only remove BUFFER_ID, other buffers keep their entry.
+        url_key = (module_path, url)
+        buffer_ids = self.url_index.get(url_key)
+        if buffer_ids is not None:
+            buffer_ids.pop(buffer_id, None)
+            if len(buffer_ids) == 0:
+                self.url_index.pop(url_key)
+
+    def get_buffer_by_url(self, module_path, url):
+        ''' Return buffer that match MODULE_PATH and URL, or None, buffer that indexed first win when several buffers match.'''
+        for buffer_id in self.url_index.get((module_path, url), {}):
+            return self.buffers.get(buffer_id)
+        return None
+
+    def add_view(self, key, view):
+        self.views[key] = view
+        self.buffer_views.setdefault(view.buffer_id, {})[key] = view
+
+    def remove_view(self, key):
+        ''' Remove view from registry, return view or None.'''
+        view = self.views.pop(key, None)
+
+        if view is not None:
+            views = self.buffer_views.get(view.buffer_id)
+            if views is not None:
+                views.pop(key, None)
+                if len(views) == 0 and view.buffer_id not in self.buffers:
+                    self.buffer_views.pop(view.buffer_id)
+
+        return view
+
+    def get_buffer_views(self, buffer_id):
+        ''' Return view list of buffer.'''
+        return list(self.buffer_views.get(buffer_id, {}).values())
+
+    def get_buffer_view_keys(self, buffer_id):
+        return list(self.buffer_views.get(buffer_id, {}))
+
+    def get_view_buffer_ids(self):
+        ''' Return ids of buffers that have views.'''
+        return [buffer_id for (buffer_id, views) in self.buffer_views.items() if len(views) > 0]
+
+    def set_widget_press(self, buffer_id, buffer_widget, pressed):
+        # Ignore signal of widget that buffer has removed.
+        if self.buffers.get(buffer_id) is None or self.buffers[buffer_id].buffer_widget is not buffer_widget:
+            return
+
+        if pressed:
+            self.pressed_widgets.add(buffer_widget)
+        else:
+            self.pressed_widgets.discard(buffer_widget)
+
+    def has_pressed_widget(self):
+        if len(self.pressed_widgets) > 0:
+            return True
+
+        for buffer_widget in self.poll_press_widgets.values():
+            if buffer_widget.is_button_press:
+                return True
+
+        return False
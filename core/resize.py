@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from PyQt6.QtCore import QTimer
+from collections import deque
+import time
+
+class ResizeScheduler(object):
+    '''
+    Debounce buffer relayout when user drag Emacs window divider.
+
+    Request that doesn't change size of buffer is ignored, first size change of buffer relayout immediately.
+    Size changes that arrive within `delay' seconds after last size change are treated as drag:
+    views show cheap scaled transform of current rendering, real relayout happen after geometry stable `delay' seconds.
+
+    Must call in Qt main thread.
+    '''
+
+    def __init__(self, get_buffer_views, delay=0.15, on_relayout=None, history_size=100):
+        self.get_buffer_views = get_buffer_views
+        self.delay = delay
+        self.on_relayout = on_relayout
+
+        # Buffer id -> (buffer, width, height, size), width and height is None for fit_to_view buffer.
+        self.pending = {}
+        # Buffer id -> time of last size change.
+        self.last_request_time = {}
+        # Buffer id -> size of last relayout.
+        self.applied_sizes = {}
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        # Metrics.
+        self.relayout_count = 0
+        self.skipped_relayout_count = 0
+        self.drag_start_time = None
+        self.drag_frame_count = 0
+        self.drag_fps = deque(maxlen=history_size)
+
+    def request(self, buffer, width=None, height=None, views=None):
+        ''' Request relayout BUFFER to WIDTH x HEIGHT, fit_to_view buffer pass None and its alive VIEWS.'''
+        now = time.time()
+        buffer_id = buffer.buffer_id
+        size = self.get_size(buffer, width, height, views)
+
+        # Emacs call update_views when switch buffer or focus change, geometry is same.
+        if buffer_id in self.pending:
+            if self.pending[buffer_id][3] == size:
+                return
+        elif self.applied_sizes.get(buffer_id) == size:
+            return
+
+        last_time = self.last_request_time.get(buffer_id)
+        self.last_request_time[buffer_id] = now
+
+        if self.delay <= 0 or (buffer_id not in self.pending and (last_time is None or now - last_time > self.delay)):
+            self.apply(buffer, width, height, size)
+            return
+
+        # Drag: keep current rendering, scale it to new views.
+        if buffer_id in self.pending:
+            self.skipped_relayout_count += 1
+        self.pending[buffer_id] = (buffer, width, height, size)
+
+        for view in self.get_buffer_views(buffer_id):
+            view.set_drag_render(True)
+
+        if self.drag_start_time is None:
+            self.drag_start_time = now
+            self.drag_frame_count = 0
+        self.drag_frame_count += 1
+
+        # Restart timer, relayout after geometry stable.
+        self.timer.start(int(self.delay * 1000))
+
+    def get_size(self, buffer, width, height, views):
+        # Size of fit_to_view buffer is sizes of its views.
+        if width is None or height is None:
+            if views is None:
+                views = self.get_buffer_views(buffer.buffer_id)
+            return tuple(sorted((view.width, view.height) for view in views))
+        return (width, height)
+
+    def apply(self, buffer, width, height, size):
+        self.applied_sizes[buffer.buffer_id] = size
+
+        if width is not None and height is not None:
+            buffer.buffer_widget.resize(width, height)
+
+            # Send resize signal to buffer.
+            buffer.resize_view()
+
+        for view in self.get_buffer_views(buffer.buffer_id):
+            view.set_drag_render(False)
+
+        if self.on_relayout is not None:
+            self.on_relayout(buffer)
+
+        self.relayout_count += 1
+
+    def flush(self):
+        ''' Relayout all pending buffers, called when geometry stable.'''
+        pending = self.pending
+        self.pending = {}
+
+        for (buffer, width, height, size) in pending.values():
+            self.apply(buffer, width, height, size)
+
+        if self.drag_start_time is not None:
+            duration = time.time() - self.drag_start_time - self.delay
+            if duration > 0:
+                self.drag_fps.append(self.drag_frame_count / duration)
+            self.drag_start_time = None
+
+    def is_pending(self, buffer_id):
+        return buffer_id in self.pending
+
+    def remove_buffer(self, buffer_id):
+        self.pending.pop(buffer_id, None)
+        self.last_request_time.pop(buffer_id, None)
+        self.applied_sizes.pop(buffer_id, None)
+
+    def get_stats(self):
+        ''' Return relayout count, skipped relayout count, drag count, fps of last drag and average fps of drags.
+
+        Frame is geometry update that presented with scaled rendering during drag.'''
+        drag_fps = list(self.drag_fps)
+        return [self.relayout_count,
+                self.skipped_relayout_count,
+                len(drag_fps),
+                round(drag_fps[-1], 1) if len(drag_fps) > 0 else 0,
+                round(sum(drag_fps) / len(drag_fps), 1) if len(drag_fps) > 0 else 0]
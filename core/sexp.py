@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Fast s-expression codec for EPC hot path.
+#
+# dumps and loads produce same result as sexpdata for shapes that EAF send and receive:
+# strings, ints, floats, bools, None, symbols, quoted values and lists.
+# Other objects and syntax fallback to sexpdata.
+
+from functools import lru_cache
+from sexpdata import Symbol, Quoted
+import re
+import sexpdata
+
+# Same escapes as String and Symbol of sexpdata.
+STRING_QUOTE_TABLE = str.maketrans({"\\": "\\\\", '"': '\\"', "\b": "\\b", "\f": "\\f", "\n": "\\n", "\r": "\\r", "\t": "\\t"})
+SYMBOL_QUOTE_TABLE = str.maketrans({char: "\\" + char for char in "\\'`\"()[] ,?;#"})
+
+def symbol_name(symbol):
+    # Symbol is subclass of str in new sexpdata, old sexpdata store name in value().
+    return symbol.value() if hasattr(symbol, "value") else str(symbol)
+
+def quoted_value(quoted):
+    # Quoted is namedtuple in new sexpdata, old sexpdata store value in value().
+    return quoted.value() if hasattr(quoted, "value") else quoted.x
+
+def dump_string(string):
+    return '"' + string.translate(STRING_QUOTE_TABLE) + '"'
+
+@lru_cache(maxsize=1024)
+def dump_symbol(name):
+    return name.translate(SYMBOL_QUOTE_TABLE)
+
+def dumps(obj, **kwargs):
+    ''' Same as sexpdata.dumps.'''
+    if len(kwargs) > 0:
+        return sexpdata.dumps(obj, **kwargs)
+
+    obj_type = type(obj)
+
+    # NOTE: check Symbol before str, Symbol is subclass of str in new sexpdata.
+    if obj_type is Symbol:
+        return dump_symbol(symbol_name(obj))
+    elif obj_type is str:
+        return dump_string(obj)
+    elif obj is True:
+        return "t"
+    elif obj is False or obj is None:
+        return "()"
+    elif obj_type is int or obj_type is float:
+        return str(obj)
+    elif obj_type is list:
+        return "(" + " ".join(map(dumps, obj)) + ")"
+    elif obj_type is Quoted:
+        return "'" + dumps(quoted_value(obj))
+    else:
+        return sexpdata.dumps(obj)
+
+@lru_cache(maxsize=256)
+def call_prefix(method_name):
+    return "(" + dump_symbol(method_name)
+
+def dumps_call(method_name, args):
+    ''' Same as sexpdata.dumps([Symbol(method_name)] + list(map(handle_arg_types, args))),
+    string argument start with "'" is symbol, other arguments are quoted.'''
+    parts = [call_prefix(method_name)]
+
+    for arg in args:
+        if type(arg) is str and arg.startswith("'"):
+            parts.append(" '" + dump_symbol(arg[1:]))
+        else:
+            parts.append(" '" + dumps(arg))
+
+    parts.append(")")
+
+    return "".join(parts)
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))', re.DOTALL)
+STRING_ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+ATOM_SPECIAL_CHARS = set("'`[]?#;,\\")
+STRING_UNESCAPE_DICT = {'"': '"', "\\": "\\", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class FallbackError(Exception):
+    pass
+
+def unescape_string(string):
+    if "\\" not in string:
+        return string
+
+    def unescape(match):
+        char = match.group(1)
+        if char not in STRING_UNESCAPE_DICT:
+            # Other escape sequence, let sexpdata handle it.
+            raise FallbackError()
+        return STRING_UNESCAPE_DICT[char]
+
+    return STRING_ESCAPE_PATTERN.sub(unescape, string)
+
+def parse_atom(token):
+    if ATOM_SPECIAL_CHARS.intersection(token) or token == ".":
+        raise FallbackError()
+
+    if token == "nil":
+        return []
+    elif token == "t":
+        return True
+
+    try:
+        return int(token)
+    except ValueError:
+        try:
+            return float(token)
+        except ValueError:
+            return Symbol(token)
+
+def fast_loads(string):
+    stack = [[]]
+    pos = 0
+    length = len(string)
+
+    while pos < length:
+        match = TOKEN_PATTERN.match(string, pos)
+        if match is None:
+            if string[pos:].strip() == "":
+                break
+            raise FallbackError()
+
+        pos = match.end()
+        (open_paren, close_paren, string_value, atom) = match.groups()
+
+        if open_paren is not None:
+            stack.append([])
+        elif close_paren is not None:
+            if len(stack) == 1:
+                raise FallbackError()
+            value = stack.pop()
+            stack[-1].append(value)
+        elif string_value is not None:
+            stack[-1].append(unescape_string(string_value))
+        elif atom is not None:
+            stack[-1].append(parse_atom(atom))
+
+    if len(stack) != 1 or len(stack[0]) != 1:
+        raise FallbackError()
+
+    return stack[0][0]
+
+def loads(string, **kwargs):
+    ''' Same as sexpdata.loads.'''
+    if len(kwargs) > 0:
+        return sexpdata.loads(string, **kwargs)
+
+    try:
+        return fast_loads(string)
+    except FallbackError:
+        return sexpdata.loads(string)
+
+def install_epc_codec():
+    ''' Use fast codec in python-epc message handler.'''
+    try:
+        import epc.handler
+
+        if hasattr(epc.handler, "loads"):
+            epc.handler.loads = loads
+        if hasattr(epc.handler, "dumps"):
+            epc.handler.dumps = dumps
+    except ImportError:
+        pass
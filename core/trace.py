@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+import itertools
+import json
+import os
+import threading
+import time
+
+# Stages of key-send pipeline, in order:
+#
+# emacs:  `eaf-send-key' in Emacs -> EPC request received by Python.
+# queue:  EPC thread -> PostGui dispatch on Qt main thread.
+# build:  Buffer.send_key lookup key and build QKeyEvent.
+# post:   QApplication.postEvent to key event widgets.
+# total:  EPC request received -> key event posted.
+KEY_TRACE_STAGES = ["emacs", "queue", "build", "post", "total"]
+
+class KeyTracer(object):
+    '''
+    Opt-in latency tracer for key-send pipeline.
+
+    Every traced key get a sequence id when EPC request received,
+    the id follow key event to Qt main thread, each stage record its duration with the id.
+
+    When tracer is disabled, callers only pay for one attribute check of `enabled'.
+    '''
+
+    def __init__(self, capacity=10000):
+        self.enabled = False
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.sequence = itertools.count(1)
+
+        # seq -> [name, key, receive time, last stage time]
+        self.pending_dict = {}
+        # Sequence id that dispatching on Qt main thread.
+        self.current_seq = None
+
+        self.trace_events = deque(maxlen=capacity)
+        self.stage_durations = {stage: deque(maxlen=capacity) for stage in KEY_TRACE_STAGES}
+
+    def enable(self):
+        self.clear()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self.lock:
+            self.pending_dict.clear()
+            self.trace_events.clear()
+            for durations in self.stage_durations.values():
+                durations.clear()
+        self.current_seq = None
+
+    def record(self, seq, name, key, stage, start_time, end_time):
+        with self.lock:
+            self.stage_durations[stage].append(end_time - start_time)
+            self.trace_events.append((seq, name, key, stage, start_time, end_time, threading.get_ident()))
+
+    def begin(self, name, key, emacs_time=None):
+        ''' Start trace when EPC request received, return sequence id.'''
+        now = time.time()
+        seq = next(self.sequence)
+
+        with self.lock:
+            self.pending_dict[seq] = [name, key, now, now]
+
+        if emacs_time is not None:
+            self.record(seq, name, key, "emacs", emacs_time, now)
+
+        return seq
+
+    def dispatch(self, seq):
+        ''' Key request arrive at Qt main thread.'''
+        with self.lock:
+            pending = self.pending_dict.get(seq)
+
+        if pending is not None:
+            now = time.time()
+            self.record(seq, pending[0], pending[1], "queue", pending[3], now)
+            pending[3] = now
+            self.current_seq = seq
+
+    def mark(self, stage):
+        ''' Finish stage of current dispatching key.'''
+        seq = self.current_seq
+        pending = self.pending_dict.get(seq)
+
+        if pending is not None:
+            now = time.time()
+            self.record(seq, pending[0], pending[1], stage, pending[3], now)
+            pending[3] = now
+
+    def finish(self, seq):
+        with self.lock:
+            pending = self.pending_dict.pop(seq, None)
+
+        if pending is not None:
+            self.record(seq, pending[0], pending[1], "total", pending[2], pending[3])
+
+        self.current_seq = None
+
+    def get_stats(self):
+        ''' Return list of (stage, count, p50 ms, p99 ms, max ms).'''
+        stats = []
+
+        with self.lock:
+            stage_durations = {stage: sorted(durations) for (stage, durations) in self.stage_durations.items()}
+
+        for stage in KEY_TRACE_STAGES:
+            durations = stage_durations[stage]
+            if len(durations) > 0:
+                stats.append([stage, len(durations),
+                              round(percentile(durations, 50) * 1000, 3),
+                              round(percentile(durations, 99) * 1000, 3),
+                              round(durations[-1] * 1000, 3)])
+            else:
+                stats.append([stage, 0, 0, 0, 0])
+
+        return stats
+
+    def dump_chrome_trace(self, path):
+        ''' Dump trace events as Chrome trace-event JSON, open it with chrome://tracing or Perfetto.'''
+        with self.lock:
+            trace_events = list(self.trace_events)
+
+        pid = os.getpid()
+        events = []
+        for (seq, name, key, stage, start_time, end_time, tid) in trace_events:
+            events.append({
+                "name": stage,
+                "cat": name,
+                "ph": "X",
+                "ts": int(start_time * 1000000),
+                "dur": int((end_time - start_time) * 1000000),
+                "pid": pid,
+                "tid": tid,
+                "args": {"seq": seq, "key": key}
+            })
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+        return path
+
+def percentile(sorted_values, percent):
+    index = min(len(sorted_values) - 1, int(round(percent / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+key_tracer = KeyTracer()
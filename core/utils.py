@@ -19,18 +19,26 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from core.cache import EmacsFuncCache
+from core.dispatcher import main_thread_dispatcher, PRIORITY_NORMAL
+from core.sexp import dumps_call
 import sexpdata
 import os
 
-class PostGui(QObject):
+class PostGui(object):
+    '''
+    Run decorated function on Qt main thread.
 
-    through_thread = pyqtSignal(object, object)
+    PRIORITY is one of priority classes in core.dispatcher,
+    COALESCE is None, COALESCE_LATEST or COALESCE_ACCUMULATE,
+    COALESCE_KEY is a function that return coalesce key from call arguments, all calls share one key if it's None.
+    '''
 
-    def __init__(self, inclass=True):
-        super(PostGui, self).__init__()
-        self.through_thread.connect(self.on_signal_received)
+    def __init__(self, inclass=True, priority=PRIORITY_NORMAL, coalesce=None, coalesce_key=None):
         self.inclass = inclass
+        self.priority = priority
+        self.coalesce = coalesce
+        self.coalesce_key = coalesce_key
 
     def __call__(self, func):
         self._func = func
@@ -43,7 +51,12 @@ class PostGui(QObject):
         return obj_call
 
     def emit_signal(self, args, kwargs):
-        self.through_thread.emit(args, kwargs)
+        key = None
+        if self.coalesce is not None:
+            key = (id(self), self.coalesce_key(args) if self.coalesce_key is not None else None)
+
+        main_thread_dispatcher.post(self.on_signal_received, args, kwargs, self._func.__qualname__,
+                                    self.priority, self.coalesce, key)
 
     def on_signal_received(self, args, kwargs):
         try:
@@ -89,6 +102,14 @@ def is_port_in_use(port):
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         return s.connect_ex(('localhost', port)) == 0
 
+def get_process_rss(pid):
+    ''' Get resident memory (bytes) of process, return 0 if process not exists or /proc not available.'''
+    try:
+        with open("/proc/{}/statm".format(pid), "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
 def string_to_base64(text):
     import base64
     return str(base64.b64encode(str(text).encode("utf-8")), "utf-8")
@@ -105,57 +126,33 @@ def get_local_ip():
         print("Network is unreachable")
         sys.exit()
 
-def popen_and_call(popen_args, on_exit):
+def popen_and_call(popen_args, on_exit, buffer_id=None):
     """
     Runs the given args in a subprocess.Popen, and then calls the function
     on_exit when the subprocess completes.
     on_exit is a callable object, and popen_args is a list/tuple of args that
     would give to subprocess.Popen.
-    """
-    def run_in_thread(on_exit, popen_args):
-        import subprocess
 
-        try:
-            proc = subprocess.Popen(popen_args,
-                                    stdin=subprocess.PIPE,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.STDOUT)
-            proc.wait()
-        except OSError:
-            import traceback
-            traceback.print_exc()
-        on_exit()
-        return
-    import threading
+    Subprocess is managed by job manager, on_exit is called in Qt main thread.
+    """
+    from core.jobs import job_manager
 
-    thread = threading.Thread(target=run_in_thread, args=(on_exit, popen_args))
-    thread.start()
-    # returns immediately after the thread starts
-    return thread
+    return job_manager.submit(os.path.basename(popen_args[0]), popen_args, buffer_id=buffer_id,
+                              on_exit=lambda job: on_exit())
 
-def call_and_check_code(popen_args, on_exit):
+def call_and_check_code(popen_args, on_exit, buffer_id=None):
     """
     Runs the given args in a subprocess.Popen, and then calls the function
     on_exit when the subprocess completes.
     on_exit is a callable object, and popen_args is a list/tuple of args that
     would give to subprocess.Popen.
-    """
-    def run_in_thread(on_exit, popen_args):
-        import subprocess
-
-        retcode = subprocess.call(popen_args,
-                                  stdin=subprocess.PIPE,
-                                  stdout=subprocess.PIPE,
-                                  stderr=subprocess.STDOUT)
-        on_exit(retcode)
-        return
 
-    import threading
+    Subprocess is managed by job manager, on_exit is called with return code in Qt main thread.
+    """
+    from core.jobs import job_manager
 
-    thread = threading.Thread(target=run_in_thread, args=(on_exit, popen_args))
-    thread.start()
-    # returns immediately after the thread starts
-    return thread
+    return job_manager.submit(os.path.basename(popen_args[0]), popen_args, buffer_id=buffer_id,
+                              on_exit=lambda job: on_exit(job.returncode))
 
 def get_clipboard_text():
     ''' Get text from system clipboard.'''
@@ -225,15 +222,59 @@ def abstract(f):
 
 epc_client = None
 
-def init_epc_client(emacs_server_port):
+def parse_epc_address(address_string):
+    ''' Return TCP port number, or unix domain socket path if ADDRESS_STRING is not number.'''
+    return int(address_string) if address_string.isdigit() else address_string
+
+def connect_epc_address(address):
+    ''' Return socket that connect to ADDRESS, ADDRESS is TCP port of localhost or unix domain socket path.'''
+    import socket
+
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+    else:
+        sock = socket.create_connection(("localhost", address))
+        # Send small EPC message immediately, don't wait Nagle's algorithm.
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    return sock
+
+def build_epc_server(unix_socket_path=None):
+    ''' Build EPC server, listen UNIX_SOCKET_PATH if it's not None, otherwise listen random TCP port of localhost.'''
+    from epc.server import ThreadingEPCServer
+
+    if unix_socket_path is None:
+        server = ThreadingEPCServer(('localhost', 0), log_traceback=True)
+    else:
+        import socket
+
+        class UnixThreadingEPCServer(ThreadingEPCServer):
+            address_family = socket.AF_UNIX
+
+        # Remove socket file that left by crashed process.
+        if os.path.exists(unix_socket_path):
+            os.remove(unix_socket_path)
+
+        server = UnixThreadingEPCServer(unix_socket_path, log_traceback=True)
+
+    server.allow_reuse_address = True
+
+    return server
+
+def init_epc_client(emacs_server_address):
     from epc.client import EPCClient
+    from core.sexp import install_epc_codec
 
     global epc_client
 
+    # Encode and decode EPC messages with fast codec.
+    install_epc_codec()
+
     if epc_client is None:
         try:
-            epc_client = EPCClient(("localhost", emacs_server_port), log_traceback=True)
-        except ConnectionRefusedError:
+            epc_client = EPCClient(connect_epc_address(emacs_server_address), log_traceback=True)
+        except (ConnectionRefusedError, FileNotFoundError):
             import traceback
             traceback.print_exc()
 
@@ -251,6 +292,17 @@ def handle_arg_types(arg):
     return sexpdata.Quoted(arg)
 
 def hyprland_window_move(x, y, winId):
+    from core.compositor import get_compositor_client
+
+    # Talk to Hyprland socket directly, window position is answered from cached window table.
+    client = get_compositor_client()
+    if client is not None:
+        try:
+            client.move_window(f"eaf.py-{winId}", x, y)
+            return
+        except (OSError, ValueError, KeyError):
+            pass
+
     import subprocess
     import json
 
@@ -273,8 +325,8 @@ def hyprland_window_move(x, y, winId):
 def eval_in_emacs(method_name, args):
     global epc_client
 
-    args = [sexpdata.Symbol(method_name)] + list(map(handle_arg_types, args))    # type: ignore
-    sexp = sexpdata.dumps(args)
+    # Same as sexpdata.dumps([Symbol(method_name)] + list(map(handle_arg_types, args))), but much faster.
+    sexp = dumps_call(method_name, args)
 
     epc_client.call("eval-in-emacs", [sexp])    # type: ignore
 
@@ -282,8 +334,7 @@ def eval_in_emacs(method_name, args):
 def get_emacs_func_result(method_name, args):
     global epc_client
 
-    args = [sexpdata.Symbol(method_name)] + list(map(handle_arg_types, args))    # type: ignore
-    sexp = sexpdata.dumps(args)
+    sexp = dumps_call(method_name, args)
 
     result = epc_client.call_sync("get-emacs-func-result", [sexp])    # type: ignore
     return result if result != [] else False
@@ -295,14 +346,22 @@ def get_app_dark_mode(app_dark_mode_var):
             (app_dark_mode == "follow" and \
              get_emacs_theme_mode() == "dark"))
 
+# Emacs theme (mode, foreground color, background color) is cached,
+# Emacs broadcast new theme when theme changed, so theme lookups don't need round trip.
+def get_emacs_theme():
+    return get_emacs_func_cache_result("eaf--get-theme-info", [])
+
+def set_emacs_theme(theme_mode, foreground, background):
+    emacs_func_cache.put("eaf--get-theme-info", [], [theme_mode, foreground, background])
+
 def get_emacs_theme_mode():
-    return get_emacs_func_result("eaf-get-theme-mode", [])
+    return get_emacs_theme()[0]
 
 def get_emacs_theme_background():
-    return get_emacs_func_result("eaf-get-theme-background-color", [])
+    return get_emacs_theme()[2]
 
 def get_emacs_theme_foreground():
-    return get_emacs_func_result("eaf-get-theme-foreground-color", [])
+    return get_emacs_theme()[1]
 
 def message_to_emacs(message, prefix=True, logging=True):
     eval_in_emacs('eaf--show-message', [message, prefix, logging])
@@ -374,17 +433,21 @@ def to_camel_case(string):
     components = string.split('_')
     return components[0] + ''.join(x.title() for x in components[1:])
 
-emacs_func_cache_dict = {}
+# Results of these functions change with selected frame, Emacs invalidate them when frame is created, deleted or moved,
+# short TTL make sure they're refreshed when frame change display without notify.
+# Theme is pushed by Emacs when theme or frame color changed, short TTL catch color changes that Emacs don't notify.
+# Other functions are cached until they're invalidated, use set_policy to set TTL.
+emacs_func_cache = EmacsFuncCache(get_emacs_func_result,
+                                  policies={
+                                      "eaf-emacs-not-use-reparent-technology": 5,
+                                      "eaf-emacs-running-in-wayland-native": 5,
+                                      "eaf--get-theme-info": 5
+                                  })
 
 def get_emacs_func_cache_result(func_name, func_args):
-    global emacs_func_cache_dict
-
-    if func_name in emacs_func_cache_dict:
-        return emacs_func_cache_dict[func_name]
-    else:
-        result = get_emacs_func_result(func_name, func_args)
-        emacs_func_cache_dict[func_name] = result
+    return emacs_func_cache.get(func_name, func_args)
 
-        return result
+def invalidate_emacs_func_cache(func_name=None, func_args=None):
+    emacs_func_cache.invalidate(func_name, func_args)
 
 current_desktop = os.getenv("XDG_CURRENT_DESKTOP")
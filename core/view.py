@@ -20,11 +20,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from PyQt6.QtCore import Qt, QEvent, QPoint
-from PyQt6.QtGui import QPainter, QWindow, QBrush
+from PyQt6.QtGui import QPainter, QWindow, QBrush, QTransform
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QGraphicsView, QFrame
 from core.utils import eval_in_emacs, focus_emacs_buffer, get_emacs_func_cache_result, get_emacs_var, hyprland_window_move, current_desktop
 import platform
 
+VIEW_RENDER_HINTS = [QPainter.RenderHint.Antialiasing, QPainter.RenderHint.SmoothPixmapTransform, QPainter.RenderHint.TextAntialiasing]
+
 class View(QWidget):
 
     def __init__(self, buffer, view_info):
@@ -49,6 +51,7 @@ class View(QWidget):
 
         # Init attributes.
         self.last_event_type = None
+        self.is_direct_embedding = False
         self.view_info = view_info
         (self.buffer_id, self.emacs_xid, self.x, self.y, self.width, self.height) = view_info.split(":")
         self.x: int = int(self.x)
@@ -65,7 +68,7 @@ class View(QWidget):
         # Remove border from QGraphicsView.
         self.graphics_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.graphics_view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.graphics_view.setRenderHints(QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform | QPainter.RenderHint.TextAntialiasing)
+        self.set_render_hints(True)
         self.graphics_view.setFrameStyle(QFrame.Shape.NoFrame)
 
         # Fill background color.
@@ -92,6 +95,65 @@ class View(QWidget):
                 self.graphics_view.fitInView(self.graphics_view.scene().sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
                 QWidget.resizeEvent(self, event)
 
+    def set_render_hints(self, on):
+        for hint in VIEW_RENDER_HINTS:
+            self.graphics_view.setRenderHint(hint, on)
+
+    def set_drag_render(self, dragging):
+        ''' Use cheap rendering when user drag window divider, restore when geometry stable.'''
+        if self.is_direct_embedding:
+            return
+
+        if dragging:
+            self.set_render_hints(False)
+
+            # Scale current rendering of buffer to view size, fit_to_view buffer scale by resizeEvent.
+            if not self.buffer.fit_to_view:
+                widget_size = self.buffer.buffer_widget.size()
+                if widget_size.width() > 0 and widget_size.height() > 0:
+                    self.graphics_view.setTransform(QTransform.fromScale(self.width / widget_size.width(),
+                                                                         self.height / widget_size.height()))
+        else:
+            if not self.buffer.fit_to_view:
+                self.graphics_view.resetTransform()
+
+            self.set_render_hints(True)
+
+    def embed_direct(self):
+        ''' Embed buffer widget in view directly, skip QGraphicsScene compositing.'''
+        if self.is_direct_embedding:
+            return
+
+        widget = self.buffer.buffer_widget
+
+        # Take widget out of scene.
+        proxy = widget.graphicsProxyWidget()
+        if proxy is not None:
+            proxy.setWidget(None)
+            self.buffer.removeItem(proxy)
+            proxy.deleteLater()
+        widget.setAttribute(Qt.WidgetAttribute.WA_DontShowOnScreen, False)
+
+        self.graphics_view.hide()
+        self.layout.addWidget(widget)
+        widget.show()
+
+        self.is_direct_embedding = True
+
+    def embed_scene(self):
+        ''' Move buffer widget back to QGraphicsScene.'''
+        if not self.is_direct_embedding:
+            return
+
+        widget = self.buffer.buffer_widget
+
+        self.layout.removeWidget(widget)
+        widget.setParent(None)
+        self.buffer.addWidget(widget)
+        self.graphics_view.show()
+
+        self.is_direct_embedding = False
+
     def adjust_aspect_ratio(self):
         widget_width = self.width
         widget_height = self.height
@@ -187,6 +249,8 @@ class View(QWidget):
 
     def destroy_view(self):
         # print("Destroy: ", self.buffer.url)
+        # Give buffer widget back to scene, otherwise it's destroyed with view.
+        self.embed_scene()
         self.destroy()
 
     def screen_shot(self):
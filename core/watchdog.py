@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import Counter
+from core.log import log_pipeline
+import sys
+import threading
+import time
+import traceback
+
+def format_stack(stack):
+    return "\n".join("{}:{} {}".format(filename, lineno, name) for (filename, lineno, name) in stack)
+
+def is_dispatcher_frame(filename, name):
+    ''' Dispatcher frames run every PostGui handler, they never tell what stalled.'''
+    filename = filename.replace("\\", "/")
+    return filename.endswith("core/dispatcher.py") or (filename.endswith("core/utils.py") and name == "on_signal_received")
+
+def extract_stack(frame):
+    ''' Return stack of FRAME as tuple of (file name, line number, function name), outermost first.'''
+    return tuple((summary.filename, summary.lineno, summary.name) for summary in traceback.extract_stack(frame))
+
+class StallWatchdog(threading.Thread):
+    '''
+    Detect stalls of Qt main thread.
+
+    Heartbeat timer run in Qt main thread every INTERVAL seconds.
+    When heartbeat is late more than THRESHOLD seconds, watchdog thread sample main thread stack with sys._current_frames,
+    stall is recorded with duration and its most sampled stack when heartbeat come back.
+
+    Nested event loop (such as QEventLoop in BrowserPage.execute_javascript) don't stop heartbeat,
+    heartbeat find it by Python frames under itself, nested loop run longer than THRESHOLD is recorded as stall too.
+    '''
+
+    def __init__(self, threshold=0.5, interval=0.1, history_size=100):
+        threading.Thread.__init__(self, daemon=True)
+
+        self.threshold = threshold
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.timer = None
+
+        # Stack depth of heartbeat when it's called from main event loop.
+        self.base_depth = None
+        # Start time and stack of nested event loop.
+        self.nested_start = None
+        self.nested_stack = None
+
+        # Samples of current stall.
+        self.stall_start = None
+        self.stall_samples = Counter()
+
+        # Key is stack, value is [count, total seconds, max seconds, kind].
+        self.stall_sites = {}
+        self.stall_history = []
+        self.history_size = history_size
+
+    def start_heartbeat(self):
+        ''' Start heartbeat timer, must call in Qt main thread.'''
+        from PyQt6.QtCore import QTimer
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.heartbeat)
+        self.timer.start(int(self.interval * 1000))
+
+        self.start()
+
+    def heartbeat(self):
+        now = time.monotonic()
+        self.last_beat = now
+
+        frame = sys._getframe(1)
+        depth = 0
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+
+        if self.base_depth is None or depth < self.base_depth:
+            self.base_depth = depth
+
+        if depth > self.base_depth:
+            if self.nested_start is None:
+                self.nested_start = now
+                # Skip heartbeat frame, its caller is nested event loop.
+                self.nested_stack = extract_stack(sys._getframe(1))
+        elif self.nested_start is not None:
+            duration = now - self.nested_start
+            if duration > self.threshold:
+                self.record_stall(self.nested_stack, duration, "nested-loop")
+            self.nested_start = None
+            self.nested_stack = None
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            late = time.monotonic() - self.last_beat
+
+            if late > self.threshold:
+                if self.stall_start is None:
+                    self.stall_start = self.last_beat
+
+                frame = sys._current_frames().get(self.main_thread_id)
+                if frame is not None:
+                    self.stall_samples[extract_stack(frame)] += 1
+            elif self.stall_start is not None:
+                duration = self.last_beat - self.stall_start
+                if len(self.stall_samples) > 0:
+                    self.record_stall(self.stall_samples.most_common(1)[0][0], duration, "blocked")
+
+                self.stall_start = None
+                self.stall_samples = Counter()
+
+    def stop(self):
+        # NOTE: don't stop heartbeat timer here, stop is called from EPC thread.
+        self.stop_event.set()
+
+    def get_slot(self, stack):
+        # Outermost frame is main function that call app.exec, next frame is slot that Qt call.
+        # Slot is MainThreadDispatcher.drain for PostGui handlers, walk past dispatcher frames to first application frame.
+        for frame in stack[1:]:
+            if not is_dispatcher_frame(frame[0], frame[2]):
+                return frame
+        return stack[-1]
+
+    def record_stall(self, stack, duration, kind):
+        if len(stack) == 0:
+            return
+
+        slot = self.get_slot(stack)
+
+        with self.lock:
+            site = self.stall_sites.setdefault(stack, [0, 0.0, 0.0, kind])
+            site[0] += 1
+            site[1] += duration
+            site[2] = max(site[2], duration)
+
+            self.stall_history.append([time.time(), kind, round(duration * 1000), "{}:{} {}".format(*slot)])
+            if len(self.stall_history) > self.history_size:
+                self.stall_history.pop(0)
+
+        log_pipeline.warning("watchdog", "Qt main thread {} {:.0f}ms in {}:{} {}".format(
+            "stalled" if kind == "blocked" else "ran nested event loop", duration * 1000, *slot))
+
+    def get_stall_sites(self, count=20):
+        '''
+        Return top COUNT stall sites sorted by total stall time,
+        each site is list: kind, slot, count, total milliseconds, max milliseconds, stack text.
+        '''
+        with self.lock:
+            sites = sorted(self.stall_sites.items(), key=lambda item: item[1][1], reverse=True)[:count]
+
+        return [[kind, "{}:{} {}".format(*self.get_slot(stack)), stall_count, round(total * 1000), round(max_duration * 1000), format_stack(stack)]
+                for (stack, (stall_count, total, max_duration, kind)) in sites]
+
+    def get_stall_history(self):
+        ''' Return recent stalls, each stall is list: time, kind, milliseconds, slot.'''
+        with self.lock:
+            return list(self.stall_history)
+
+    def reset(self):
+        with self.lock:
+            self.stall_sites = {}
+            self.stall_history = []
@@ -26,7 +26,7 @@ from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineScript, QWebEngineProfile, QWebEngineSettings
 from PyQt6.QtWidgets import QApplication, QWidget
 from core.buffer import Buffer
-from core.utils import (touch, string_to_base64, popen_and_call,
+from core.utils import (touch, string_to_base64,
                         call_and_check_code, interactive, get_emacs_theme_mode,
                         get_emacs_theme_foreground, get_emacs_theme_background,
                         eval_in_emacs, message_to_emacs, clear_emacs_message,
@@ -34,6 +34,9 @@ from core.utils import (touch, string_to_base64, popen_and_call,
                         open_url_in_new_tab, open_url_in_new_tab_other_window,
                         focus_emacs_buffer, atomic_edit, get_emacs_config_dir,
                         to_camel_case, get_emacs_vars, PostGui)
+from core.worker import io_pool
+from core.jobs import job_manager
+from core.log import log_pipeline
 from urllib.parse import urlparse, parse_qs
 import base64
 import os
@@ -48,6 +51,7 @@ MOUSE_FORWARD_BUTTON = 16
 class BrowserView(QWebEngineView):
 
     translate_selected_text = QtCore.pyqtSignal(str)
+    button_press_changed = QtCore.pyqtSignal(bool)
 
     def __init__(self, buffer_id):
         super(QWebEngineView, self).__init__()
@@ -257,9 +261,13 @@ class BrowserView(QWebEngineView):
         #     print(time.time(), event.type(), self.rect())
 
         if event.type() in [QEvent.Type.MouseButtonPress]:
-            self.is_button_press = True
+            if not self.is_button_press:
+                self.is_button_press = True
+                self.button_press_changed.emit(True)
         elif event.type() in [QEvent.Type.MouseButtonRelease]:
-            self.is_button_press = False
+            if self.is_button_press:
+                self.is_button_press = False
+                self.button_press_changed.emit(False)
 
         # Focus emacs buffer when user click view.
         event_type = [QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease, QEvent.Type.MouseButtonDblClick]
@@ -322,6 +330,16 @@ class BrowserView(QWebEngineView):
 
         return super(QWebEngineView, self).eventFilter(obj, event)
 
+    def setUrl(self, url):
+        # Set stored cookies before page send first request.
+        self.cookies_manager.preload_cookie(url)
+        super(BrowserView, self).setUrl(url)
+
+    def load(self, url):
+        if isinstance(url, QUrl):
+            self.cookies_manager.preload_cookie(url)
+        super(BrowserView, self).load(url)
+
     def link_hovered(self, url):
         self.url_hovered = url
 
@@ -409,6 +427,10 @@ class BrowserView(QWebEngineView):
         '''
         return self.web_page.execute_javascript(js)
 
+    def execute_js_async(self, js, callback):
+        ''' Execute JavaScript and pass result to callback, not block Qt main thread.'''
+        self.web_page.runJavaScript(js, callback)
+
     def eval_js_function(self, *args):
         import json
 
@@ -752,6 +774,14 @@ class BrowserPage(QWebEnginePage):
     def __init__(self):
         QWebEnginePage.__init__(self)
 
+        # Buffer that own this page, console messages are logged with it.
+        self.buffer_id = None
+
+    def javaScriptConsoleMessage(self, level, message, line_number, source_id):
+        log_level = {QWebEnginePage.JavaScriptConsoleMessageLevel.InfoMessageLevel: "info",
+                     QWebEnginePage.JavaScriptConsoleMessageLevel.WarningMessageLevel: "warning"}.get(level, "error")
+        log_pipeline.log(log_level, "js", "{} ({}:{})".format(message, source_id, line_number), self.buffer_id)
+
     def execute_javascript(self, script_src):
         ''' Execute JavaScript.'''
         if hasattr(self, "loop") and self.loop.isRunning():
@@ -785,6 +815,8 @@ class BrowserBuffer(Buffer):
     close_page = QtCore.pyqtSignal(str)
     open_devtools_tab = QtCore.pyqtSignal(object)
 
+    direct_embedding = True
+
     def __init__(self, buffer_id, url, arguments, fit_to_view):
         Buffer.__init__(self, buffer_id, url, arguments, fit_to_view)
 
@@ -897,8 +929,9 @@ class BrowserBuffer(Buffer):
         # Reset with HiDPI.
         self.buffer_widget.zoom_reset()
 
+        self.buffer_widget.web_page.buffer_id = self.buffer_id
+
         # Build webchannel object.
-        QtCore.qInstallMessageHandler(self.filter_instant_message)
         self.channel = QWebChannel()
         self.channel.registerObject("pyobject", self)
         self.buffer_widget.web_page.setWebChannel(self.channel)
@@ -916,11 +949,6 @@ class BrowserBuffer(Buffer):
         except Exception:
             return None
 
-    def filter_instant_message(self, *args):
-        # Disable QWebChannel warnings.
-        if not args[-1].endswith('value updates in HTML will be broken!'):
-            print("".join(list(map(str, args[2:]))))
-
     def permission_requested(self, frame, feature):
         self.buffer_widget.web_page.setFeaturePermission(frame, feature, QWebEnginePage.PermissionPolicy.PermissionGrantedByUser)
             
@@ -980,12 +1008,11 @@ class BrowserBuffer(Buffer):
 
         if download_data.startswith("data:image/"):
             image_path = os.path.join(os.path.expanduser(self.download_path), "image.png")
-            touch(image_path)
-            with open(image_path, "wb") as f:
-                b64bytes = download_data.split(",")[1].encode("utf-8")
-                f.write(base64.b64decode(b64bytes))
 
-            message_to_emacs("Save image: " + image_path)
+            # Decode image in worker pool, big data url will block Qt main thread.
+            io_pool.submit(self.save_data_url_image, (download_data, image_path),
+                           callback=lambda path: message_to_emacs("Save image: " + path),
+                           owner=self.buffer_id)
         else:
             if hasattr(self, "try_start_aria2_daemon"):
                 self.try_start_aria2_daemon()
@@ -998,6 +1025,14 @@ class BrowserBuffer(Buffer):
 
                 message_to_emacs("Downloading: " + download_url)
 
+    def save_data_url_image(self, download_data, image_path):
+        touch(image_path)
+        with open(image_path, "wb") as f:
+            b64bytes = download_data.split(",")[1].encode("utf-8")
+            f.write(base64.b64decode(b64bytes))
+
+        return image_path
+
     def _save_as_pdf(self):
         parsed = urlparse(self.url)
         pdf_path = os.path.join(os.path.expanduser(self.download_path), "{}.pdf".format(parsed.netloc))
@@ -1017,7 +1052,7 @@ class BrowserBuffer(Buffer):
         message_to_emacs("Saving as single file...")
         args = ["monolith", self.url, "-o", file_path]
         handler = partial(self.notify_monolith_message, self.download_path, file_path, self.title)
-        call_and_check_code(args, handler)
+        call_and_check_code(args, handler, buffer_id=self.buffer_id)
 
     @interactive(insert_or_do=True)
     def save_as_single_file(self):
@@ -1475,7 +1510,14 @@ class BrowserBuffer(Buffer):
                     youtube_dl_args.append("-x")
                     file_type = "audio"
 
-                popen_and_call(youtube_dl_args, lambda : message_to_emacs("Downloaded: {0}".format(url)))
+                def notify_download(job):
+                    if job.returncode == 0:
+                        message_to_emacs("Downloaded: {0}".format(url))
+                    else:
+                        message_to_emacs("Failed to download: {0}".format(url))
+
+                job_manager.submit("youtube-dl", youtube_dl_args, buffer_id=self.buffer_id,
+                                   description=url, on_exit=notify_download)
 
                 message_to_emacs("Downloading {0}: {1}".format(file_type, url))
             else:
@@ -1497,6 +1539,13 @@ class BrowserBuffer(Buffer):
         else:
             return self.buffer_widget.execute_js('''{}({})'''.format(to_camel_case(function_name), function_arguments))
 
+    def execute_js_function_async(self, function_name, function_arguments, callback):
+        ''' Execute JavaScript function and pass result to callback.'''
+        if function_arguments == "":
+            self.buffer_widget.execute_js_async('''{}()'''.format(to_camel_case(function_name)), callback)
+        else:
+            self.buffer_widget.execute_js_async('''{}({})'''.format(to_camel_case(function_name), function_arguments), callback)
+
     def eval_js_code(self, js_code):
         ''' Eval JavaScript code.'''
         self.buffer_widget.eval_js(js_code)
@@ -1505,6 +1554,10 @@ class BrowserBuffer(Buffer):
         ''' Execute JavaScript code and return result.'''
         return self.buffer_widget.execute_js(js_code)
 
+    def execute_js_code_async(self, js_code, callback):
+        ''' Execute JavaScript code and pass result to callback.'''
+        self.buffer_widget.execute_js_async(js_code, callback)
+
     def init_app(self):
         pass
 
@@ -1514,9 +1567,14 @@ class BrowserBuffer(Buffer):
         self.index_file_dir = os.path.join(os.path.dirname(app_file), index_dir)
         self.index_file = os.path.join(self.index_file_dir, "index.html")
 
-        with open(self.index_file, "r") as f:
-            html = self.convert_index_html(f.read(), self.index_file_dir, join_path)
-            self.buffer_widget.setHtml(html, QUrl("file://"))
+        # Read and convert index file in worker pool, set html in Qt main thread.
+        io_pool.submit(self.read_index_html, (self.index_file, self.index_file_dir, join_path),
+                       callback=lambda html: self.buffer_widget.setHtml(html, QUrl("file://")),
+                       owner=self.buffer_id)
+
+    def read_index_html(self, index_file, dist_dir, join_path):
+        with open(index_file, "r") as f:
+            return self.convert_index_html(f.read(), dist_dir, join_path)
 
     def convert_index_html(self, index_file_content, dist_dir, join_path):
         '''
@@ -1640,6 +1698,9 @@ class CookiesManager(object):
         self.cookie_store.cookieRemoved.connect(self.remove_cookie) # remove cookie stored on disk when captured cookieRemoved signal
         self.browser_view.loadStarted.connect(self.load_cookie)     # load disk cookie to QWebEngineView instance when page start load
 
+        # Hosts that cookies are loaded to cookie store.
+        self.loaded_hosts = set()
+
 
     def add_cookie(self, cookie):
         '''Store cookie on disk.'''
@@ -1654,26 +1715,49 @@ class CookiesManager(object):
 
     def load_cookie(self):
         ''' Load cookie file from disk.'''
-        if not os.path.exists(self.cookies_dir):
+        self.preload_cookie(self.browser_view.url())
+
+    def preload_cookie(self, url):
+        ''' Load cookies of URL host from disk to cookie store, called before page send request.
+
+        NOTE: read synchronously, first request of page must carry stored cookies, otherwise page load as logged out.
+        Cookie store keep cookies in memory, so files of each host are only read once.'''
+        host = url.host()
+        if host == "" or host in self.loaded_hosts:
             return
 
-        all_cookies_domain = os.listdir(self.cookies_dir)
+        self.loaded_hosts.add(host)
+        self.set_cookies(self.read_cookie_files(host), url)
 
-        for domain in filter(self.domain_matching, all_cookies_domain):
-            from PyQt6.QtNetwork import QNetworkCookie
+    def read_cookie_files(self, host_string):
+        ''' Return list of (domain, raw cookie data) that match HOST_STRING.'''
+        cookie_list = []
 
-            domain_dir = os.path.join(self.cookies_dir, domain)
+        if not os.path.exists(self.cookies_dir):
+            return cookie_list
 
-            for cookie_file in os.listdir(domain_dir):
-                with open(os.path.join(domain_dir, cookie_file), "rb") as f:
-                    for cookie in QNetworkCookie.parseCookies(f.read()):
-                        if not domain.startswith('.'):
-                            if self.browser_view.url().host() == domain:
-                                # restore host-only cookie
-                                cookie.setDomain('')
-                                self.cookie_store.setCookie(cookie, self.browser_view.url())
-                        else:
-                            self.cookie_store.setCookie(cookie)
+        for domain in os.listdir(self.cookies_dir):
+            if self.domain_matching(domain, host_string):
+                domain_dir = os.path.join(self.cookies_dir, domain)
+
+                for cookie_file in os.listdir(domain_dir):
+                    with open(os.path.join(domain_dir, cookie_file), "rb") as f:
+                        cookie_list.append((domain, f.read()))
+
+        return cookie_list
+
+    def set_cookies(self, cookie_list, url):
+        from PyQt6.QtNetwork import QNetworkCookie
+
+        for (domain, cookie_data) in cookie_list:
+            for cookie in QNetworkCookie.parseCookies(cookie_data):
+                if not domain.startswith('.'):
+                    if url.host() == domain:
+                        # restore host-only cookie
+                        cookie.setDomain('')
+                        self.cookie_store.setCookie(cookie, url)
+                else:
+                    self.cookie_store.setCookie(cookie)
 
     def remove_cookie(self, cookie):
         ''' Delete cookie file.'''
@@ -1686,6 +1770,7 @@ class CookiesManager(object):
     def delete_all_cookies(self):
         ''' Simply delete all cookies stored on memory and disk.'''
         self.cookie_store.deleteAllCookies()
+        self.loaded_hosts.clear()
         if os.path.exists(self.cookies_dir):
             import shutil
             shutil.rmtree(self.cookies_dir)
@@ -1706,7 +1791,7 @@ class CookiesManager(object):
                         self.cookie_store.deleteCookie(cookie)
             shutil.rmtree(domain_dir)
 
-    def domain_matching(self, cookie_domain):
+    def domain_matching(self, cookie_domain, host_string=None):
         ''' Check if a given cookie's domain is matching for host string.'''
 
         cookie_is_hostOnly = True
@@ -1715,7 +1800,8 @@ class CookiesManager(object):
             cookie_domain = cookie_domain[1:]
             cookie_is_hostOnly = False
 
-        host_string = self.browser_view.url().host()
+        if host_string is None:
+            host_string = self.browser_view.url().host()
 
         if cookie_domain == host_string:
             # The domain string and the host string are identical
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2018 Andy Stewart
+#
+# Author:     Andy Stewart <lazycat.manatee@gmail.com>
+# Maintainer: Andy Stewart <lazycat.manatee@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent.futures import ThreadPoolExecutor
+from core.dispatcher import main_thread_dispatcher
+import threading
+import time
+
+class WorkerPool(object):
+    '''
+    Shared bounded pool that run blocking work off Qt main thread.
+
+    Result is delivered to callback in Qt main thread through main thread dispatcher.
+    Tasks submitted with OWNER (such as buffer id) can be cancelled together by cancel_owner,
+    pending tasks never run, callbacks of running tasks are dropped.
+    '''
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = None
+
+        self.lock = threading.Lock()
+        self.owner_futures = {}
+
+        # Metrics.
+        self.pending_count = 0
+        self.running_count = 0
+        self.max_pending_count = 0
+        self.submitted_count = 0
+        self.completed_count = 0
+        self.failed_count = 0
+        self.cancelled_count = 0
+
+    def get_executor(self):
+        # Create executor when first task submitted, avoid start workers that never used.
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="eaf-{}".format(self.name))
+
+        return self.executor
+
+    def submit(self, func, args=(), kwargs={}, callback=None, error_callback=None, owner=None):
+        ''' Run FUNC(*ARGS, **KWARGS) in pool, call CALLBACK(result) or ERROR_CALLBACK(exception) in Qt main thread.
+
+        Return concurrent.futures.Future.'''
+        with self.lock:
+            self.submitted_count += 1
+            self.pending_count += 1
+            self.max_pending_count = max(self.max_pending_count, self.pending_count)
+
+        def run():
+            self.task_started()
+            return func(*args, **kwargs)
+
+        future = self.get_executor().submit(run)
+
+        future.eaf_owner = owner
+        future.eaf_cancelled = False
+        future.eaf_submit_time = time.time()
+
+        if owner is not None:
+            with self.lock:
+                self.owner_futures.setdefault(owner, set()).add(future)
+
+        future.add_done_callback(lambda f: self.task_done(f, callback, error_callback))
+
+        return future
+
+    def task_started(self):
+        with self.lock:
+            self.pending_count -= 1
+            self.running_count += 1
+
+    def task_done(self, future, callback, error_callback):
+        with self.lock:
+            if future.cancelled():
+                # Cancelled task never started.
+                self.pending_count -= 1
+                self.cancelled_count += 1
+            else:
+                self.running_count -= 1
+
+            if future.eaf_owner is not None and future.eaf_owner in self.owner_futures:
+                self.owner_futures[future.eaf_owner].discard(future)
+                if len(self.owner_futures[future.eaf_owner]) == 0:
+                    self.owner_futures.pop(future.eaf_owner)
+
+        if future.cancelled() or future.eaf_cancelled:
+            return
+
+        exception = future.exception()
+        with self.lock:
+            if exception is None:
+                self.completed_count += 1
+            else:
+                self.failed_count += 1
+
+        if exception is None:
+            if callback is not None:
+                self.deliver(future, callback, future.result())
+        else:
+            if error_callback is not None:
+                self.deliver(future, error_callback, exception)
+            else:
+                import traceback
+                traceback.print_exception(type(exception), exception, exception.__traceback__)
+
+    def deliver(self, future, callback, value):
+        def run(args, kwargs):
+            # Owner maybe cancelled after task finish, before callback run.
+            if not future.eaf_cancelled:
+                try:
+                    callback(value)
+                except Exception:
+                    import traceback
+                    traceback.print_exc()
+
+        main_thread_dispatcher.post(run, (), {}, "{}:{}".format(self.name, getattr(callback, "__qualname__", "callback")))
+
+    def cancel_owner(self, owner):
+        ''' Cancel all tasks of OWNER.'''
+        with self.lock:
+            futures = list(self.owner_futures.pop(owner, set()))
+
+        for future in futures:
+            future.eaf_cancelled = True
+            future.cancel()
+
+    def get_stats(self):
+        ''' Return (name, workers, pending, running, max pending, submitted, completed, failed, cancelled).'''
+        with self.lock:
+            return [self.name, self.max_workers, self.pending_count, self.running_count, self.max_pending_count,
+                    self.submitted_count, self.completed_count, self.failed_count, self.cancelled_count]
+
+    def shutdown(self, wait=False):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+io_pool = WorkerPool("io", 4)
+
+def cancel_background_tasks(owner):
+    ''' Cancel tasks of OWNER in all worker pools, such as when buffer is killed.'''
+    io_pool.cancel_owner(owner)
+
+def get_worker_pool_stats():
+    return [io_pool.get_stats()]
+
+def shutdown_worker_pools():
+    # Wait I/O tasks finish, such as session file writing of killed buffers.
+    io_pool.shutdown(wait=True)
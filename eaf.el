@@ -282,11 +282,39 @@ been initialized."
    'eaf--buffer-map-alist-order)
 
   (add-hook 'kill-buffer-hook #'eaf--monitor-buffer-kill nil t)
+  (add-hook 'change-major-mode-hook #'eaf--monitor-buffer-mode-change nil t)
   (add-hook 'kill-emacs-hook #'eaf--monitor-emacs-kill))
 
 (defvar eaf-python-file (expand-file-name "eaf.py" (file-name-directory load-file-name)))
 
-(defvar eaf-server-port nil)
+(defvar eaf-server-port nil
+  "Port of EPC server, or socket file path when EPC use unix domain socket.")
+
+(defcustom eaf-epc-transport 'auto
+  "Transport of EPC connections between Emacs and EAF process.
+
+`unix' use unix domain socket, it has lower latency than TCP.
+`tcp' use TCP port of localhost.
+`auto' use unix domain socket when Emacs support it, and fallback to TCP
+on Windows and WSL."
+  :type '(choice (const auto) (const unix) (const tcp)))
+
+(defun eaf--epc-use-unix-socket-p ()
+  "Return non-nil if EPC connections should use unix domain socket."
+  (pcase eaf-epc-transport
+    ('tcp nil)
+    (_ (and (featurep 'make-network-process '(:family local))
+            (not (memq system-type '(windows-nt ms-dos cygwin)))
+            (not (eaf--called-from-wsl-on-windows-p))))))
+
+(defun eaf--epc-socket-path ()
+  "Return socket file path of Emacs EPC server, socket directory is only accessible by current user."
+  (let ((socket-dir (expand-file-name (format "eaf-%d" (user-uid))
+                                      (or (getenv "XDG_RUNTIME_DIR") temporary-file-directory))))
+    (unless (file-directory-p socket-dir)
+      (make-directory socket-dir t))
+    (set-file-modes socket-dir #o700)
+    (expand-file-name (format "eaf-emacs-%d.sock" (emacs-pid)) socket-dir)))
 
 (defun eaf--start-epc-server ()
   "Function to start the EPC server."
@@ -299,7 +327,9 @@ been initialized."
                (eaf-epc-define-method mngr 'get-emacs-func-result 'eaf--get-emacs-func-result)
                (eaf-epc-define-method mngr 'get-emacs-var 'eaf--get-emacs-var)
                (eaf-epc-define-method mngr 'get-emacs-vars 'eaf--get-emacs-vars)
-               ))))
+               ))
+           (when (eaf--epc-use-unix-socket-p)
+             (eaf--epc-socket-path))))
     (if eaf-server
         (setq eaf-server-port (process-contact eaf-server :service))
       (error "[EAF] eaf-server failed to start")))
@@ -526,6 +556,117 @@ And you need re-implement `eaf-goto-right-tab' self."
 EAF will remove the duplicate file manager buffer."
   :type 'integer)
 
+(defcustom eaf-buffer-freeze-delay 0
+  "Freeze browser buffer after it has been hidden for this many seconds.
+
+Frozen page stops running JavaScript, timers and connections, it is restored
+when buffer show again.  Page that is playing audio is never frozen.
+Set to 0 to never freeze hidden buffers."
+  :type 'integer)
+
+(defcustom eaf-buffer-hide-stop-painting nil
+  "When non-nil, mark browser page invisible when all views of buffer hide.
+
+Renderer stops painting invisible page, page is visible again when buffer show.
+Default is nil, because page see `document.visibilityState' change to hidden,
+and browser may throttle timers and media of hidden page."
+  :type 'boolean)
+
+(defcustom eaf-buffer-discard-memory-budget 0
+  "Memory budget of browser renderer processes, in megabytes.
+
+When renderers use more memory than this budget, EAF discards pages of
+least recently hidden buffers, page is reloaded when buffer show again.
+Set to 0 to never discard hidden buffers."
+  :type 'integer)
+
+(defcustom eaf-lazy-restore-buffers t
+  "When non-nil, restored buffers are placeholders until they show.
+
+EAF only records URL and title of placeholder buffer, application and
+page are loaded when buffer show first time, restoring many buffers is fast."
+  :type 'boolean)
+
+(defcustom eaf-lazy-restore-trickle-concurrency 0
+  "Number of placeholder buffers that load in background at same time.
+
+Set to 0 to load placeholder buffers only when they show."
+  :type 'integer)
+
+(defcustom eaf-send-key-batch-delay 0.01
+  "Seconds that EAF waits to coalesce typed characters into one call.
+
+First character is always sent immediately, characters that follow it within
+this delay are sent in batch, so pasting or fast typing into web inputs don't
+send one call per character.  Set to 0 to send every key immediately."
+  :type 'number)
+
+(defcustom eaf-sync-call-timeout 5
+  "Seconds that Python side waits for Qt main thread to answer `eaf-call-sync' requests."
+  :type 'integer)
+
+(defcustom eaf-frame-coordinate-timeout 0.2
+  "Seconds that Emacs waits EAF process answer frame coordinate on Sway and Hyprland.
+
+Frame coordinate is fetched on every window configuration change,
+Emacs use last coordinate when EAF process don't answer in time."
+  :type 'number)
+
+(defcustom eaf-resource-monitor-interval 5
+  "Interval in seconds that EAF samples memory and CPU of its processes."
+  :type 'integer)
+
+(defcustom eaf-resize-debounce-delay 0.15
+  "Seconds that window geometry must stay stable before EAF relayout buffer.
+
+When you drag window divider, EAF scale current rendering of buffer until
+geometry stop changing for this many seconds, then relayout buffer once.
+Set to 0 to relayout buffer on every geometry change."
+  :type 'number)
+
+(defcustom eaf-log-echo-level "error"
+  "Log records at or above this level are printed to *eaf* buffer.
+
+Other records, such as console messages of web pages, are kept in memory,
+use `eaf-show-logs' to view them."
+  :type '(choice (const "debug")
+                 (const "info")
+                 (const "warning")
+                 (const "error")
+                 (const :tag "Never" "none")))
+
+(defcustom eaf-stall-watchdog-threshold 0
+  "Seconds that Qt main thread of EAF process can block before watchdog record it as stall.
+
+Default is 0, watchdog is disabled because it run heartbeat timer and monitor thread all the time.
+Set to positive number such as 0.5 when you want to find where EAF stall,
+then use `eaf-show-stall-sites' to view stall sites."
+  :type 'number)
+
+(defcustom eaf-profiler-interval 10
+  "Milliseconds between two stack samples of `eaf-start-profiler'."
+  :type 'integer)
+
+(defcustom eaf-profiler-output-format "speedscope"
+  "File format that `eaf-stop-profiler' write.
+
+\"speedscope\" is JSON that open with https://www.speedscope.app,
+\"collapsed\" is collapsed stacks that flamegraph.pl accept."
+  :type '(choice (const "speedscope")
+                 (const "collapsed")))
+
+(defcustom eaf-log-rate-limit 50
+  "Max log records per second of one source, such as console of one web page.
+
+Records over limit are dropped and counted."
+  :type 'integer)
+
+(defcustom eaf-job-concurrency-limit 2
+  "Max number of subprocesses of same external tool (such as youtube-dl or monolith) that run at same time.
+
+Other jobs wait in queue until running jobs finish."
+  :type 'integer)
+
 (defvar eaf--monitor-configuration-p t
   "When this variable is non-nil, `eaf-monitor-configuration-change' executes.
 This variable is used to open buffer in backend and avoid graphics blink.
@@ -610,13 +751,47 @@ A hashtable, key is url and value is title.")
            (let ((process-connection-type nil))
              (start-process "" nil "xdg-open" path-or-url))))))
 
+(defvar eaf--pending-keys nil
+  "Typed characters that wait to send to Python side in one batch, in reverse order.")
+
+(defvar eaf--pending-keys-buffer-id nil
+  "Buffer id of `eaf--pending-keys'.")
+
+(defvar eaf--pending-keys-timer nil)
+
+(defun eaf--flush-pending-keys ()
+  "Send coalesced characters in `eaf--pending-keys' to Python side with one call."
+  (when eaf--pending-keys-timer
+    (cancel-timer eaf--pending-keys-timer)
+    (setq eaf--pending-keys-timer nil))
+  (when eaf--pending-keys
+    (let ((keys (apply #'concat (nreverse eaf--pending-keys))))
+      ;; Clear pending keys before call, `eaf-call-async' flush pending keys too.
+      (setq eaf--pending-keys nil)
+      (eaf-call-async "send_key_batch" eaf--pending-keys-buffer-id keys))))
+
+(defun eaf--pending-keys-timeout ()
+  "Send coalesced characters when batch window end.
+
+Window is open again when characters were coalesced, user is still typing fast."
+  (setq eaf--pending-keys-timer nil)
+  (when eaf--pending-keys
+    (eaf--flush-pending-keys)
+    (setq eaf--pending-keys-timer
+          (run-with-timer eaf-send-key-batch-delay nil #'eaf--pending-keys-timeout))))
+
 (defun eaf-call-async (method &rest args)
   "Call Python EPC function METHOD and ARGS asynchronously."
+  ;; Send typed characters first, keep order of key events and other calls.
+  (when eaf--pending-keys
+    (eaf--flush-pending-keys))
   (eaf-deferred-chain
     (eaf-epc-call-deferred eaf-epc-process (read method) args)))
 
 (defun eaf-call-sync (method &rest args)
   "Call Python EPC function METHOD and ARGS synchronously."
+  (when eaf--pending-keys
+    (eaf--flush-pending-keys))
   (eaf-epc-call-sync eaf-epc-process (read method) args))
 
 (defun eaf--called-from-wsl-on-windows-p ()
@@ -675,7 +850,7 @@ A hashtable, key is url and value is title.")
     (let* ((eaf-args (append
                       (list eaf-python-file)
                       (eaf-get-render-size)
-                      (list (number-to-string eaf-server-port))
+                      (list (format "%s" eaf-server-port))
                       ))
            environments)
 
@@ -750,8 +925,10 @@ If RESTART is non-nil, cached URL and app-name will not be cleared."
   "Kill EAF background python process."
   (interactive)
   (when (eaf-epc-live-p eaf-epc-process)
-    ;; Cleanup before exit EAF server process.
-    (eaf-call-async "cleanup")
+    ;; Cleanup before exit EAF server process,
+    ;; wait cleanup finish, make sure session data of killed buffers is written.
+    (with-timeout ((1+ eaf-sync-call-timeout))
+      (ignore-errors (eaf-call-sync "cleanup")))
     ;; Delete EAF server process.
     (eaf-epc-stop-epc eaf-epc-process)
     ;; Kill *eaf* buffer.
@@ -975,6 +1152,7 @@ keybinding variable to eaf-app-binding-alist."
       (set (make-local-variable 'eaf--buffer-url) url)
       (set (make-local-variable 'eaf--buffer-app-name) app-name)
       (set (make-local-variable 'eaf--buffer-args) args)
+      (eaf--register-buffer eaf-buffer)
       (run-hooks (intern (format "eaf-%s-hook" app-name)))
       (setq mode-name (concat "EAF/" app-name)))
     eaf-buffer))
@@ -1165,11 +1343,29 @@ provide at least one way to let everyone experience EAF. ;)"
 (defun eaf--split-number (string)
   (mapcar #'string-to-number (split-string string)))
 
+(defvar eaf--last-frame-coordinate nil
+  "Last frame coordinate that EAF process answer.")
+
+(defun eaf--get-compositor-frame-coordinate ()
+  "Get frame coordinate from EAF process, never wait longer than `eaf-frame-coordinate-timeout'.
+
+Return last coordinate if EAF process is busy, return nil if EAF process can't find Emacs window."
+  (let ((coordinate (with-timeout (eaf-frame-coordinate-timeout 'timeout)
+                      (ignore-errors (eaf-call-sync "get_window_coordinate" (emacs-pid))))))
+    (if (eq coordinate 'timeout)
+        eaf--last-frame-coordinate
+      (setq eaf--last-frame-coordinate coordinate))))
+
 (defun eaf--get-frame-coordinate ()
   "We need fetch Emacs coordinate to adjust coordinate of EAF if it running on system not support cross-process reparent technology.
 
 Such as, wayland native, macOS etc."
-  (cond ((string-equal (getenv "XDG_CURRENT_DESKTOP") "sway")
+  (cond ((and (member (getenv "XDG_CURRENT_DESKTOP") '("sway" "Hyprland"))
+              (eaf-epc-live-p eaf-epc-process)
+              ;; EAF process answer coordinate from cached window table of compositor,
+              ;; it's much faster than fork hyprctl or swaymsg.
+              (eaf--get-compositor-frame-coordinate)))
+        ((string-equal (getenv "XDG_CURRENT_DESKTOP") "sway")
          (eaf--split-number (shell-command-to-string (concat eaf-build-dir "swaymsg-treefetch/swaymsg-rectfetcher.sh emacs"))))
         ((string-equal (getenv "XDG_CURRENT_DESKTOP") "Hyprland")
          (let ((clients (json-parse-string (shell-command-to-string "hyprctl -j clients")))
@@ -1204,16 +1400,65 @@ Such as, wayland native, macOS etc."
         (t
          0)))
 
+(defvar eaf--buffer-id-table (make-hash-table :test 'equal)
+  "Hash table of EAF buffers, key is buffer id.")
+
+(defvar eaf--buffer-url-table (make-hash-table :test 'equal)
+  "Hash table of EAF buffer lists, key is buffer url.")
+
+(defvar eaf--buffer-app-table (make-hash-table :test 'equal)
+  "Hash table of EAF buffer lists, key is app name.")
+
+(defun eaf--index-push (table key buffer)
+  (puthash key (cons buffer (delq buffer (gethash key table))) table))
+
+(defun eaf--index-remove (table key buffer)
+  (let ((buffers (delq buffer (gethash key table))))
+    (if buffers
+        (puthash key buffers table)
+      (remhash key table))))
+
+(defun eaf--register-buffer (buffer)
+  "Add EAF BUFFER to buffer index, call it after buffer id, url and app name are set."
+  (with-current-buffer buffer
+    (puthash eaf--buffer-id buffer eaf--buffer-id-table)
+    (eaf--index-push eaf--buffer-url-table eaf--buffer-url buffer)
+    (eaf--index-push eaf--buffer-app-table eaf--buffer-app-name buffer)))
+
+(defun eaf--unregister-buffer (buffer)
+  "Remove EAF BUFFER from buffer index."
+  (with-current-buffer buffer
+    (remhash eaf--buffer-id eaf--buffer-id-table)
+    (eaf--index-remove eaf--buffer-url-table eaf--buffer-url buffer)
+    (eaf--index-remove eaf--buffer-app-table eaf--buffer-app-name buffer)))
+
+(defun eaf--update-buffer-url (buffer url)
+  "Set URL of EAF BUFFER and update url index."
+  (with-current-buffer buffer
+    (eaf--index-remove eaf--buffer-url-table eaf--buffer-url buffer)
+    (setq-local eaf--buffer-url url)
+    (eaf--index-push eaf--buffer-url-table url buffer)))
+
+(defun eaf--get-buffers-by-url (url)
+  "Return EAF buffers that visit URL."
+  (gethash url eaf--buffer-url-table))
+
+(defun eaf--get-buffers-by-app (app-name)
+  "Return EAF buffers of APP-NAME."
+  (gethash app-name eaf--buffer-app-table))
+
 (defun eaf--get-eaf-buffers ()
   "A function that return a list of EAF buffers."
-  (cl-remove-if-not
-   (lambda (buffer)
-     (with-current-buffer buffer
-       (derived-mode-p 'eaf-mode)))
-   (buffer-list)))
+  (hash-table-values eaf--buffer-id-table))
+
+(defun eaf--monitor-buffer-mode-change ()
+  "Remove buffer from EAF buffer index when major mode is changed from `eaf-mode'."
+  (eaf--unregister-buffer (current-buffer)))
 
 (defun eaf--monitor-buffer-kill ()
   "A function monitoring when an EAF buffer is killed."
+  (eaf--unregister-buffer (current-buffer))
+
   (ignore-errors
     (eaf-call-async "kill_buffer" eaf--buffer-id))
 
@@ -1227,15 +1472,44 @@ Such as, wayland native, macOS etc."
          (eaf--kill-python-process))
        ))))
 
+(defun eaf--browser-restore-file ()
+  "Return file that saves URLs of browser buffers when Emacs is killed."
+  (concat eaf-config-location
+          (file-name-as-directory "browser")
+          (file-name-as-directory "history")
+          "restore.txt"))
+
+(defun eaf-restore-browser-buffers ()
+  "Restore browser buffers that saved when Emacs was killed.
+
+Restored buffers are placeholders when `eaf-lazy-restore-buffers' is non-nil,
+page loads when buffer show first time."
+  (interactive)
+  (let ((restore-file (eaf--browser-restore-file)))
+    (cond ((not (assoc "browser" eaf-app-module-path-alist))
+           (message "[EAF] Browser application is not installed."))
+          ((not (file-exists-p restore-file))
+           (message "[EAF] No browser buffer to restore."))
+          (t
+           (let ((urls (with-temp-buffer
+                         (insert-file-contents restore-file)
+                         (split-string (buffer-string) "\n" t))))
+             (if (eaf-epc-live-p eaf-epc-process)
+                 (dolist (url urls)
+                   (if eaf-lazy-restore-buffers
+                       (eaf--open-placeholder url "browser" "")
+                     (eaf--open-internal url "browser" "")))
+               ;; Open buffers after EAF process started, see `eaf--first-start'.
+               (dolist (url urls)
+                 (push `(,url "browser" "") eaf--first-start-app-buffers))
+               (eaf-start-process))
+             (message "[EAF] Restored %s browser buffers." (length urls)))))))
+
 (defun eaf--monitor-emacs-kill ()
   "Function monitoring when Emacs is killed."
   (ignore-errors
     (when eaf-browser-continue-where-left-off
-      (let* ((browser-restore-file-path
-              (concat eaf-config-location
-                      (file-name-as-directory "browser")
-                      (file-name-as-directory "history")
-                      "restore.txt"))
+      (let* ((browser-restore-file-path (eaf--browser-restore-file))
              (browser-urls ""))
         (write-region
          (dolist (buffer (eaf--get-eaf-buffers) browser-urls)
@@ -1243,7 +1517,9 @@ Such as, wayland native, macOS etc."
              (when (equal eaf--buffer-app-name "browser")
                (setq browser-urls (concat eaf--buffer-url "\n" browser-urls)))))
          nil browser-restore-file-path)))
-    (eaf-call-async "kill_emacs")))
+    (eaf-call-async "kill_emacs")
+    ;; Wait session data of killed buffers written before Emacs exit.
+    (eaf--kill-python-process)))
 
 (defun eaf-keyboard-quit ()
   "Wrap around `keyboard-quit' and signals a ‘quit’ condition to EAF applications."
@@ -1251,10 +1527,77 @@ Such as, wayland native, macOS etc."
   (eaf-call-async "action_quit" eaf--buffer-id)
   (call-interactively 'keyboard-quit))
 
+(defvar eaf--key-trace-p nil
+  "When non-nil, EAF records latency of each key-send stage, see `eaf-toggle-key-trace'.")
+
 (defun eaf-send-key ()
-  "Directly send key to EAF Python side."
+  "Directly send key to EAF Python side.
+
+First self-inserting character is sent immediately, characters typed within
+`eaf-send-key-batch-delay' after it are coalesced and sent with one call."
   (interactive)
-  (eaf-call-async "send_key" eaf--buffer-id (key-description (this-command-keys-vector))))
+  (let ((key (key-description (this-command-keys-vector))))
+    (cond (eaf--key-trace-p
+           (eaf-call-async "send_key_traced" eaf--buffer-id key (float-time)))
+          ((and (> eaf-send-key-batch-delay 0)
+                (or (equal key "SPC")
+                    (equal (length key) 1)))
+           (unless (equal eaf--pending-keys-buffer-id eaf--buffer-id)
+             (eaf--flush-pending-keys)
+             (setq eaf--pending-keys-buffer-id eaf--buffer-id))
+           (if eaf--pending-keys-timer
+               ;; Batch window is open, send key with next batch.
+               (push (if (equal key "SPC") " " key) eaf--pending-keys)
+             ;; First key is sent immediately, keys that follow within delay are coalesced.
+             (eaf-call-async "send_key" eaf--buffer-id key)
+             (setq eaf--pending-keys-timer
+                   (run-with-timer eaf-send-key-batch-delay nil #'eaf--pending-keys-timeout))))
+          (t
+           (eaf-call-async "send_key" eaf--buffer-id key)))))
+
+(defun eaf-toggle-key-trace ()
+  "Toggle latency trace of key-send pipeline."
+  (interactive)
+  (setq eaf--key-trace-p (not eaf--key-trace-p))
+  (eaf-call-async (if eaf--key-trace-p "enable_key_trace" "disable_key_trace"))
+  (message "[EAF] Key trace %s." (if eaf--key-trace-p "enabled" "disabled")))
+
+(defun eaf-report-key-trace ()
+  "Show p50/p99 latency of key-send stages, and dump trace as Chrome trace-event JSON."
+  (interactive)
+  (let ((stats (eaf-call-sync "get_key_trace_stats"))
+        (trace-file (eaf-call-sync "dump_key_trace")))
+    (with-current-buffer (get-buffer-create "*eaf-key-trace*")
+      (let ((inhibit-read-only t))
+        (erase-buffer)
+        (insert (format "%-8s %8s %10s %10s %10s\n" "Stage" "Count" "p50(ms)" "p99(ms)" "max(ms)"))
+        (dolist (stat stats)
+          (insert (apply #'format "%-8s %8s %10s %10s %10s\n" stat)))
+        (insert (format "\nChrome trace: %s\n" trace-file))
+        (special-mode))
+      (display-buffer (current-buffer)))))
+
+(defun eaf-start-epc-record (file)
+  "Record EPC calls that Emacs send to EAF process to FILE.
+
+Replay record with benchmarks/replay_epc.py to measure latency of each call type."
+  (interactive (list (read-file-name "Record EPC calls to: " eaf-config-location nil nil "epc_record.jsonl")))
+  (eaf-call-async "start_epc_record" (expand-file-name file)))
+
+(defun eaf-stop-epc-record ()
+  "Stop record EPC calls."
+  (interactive)
+  (eaf-call-async "stop_epc_record"))
+
+(defun eaf-start-profiler ()
+  "Start sampling profiler in EAF process, it sample Python stacks of all threads."
+  (interactive)
+  (eaf-call-async "start_profiler" eaf-profiler-interval))
+
+(defun eaf-stop-profiler ()
+  "Stop sampling profiler, and write profile file to `eaf-config-location'."
+  (interactive)
+  (eaf-call-async "stop_profiler" eaf-profiler-output-format))
 
 (defun eaf-send-key-sequence ()
   "Directly send key sequence to EAF Python side."
@@ -1310,11 +1653,7 @@ of `eaf--buffer-app-name' inside the EAF buffer."
 
 (defun eaf-get-buffer (buffer-id)
   "Find the buffer given the BUFFER-ID."
-  (catch 'found-eaf
-    (eaf-for-each-eaf-buffer
-     (when (string= eaf--buffer-id buffer-id)
-       (throw 'found-eaf buffer))
-     nil)))
+  (gethash buffer-id eaf--buffer-id-table))
 
 (defun eaf-get-window-size-by-buffer-id (buffer-id)
   (let ((buffer (eaf-get-buffer buffer-id)))
@@ -1365,6 +1704,8 @@ of `eaf--buffer-app-name' inside the EAF buffer."
 (defun eaf--first-start (eaf-epc-port)
   "Call `eaf--open-internal' upon receiving `start_finish' signal from server.
 
+EAF-EPC-PORT is port of EAF EPC server, or socket file path when EPC use unix domain socket.
+
 WEBENGINE-INCLUDE-PRIVATE-CODEC is only useful when app-name is video-player."
   ;; Make EPC process.
   (setq eaf-epc-process (make-eaf-epc-manager
@@ -1376,8 +1717,13 @@ WEBENGINE-INCLUDE-PRIVATE-CODEC is only useful when app-name is video-player."
                          ))
   (eaf-epc-init-epc-layer eaf-epc-process)
 
-  (dolist (buffer-info eaf--first-start-app-buffers)
-    (eaf--open-internal (nth 0 buffer-info) (nth 1 buffer-info) (nth 2 buffer-info)))
+  ;; Only last buffer displays, other buffers are placeholders when `eaf-lazy-restore-buffers' is non-nil.
+  (let ((last-buffer-info (car (last eaf--first-start-app-buffers))))
+    (dolist (buffer-info eaf--first-start-app-buffers)
+      (if (and eaf-lazy-restore-buffers
+               (not (eq buffer-info last-buffer-info)))
+          (eaf--open-placeholder (nth 0 buffer-info) (nth 1 buffer-info) (nth 2 buffer-info))
+        (eaf--open-internal (nth 0 buffer-info) (nth 1 buffer-info) (nth 2 buffer-info)))))
   (setq eaf--first-start-app-buffers nil))
 
 (defun eaf--update-buffer-details (buffer-id title url)
@@ -1399,7 +1745,7 @@ WEBENGINE-INCLUDE-PRIVATE-CODEC is only useful when app-name is video-player."
                    (equal eaf--buffer-id buffer-id))
               (setq mode-name (concat "EAF/" eaf--buffer-app-name))
               (setq-local eaf--bookmark-title title)
-              (setq-local eaf--buffer-url url)
+              (eaf--update-buffer-url buffer url)
               (rename-buffer (format eaf-buffer-title-format title) t)
               (eaf--update-modeline-icon)
               (throw 'found-eaf t))))))))
@@ -1461,6 +1807,29 @@ WEBENGINE-INCLUDE-PRIVATE-CODEC is only useful when app-name is video-player."
     (eaf--update-modeline-icon)
     (eaf--preview-display-buffer eaf--buffer-app-name buffer)))
 
+(defun eaf--open-placeholder (url app-name args)
+  "Open placeholder buffer of EAF application with URL, APP-NAME and ARGS.
+
+Placeholder buffer doesn't display, EAF process loads application when buffer show first time."
+  (let* ((buffer (eaf--create-buffer url app-name args)))
+    (with-current-buffer buffer
+      (eaf-call-async "new_placeholder_buffer"
+                      eaf--buffer-id
+                      (if (eaf--called-from-wsl-on-windows-p)
+                          (eaf--translate-wsl-url-to-windows eaf--buffer-url)
+                        eaf--buffer-url)
+                      (eaf--get-app-module-path eaf--buffer-app-name)
+                      eaf--buffer-args
+                      (buffer-name))
+
+      ;; Run application's hook.
+      (let ((app-hook (assoc eaf--buffer-app-name eaf-app-hook-alist)))
+        (when app-hook
+          (funcall (cdr app-hook))))
+
+      (eaf--update-modeline-icon))
+    buffer))
+
 (defun eaf--rebuild-buffer ()
   (when (derived-mode-p 'eaf-mode)
     (eaf-restart-process)
@@ -1566,14 +1935,11 @@ When called interactively, URL accepts a file that can be opened by EAF."
 
   ;; Open URL with EAF application
   (if (eaf-epc-live-p eaf-epc-process)
-      (let (exists-eaf-buffer)
-        ;; Try to open buffer           ; ;
-        (catch 'found-eaf
-          (eaf-for-each-eaf-buffer
-           (when (and (string= eaf--buffer-url url)
-                      (string= eaf--buffer-app-name app-name))
-             (setq exists-eaf-buffer buffer)
-             (throw 'found-eaf t))))
+      (let ((exists-eaf-buffer
+             ;; Try to open buffer.
+             (cl-find-if (lambda (buffer)
+                           (string= (buffer-local-value 'eaf--buffer-app-name buffer) app-name))
+                         (eaf--get-buffers-by-url url))))
 
         ;; Switch to existing buffer,
         ;; if no match buffer found, call `eaf--open-internal'.
@@ -1648,6 +2014,34 @@ So multiple EAF buffers visiting the same file do not sync with each other."
 (defun eaf-get-theme-foreground-color ()
   (format "%s" (frame-parameter nil 'foreground-color)))
 
+(defun eaf--invalidate-frame-func-cache (&rest _)
+  "Results of frame dependent functions that cached by EAF process is stale when frame created, deleted or moved."
+  (when (eaf-epc-live-p eaf-epc-process)
+    (eaf-call-async "invalidate_emacs_func_cache"
+                    (list "eaf-emacs-not-use-reparent-technology" "eaf-emacs-running-in-wayland-native"))))
+(add-hook 'after-make-frame-functions #'eaf--invalidate-frame-func-cache)
+(add-hook 'delete-frame-functions #'eaf--invalidate-frame-func-cache)
+(when (boundp 'display-monitors-changed-functions)
+  (add-hook 'display-monitors-changed-functions #'eaf--invalidate-frame-func-cache))
+
+(defvar eaf--invalidate-frame-func-cache-timer nil
+  "Timer that invalidate frame dependent functions after frame stop moving.")
+
+(defun eaf--invalidate-frame-func-cache-after-move (&rest _)
+  "`move-frame-functions' run on every move event when user drag frame, invalidate cache once after frame stop moving."
+  (when eaf--invalidate-frame-func-cache-timer
+    (cancel-timer eaf--invalidate-frame-func-cache-timer))
+  (setq eaf--invalidate-frame-func-cache-timer
+        (run-with-timer 0.5 nil
+                        (lambda ()
+                          (setq eaf--invalidate-frame-func-cache-timer nil)
+                          (eaf--invalidate-frame-func-cache)))))
+(add-hook 'move-frame-functions #'eaf--invalidate-frame-func-cache-after-move)
+
+(defun eaf--get-theme-info ()
+  "Return list of theme mode, foreground color and background color."
+  (list (eaf-get-theme-mode) (eaf-get-theme-foreground-color) (eaf-get-theme-background-color)))
+
 (defun eaf--get-current-desktop-name ()
   "Get current desktop name by `wmctrl'."
   (if (string-empty-p eaf-wm-name)
@@ -1855,9 +2249,180 @@ It currently identifies PDF, videos, images, and mindmap file extensions."
 (advice-add #'find-file :around #'eaf--find-file-advisor)
 
 (defun eaf--load-theme (&rest _ignores)
-  (eaf-for-each-eaf-buffer
-   (eaf-call-async "eval_function" eaf--buffer-id "update_theme" (key-description (this-command-keys-vector)))))
-(advice-add #'load-theme :after #'eaf--load-theme)
+  "Broadcast new theme to all EAF buffers with one call."
+  (when (eaf-epc-live-p eaf-epc-process)
+    (apply #'eaf-call-async "update_theme" (eaf--get-theme-info))))
+;; NOTE: `load-theme' call `enable-theme', don't advise `load-theme', otherwise theme is broadcast twice.
+(advice-add #'enable-theme :after #'eaf--load-theme)
+(advice-add #'disable-theme :after #'eaf--load-theme)
+(advice-add #'set-background-color :after #'eaf--load-theme)
+(advice-add #'set-foreground-color :after #'eaf--load-theme)
+
+(defun eaf-show-renderer-memory ()
+  "Show memory of browser renderer processes."
+  (interactive)
+  (eaf-call-async "report_renderer_memory"))
+
+(defun eaf--show-renderer-memory (memory-info)
+  "Show MEMORY-INFO reported by Python side, each item is (buffer-id title pid rss-kb stage)."
+  (with-current-buffer (get-buffer-create "*eaf-renderer-memory*")
+    (let ((inhibit-read-only t))
+      (erase-buffer)
+      (insert (format "%-8s %10s  %-10s %s\n" "PID" "RSS (MB)" "Stage" "Buffer"))
+      (dolist (info memory-info)
+        (insert (format "%-8s %10.1f  %-10s %s\n"
+                        (nth 2 info) (/ (nth 3 info) 1024.0) (nth 4 info) (nth 1 info))))
+      (special-mode))
+    (display-buffer (current-buffer))))
+
+(defun eaf--resource-dashboard-sort-number (column)
+  "Return a predicate that sort tabulated list entries by number of COLUMN."
+  (lambda (a b)
+    (< (string-to-number (aref (cadr a) column))
+       (string-to-number (aref (cadr b) column)))))
+
+(define-derived-mode eaf-resource-dashboard-mode tabulated-list-mode "EAF-Resource"
+  "Major mode for showing memory and CPU usage of EAF buffers."
+  (setq tabulated-list-format
+        `[("Buffer" 40 t)
+          ("App" 14 t)
+          ("PID" 8 ,(eaf--resource-dashboard-sort-number 2) :right-align t)
+          ("RSS(MB)" 9 ,(eaf--resource-dashboard-sort-number 3) :right-align t)
+          ("CPU(s)" 9 ,(eaf--resource-dashboard-sort-number 4) :right-align t)
+          ("CPU%" 7 ,(eaf--resource-dashboard-sort-number 5) :right-align t)
+          ("Views" 6 ,(eaf--resource-dashboard-sort-number 6) :right-align t)
+          ("Scripts" 8 ,(eaf--resource-dashboard-sort-number 7) :right-align t)
+          ("Threads" 8 ,(eaf--resource-dashboard-sort-number 8) :right-align t)
+          ("Stage" 10 t)])
+  (setq tabulated-list-sort-key (cons "RSS(MB)" t))
+  (add-hook 'tabulated-list-revert-hook #'eaf-show-resource-dashboard nil t)
+  (tabulated-list-init-header))
+
+(defun eaf-show-resource-dashboard ()
+  "Show memory and CPU usage of EAF process and each EAF buffer.
+
+Placeholder buffers of restored session are listed with stage unloaded."
+  (interactive)
+  (eaf-call-async "show_resource_dashboard"))
+
+(defun eaf--show-resource-dashboard (resource-table)
+  "Render RESOURCE-TABLE reported by Python side in dashboard buffer.
+
+Each row is (buffer-id app title pid rss-kb cpu-time cpu-percent views scripts threads stage)."
+  (with-current-buffer (get-buffer-create "*eaf-resource-dashboard*")
+    (unless (derived-mode-p 'eaf-resource-dashboard-mode)
+      (eaf-resource-dashboard-mode))
+    (setq tabulated-list-entries
+          (mapcar (lambda (row)
+                    (list (nth 0 row)
+                          (vector (format "%s" (nth 2 row))
+                                  (format "%s" (nth 1 row))
+                                  (format "%s" (nth 3 row))
+                                  (format "%.1f" (/ (nth 4 row) 1024.0))
+                                  (format "%s" (nth 5 row))
+                                  (format "%s" (nth 6 row))
+                                  (format "%s" (nth 7 row))
+                                  (format "%s" (nth 8 row))
+                                  (format "%s" (nth 9 row))
+                                  (format "%s" (nth 10 row)))))
+                  resource-table))
+    (tabulated-list-print t)
+    (display-buffer (current-buffer))))
+
+;; Job list
+(define-derived-mode eaf-job-list-mode tabulated-list-mode "EAF-Jobs"
+  "Major mode for showing jobs of external tools that run by EAF."
+  (setq tabulated-list-format
+        `[("ID" 5 ,(eaf--resource-dashboard-sort-number 0) :right-align t)
+          ("Tool" 12 t)
+          ("State" 10 t)
+          ("Progress" 9 ,(eaf--resource-dashboard-sort-number 3) :right-align t)
+          ("Time(s)" 8 ,(eaf--resource-dashboard-sort-number 4) :right-align t)
+          ("Description" 0 t)])
+  (add-hook 'tabulated-list-revert-hook #'eaf-list-jobs nil t)
+  (tabulated-list-init-header))
+
+(define-key eaf-job-list-mode-map (kbd "k") #'eaf-cancel-job)
+
+(defun eaf-list-jobs ()
+  "Show jobs of external tools, such as youtube-dl, monolith and OCR."
+  (interactive)
+  (eaf-call-async "show_job_list"))
+
+(defun eaf--show-job-list (job-list)
+  "Render JOB-LIST reported by Python side in job list buffer.
+
+Each row is (job-id tool buffer-id description state progress elapsed)."
+  (with-current-buffer (get-buffer-create "*eaf-jobs*")
+    (unless (derived-mode-p 'eaf-job-list-mode)
+      (eaf-job-list-mode))
+    (setq tabulated-list-entries
+          (mapcar (lambda (row)
+                    (list (nth 0 row)
+                          (vector (format "%s" (nth 0 row))
+                                  (format "%s" (nth 1 row))
+                                  (format "%s" (nth 4 row))
+                                  (if (< (nth 5 row) 0) "-" (format "%.1f%%" (nth 5 row)))
+                                  (format "%s" (nth 6 row))
+                                  (format "%s" (nth 3 row)))))
+                  job-list))
+    (tabulated-list-print t)
+    (display-buffer (current-buffer))))
+
+(defun eaf-show-logs (&optional current-buffer-only)
+  "Show recent logs of EAF process, such as Qt messages and web page console messages.
+
+With prefix argument CURRENT-BUFFER-ONLY, only show logs of current EAF buffer."
+  (interactive "P")
+  (eaf-call-async "show_logs" 500 "debug" (if current-buffer-only eaf--buffer-id "")))
+
+(defun eaf--show-logs (records)
+  "Render log RECORDS reported by Python side in log buffer.
+
+Each record is (time level source buffer-id message repeat-count)."
+  (with-current-buffer (get-buffer-create "*eaf-log*")
+    (let ((inhibit-read-only t))
+      (erase-buffer)
+      (dolist (record records)
+        (insert (format "%s %-7s %-10s %s%s\n"
+                        (format-time-string "%H:%M:%S" (nth 0 record))
+                        (nth 1 record)
+                        (nth 2 record)
+                        (nth 4 record)
+                        (if (> (nth 5 record) 1) (format " (x%s)" (nth 5 record)) "")))))
+    (special-mode)
+    (goto-char (point-max))
+    (display-buffer (current-buffer))))
+
+(defun eaf-show-stall-sites ()
+  "Show code sites where Qt main thread of EAF process stall, sorted by total stall time."
+  (interactive)
+  (eaf-call-async "show_stall_sites" 20))
+
+(defun eaf--show-stall-sites (sites)
+  "Render stall SITES reported by Python side.
+
+Each site is (kind slot count total-ms max-ms stack)."
+  (with-current-buffer (get-buffer-create "*eaf-stalls*")
+    (let ((inhibit-read-only t))
+      (erase-buffer)
+      (if (null sites)
+          (insert "No stall recorded.\n")
+        (dolist (site sites)
+          (insert (format "%s  %s\n  count: %s  total: %sms  max: %sms\n%s\n\n"
+                          (nth 0 site) (nth 1 site) (nth 2 site) (nth 3 site) (nth 4 site)
+                          (replace-regexp-in-string "^" "    " (nth 5 site)))))))
+    (special-mode)
+    (goto-char (point-min))
+    (display-buffer (current-buffer))))
+
+(defun eaf-cancel-job (job-id)
+  "Cancel job JOB-ID, default is job at point in job list buffer."
+  (interactive (list (or (tabulated-list-get-id)
+                         (read-number "Cancel job: "))))
+  (eaf-call-async "cancel_job" job-id)
+  (when (derived-mode-p 'eaf-job-list-mode)
+    (run-with-timer 0.5 nil #'eaf-list-jobs)))
 
 (defun eaf-ocr-buffer ()
   (interactive)
@@ -1935,31 +2500,29 @@ For a full `install-eaf.py' experience, refer to `--help' and run in a terminal.
 (add-hook 'post-command-hook 'eaf-monitor-window-buffer-change)
 
 (defun eaf-clean-file-manager-buffers ()
-  (let ((now (current-time)))
-    (eaf-for-each-eaf-buffer
-     (when (and
-            ;; Must be EAF file manager buffer.
-            (string-equal eaf--buffer-app-name "file-manager")
-            (boundp 'eaf--last-visit-time)
-            ;; Not show in frame.
-            (not (memq buffer (mapcar #'window-buffer (window-list))))
-            ;; Found duplicate buffer.
-            (eaf-has-duplicate-path-buffer-p buffer)
-            ;; Existing time exceeds than `eaf-duplicate-buffer-survival-time'
-            (> (float-time (time-subtract now eaf--last-visit-time)) eaf-duplicate-buffer-survival-time))
-       ;; Just log in *messages* buffer silently, don't disturb users.
-       (let ((inhibit-message t))
-         (message "[EAF] Clean duplicate file manager buffer: %s" buffer))
-       (kill-buffer buffer)))))
+  ;; Only scan file manager buffers, and only fetch window buffers when there is candidate.
+  (let ((now (current-time))
+        (window-buffers 'unset))
+    ;; Copy list, `kill-buffer' will remove buffer from index.
+    (dolist (buffer (copy-sequence (eaf--get-buffers-by-app "file-manager")))
+      (with-current-buffer buffer
+        (when (and
+               (boundp 'eaf--last-visit-time)
+               ;; Found duplicate buffer.
+               (eaf-has-duplicate-path-buffer-p buffer)
+               ;; Existing time exceeds than `eaf-duplicate-buffer-survival-time'
+               (> (float-time (time-subtract now eaf--last-visit-time)) eaf-duplicate-buffer-survival-time)
+               ;; Not show in frame.
+               (not (memq buffer (if (eq window-buffers 'unset)
+                                     (setq window-buffers (mapcar #'window-buffer (window-list)))
+                                   window-buffers))))
+          ;; Just log in *messages* buffer silently, don't disturb users.
+          (let ((inhibit-message t))
+            (message "[EAF] Clean duplicate file manager buffer: %s" buffer))
+          (kill-buffer buffer))))))
 
 (defun eaf-has-duplicate-path-buffer-p (eaf-buffer)
-  (cl-remove-if-not
-   (lambda (buffer)
-     (and
-      (not (eq buffer eaf-buffer))
-      (string-equal (with-current-buffer eaf-buffer eaf--buffer-url)
-                    (with-current-buffer buffer eaf--buffer-url))))
-   (eaf--get-eaf-buffers)))
+  (remq eaf-buffer (eaf--get-buffers-by-url (buffer-local-value 'eaf--buffer-url eaf-buffer))))
 
 (define-obsolete-function-alias 'eaf-install 'eaf-install-and-update
   "Please use M-x eaf-install-and-update instead.")
@@ -26,17 +26,34 @@ from PyQt6 import QtWebEngineWidgets as NeverUsed # noqa
 
 from PyQt6.QtNetwork import QNetworkProxy, QNetworkProxyFactory
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer, QThread
-from core.utils import PostGui, eval_in_emacs, get_emacs_var, init_epc_client, close_epc_client, message_to_emacs, get_emacs_vars, get_emacs_config_dir
-from epc.server import ThreadingEPCServer
+from PyQt6.QtCore import QTimer
+from core.compositor import get_compositor_client
+from core.dispatcher import main_thread_dispatcher, sync_call_bridge, PRIORITY_HOUSEKEEPING, COALESCE_LATEST, COALESCE_ACCUMULATE
+from core.trace import key_tracer
+from core.worker import io_pool, cancel_background_tasks, get_worker_pool_stats, shutdown_worker_pools
+from core.jobs import job_manager
+from core.log import log_pipeline
+from core.profiler import sampling_profiler
+from core.recorder import epc_recorder, RecordingProxy
+from core.registry import BufferRegistry
+from core.resize import ResizeScheduler
+from core.utils import (PostGui, eval_in_emacs, get_emacs_var, init_epc_client, close_epc_client, message_to_emacs, get_emacs_vars, set_emacs_theme,
+                        emacs_func_cache, invalidate_emacs_func_cache,
+                        get_emacs_config_dir, parse_epc_address, build_epc_server)
 import json
 import os
 import platform
+import subprocess
+import sys
 import threading
 
 if platform.system() == "Windows":
     import pygetwindow as gw    # type: ignore
 
+# Session file smaller than this size is parsed in Qt main thread when buffer create,
+# so session data is restored before any user input reach page.
+SESSION_FILE_SYNC_RESTORE_SIZE = 64 * 1024
+
 class EAF(object):
     def __init__(self, args):
         global emacs_width, emacs_height, proxy_string
@@ -47,24 +64,33 @@ class EAF(object):
         emacs_height = int(emacs_height)
 
         # Init variables.
-        self.buffer_dict = {}
-        self.view_dict = {}
+        # Buffer registry index buffers and views, buffer_dict and view_dict are read-only alias of its dicts,
+        # add or remove buffer and view must go through registry.
+        self.registry = BufferRegistry()
+        self.buffer_dict = self.registry.buffers
+        self.view_dict = self.registry.views
 
-        self.thread_queue = []
+        # Hidden buffers that need update theme when they show.
+        self.theme_outdated_buffer_ids = set()
 
         for name in ["scroll_other_buffer", "eval_js_function", "eval_js_code", "action_quit", "send_key", "send_key_sequence",
-                     "handle_search_forward", "handle_search_backward", "set_focus_text"]:
+                     "send_key_batch", "handle_search_forward", "handle_search_backward", "set_focus_text"]:
             self.build_buffer_function(name)
 
         for name in ["execute_js_function", "execute_js_code", "execute_function", "execute_function_with_args"]:
             self.build_buffer_return_function(name)
 
         # Init EPC client port.
-        init_epc_client(int(emacs_server_port))
+        # Emacs pass unix domain socket path instead of port when it select unix domain socket transport,
+        # our EPC server use same transport as Emacs.
+        emacs_server_address = parse_epc_address(emacs_server_port)
+        init_epc_client(emacs_server_address)
 
         # Build EPC server.
-        self.server = ThreadingEPCServer(('localhost', 0), log_traceback=True)
-        self.server.allow_reuse_address = True
+        self.server_socket_path = None
+        if isinstance(emacs_server_address, str):
+            self.server_socket_path = os.path.join(os.path.dirname(emacs_server_address), "eaf-python-{}.sock".format(os.getpid()))
+        self.server = build_epc_server(self.server_socket_path)
 
         # import logging
         # self.server = ThreadingEPCServer(('localhost', 0)
@@ -72,6 +98,7 @@ class EAF(object):
 
         eaf_config_dir = get_emacs_config_dir()
         self.session_file = os.path.join(eaf_config_dir, "session.json")
+        self.session_file_lock = threading.Lock()
 
         if not os.path.exists(eaf_config_dir):
             os.makedirs(eaf_config_dir);
@@ -82,14 +109,16 @@ class EAF(object):
         # ch.setLevel(logging.DEBUG)
         # self.server.logger.addHandler(ch)
 
-        self.server.register_instance(self) # register instance functions let elisp side call
+        # Register instance functions let elisp side call,
+        # recording proxy forward calls to instance, and record them when EPC record is started.
+        self.server.register_instance(RecordingProxy(self, epc_recorder))
 
         # Start EPC server with sub-thread, avoid block Qt main loop.
         self.server_thread = threading.Thread(target=self.server.serve_forever)
         self.server_thread.start()
 
-        # Pass epc port and webengine codec information to Emacs when first start EAF.
-        eval_in_emacs('eaf--first-start', [self.server.server_address[1]])
+        # Pass epc port (or socket path) and webengine codec information to Emacs when first start EAF.
+        eval_in_emacs('eaf--first-start', [self.server_socket_path or self.server.server_address[1]])
 
         # Disable use system proxy, avoid page slow when no network connected.
         QNetworkProxyFactory.setUseSystemConfiguration(False)
@@ -106,6 +135,52 @@ class EAF(object):
         if proxy_type != "" and proxy_host != "" and proxy_port != "":
             self.enable_proxy()
 
+        # Sync calls from Emacs give up after this seconds if Qt main thread is busy.
+        sync_call_bridge.timeout = get_emacs_var("eaf-sync-call-timeout") or 5
+
+        # Init idle buffer manager, freeze or discard browser buffers that hidden long time.
+        from core.idle import IdleBufferManager
+
+        (buffer_freeze_delay, buffer_discard_memory_budget, buffer_hide_stop_painting) = get_emacs_vars([
+            "eaf-buffer-freeze-delay",
+            "eaf-buffer-discard-memory-budget",
+            "eaf-buffer-hide-stop-painting"])
+        self.idle_buffer_manager = IdleBufferManager(self.buffer_dict, buffer_freeze_delay, buffer_discard_memory_budget,
+                                                     hide_stop_painting=buffer_hide_stop_painting)
+
+        # Placeholder buffers of restored session, app buffer is created when placeholder show first time.
+        from core.lazy import LazyRestoreManager
+
+        self.lazy_restore_manager = LazyRestoreManager(self.create_buffer, get_emacs_var("eaf-lazy-restore-trickle-concurrency") or 0)
+
+        # Start resource monitor, sample memory and cpu of EAF processes in sub-thread.
+        from core.monitor import ResourceMonitor
+
+        self.resource_monitor = ResourceMonitor(get_emacs_var("eaf-resource-monitor-interval") or 5)
+        self.resource_monitor.start()
+
+        # Debounce buffer relayout when user drag window divider.
+        self.resize_scheduler = ResizeScheduler(self.registry.get_buffer_views, get_emacs_var("eaf-resize-debounce-delay") or 0,
+                                                on_relayout=self.update_view_embedding)
+
+        # Limit subprocesses of same external tool that run at same time.
+        job_manager.default_limit = get_emacs_var("eaf-job-concurrency-limit") or 2
+
+        # Qt and JavaScript console messages go to log pipeline, install Qt message handler once for whole process.
+        (log_echo_level, log_rate_limit) = get_emacs_vars(["eaf-log-echo-level", "eaf-log-rate-limit"])
+        log_pipeline.set_echo_level(log_echo_level)
+        log_pipeline.rate_limit = log_rate_limit or 50
+        log_pipeline.install_qt_message_handler()
+
+        # Record where Qt main thread stall, watchdog is opt-in, threshold 0 disable it.
+        from core.watchdog import StallWatchdog
+
+        self.stall_watchdog = None
+        stall_threshold = get_emacs_var("eaf-stall-watchdog-threshold")
+        if stall_threshold:
+            self.stall_watchdog = StallWatchdog(stall_threshold)
+            self.stall_watchdog.start_heartbeat()
+
     def enable_proxy(self):
         global proxy_string
 
@@ -139,13 +214,12 @@ class EAF(object):
         else:
             self.enable_proxy()
 
-    @PostGui()
+    @PostGui(priority=PRIORITY_HOUSEKEEPING, coalesce=COALESCE_LATEST, coalesce_key=lambda args: (args[1], args[2]))
     def update_buffer_with_url(self, module_path, buffer_url, update_data):
         ''' Update buffer with url '''
-        for buffer in list(self.buffer_dict.values()):
-            if buffer.module_path == module_path and buffer.url == buffer_url:
-                buffer.update_with_data(update_data)
-                break
+        buffer = self.registry.get_buffer_by_url(module_path, buffer_url)
+        if buffer is not None:
+            buffer.update_with_data(update_data)
 
     @PostGui()
     def new_buffer(self, buffer_id, url, module_path, arguments):
@@ -154,6 +228,12 @@ class EAF(object):
         '''
         self.create_buffer(buffer_id, url, module_path, arguments)
 
+    @PostGui()
+    def new_placeholder_buffer(self, buffer_id, url, module_path, arguments, title):
+        ''' New placeholder buffer.
+        Module import, buffer widget and page load are deferred until any view of buffer show first time.'''
+        self.lazy_restore_manager.add_placeholder(buffer_id, url, module_path, arguments, title)
+
     def create_buffer(self, buffer_id, url, module_path, arguments):
         ''' Create buffer.
         create_buffer can't wrap with @PostGui, because need call by createNewWindow signal of browser.'''
@@ -175,8 +255,8 @@ class EAF(object):
         # Add module_path.
         app_buffer.module_path = module_path
 
-        # Add buffer to buffer dict.
-        self.buffer_dict[buffer_id] = app_buffer
+        # Add buffer to buffer registry.
+        self.registry.add_buffer(app_buffer)
 
         # Resize buffer with emacs max window size,
         # view (QGraphicsView) will adjust visual area along with emacs window changed.
@@ -199,12 +279,20 @@ class EAF(object):
             self.devtools_page.setDevToolsPage(app_buffer.buffer_widget.web_page)
             self.devtools_page = None
 
+        # Direct embedding is only used when aspect ratio is 0, decide it again when aspect ratio change.
+        app_buffer.aspect_ratio_change.connect(lambda: self.update_view_embedding(app_buffer))
+
         # Restore buffer session.
         self.restore_buffer_session(app_buffer)
 
+        # Update resource information when renderer process changed.
+        if hasattr(app_buffer.buffer_widget, "web_page"):
+            app_buffer.buffer_widget.web_page.renderProcessPidChanged.connect(lambda _: self.update_resource_info(buffer_id))
+        self.update_resource_info(buffer_id)
+
         return app_buffer
 
-    @PostGui()
+    @PostGui(coalesce=COALESCE_LATEST)
     def update_views(self, args):
         ''' Update views.'''
         from core.view import View
@@ -212,9 +300,14 @@ class EAF(object):
         view_infos = args.split(",")
 
         # Do something if buffer's all view hide after update_views operation.
-        old_view_buffer_ids = list(set(map(lambda v: v.buffer_id, self.view_dict.values())))
+        old_view_buffer_ids = self.registry.get_view_buffer_ids()
         new_view_buffer_ids = list(set(map(lambda v: v.split(":")[0], view_infos)))
 
+        # Create app buffer of placeholder before its view create.
+        for new_view_buffer_id in new_view_buffer_ids:
+            if self.lazy_restore_manager.is_placeholder(new_view_buffer_id):
+                self.lazy_restore_manager.materialize(new_view_buffer_id)
+
         # Call all_views_hide interface when buffer's all views will hide.
         # We do something in app's buffer interface, such as videoplayer will pause video when all views hide.
         # Note, we must call this function before last view destroy,
@@ -223,11 +316,16 @@ class EAF(object):
             if old_view_buffer_id not in new_view_buffer_ids:
                 if old_view_buffer_id in self.buffer_dict:
                     self.buffer_dict[old_view_buffer_id].all_views_hide()
+                    self.idle_buffer_manager.buffer_hide(old_view_buffer_id)
+
+        # Buffers that views change, their resource information need update.
+        changed_buffer_ids = set()
 
         # Remove old key from view dict and destroy old view.
         for key in list(self.view_dict):
             if key not in view_infos:
                 self.destroy_view_later(key)
+                changed_buffer_ids.add(key.split(":")[0])
 
         # NOTE:
         # Create new view and REPARENT view to Emacs window.
@@ -237,7 +335,8 @@ class EAF(object):
                     (buffer_id, _, _, _, _, _) = view_info.split(":")
                     try:
                         view = View(self.buffer_dict[buffer_id], view_info)
-                        self.view_dict[view_info] = view
+                        self.registry.add_view(view_info, view)
+                        changed_buffer_ids.add(buffer_id)
                     except KeyError:
                         eval_in_emacs('eaf--rebuild-buffer', [])
                         message_to_emacs("Buffer id '{}' not exists, rebuild EAF buffer.".format(buffer_id))
@@ -249,26 +348,44 @@ class EAF(object):
             for new_view_buffer_id in new_view_buffer_ids:
                 if new_view_buffer_id not in old_view_buffer_ids:
                     if new_view_buffer_id in self.buffer_dict:
+                        self.idle_buffer_manager.buffer_show(new_view_buffer_id)
+
+                        if new_view_buffer_id in self.theme_outdated_buffer_ids:
+                            self.theme_outdated_buffer_ids.discard(new_view_buffer_id)
+                            self.update_buffer_theme(self.buffer_dict[new_view_buffer_id])
+
                         self.buffer_dict[new_view_buffer_id].some_view_show()
 
         # Adjust buffer size along with views change.
         # Note: just buffer that option `fit_to_view' is False need to adjust,
         # if buffer option fit_to_view is True, buffer render adjust by view.resizeEvent()
-        for buffer in list(self.buffer_dict.values()):
-            if not buffer.fit_to_view:
-                buffer_views = list(filter(lambda v: v.buffer_id == buffer.buffer_id, list(self.view_dict.values())))
+        #
+        # Hidden buffer (no view) is skipped, relayout hidden page is waste,
+        # it will resize to view's size when some view of buffer show again.
+        #
+        # Resize scheduler relayout buffer after geometry stable when user drag window divider,
+        # views show scaled rendering during drag.
+        if view_infos != ['']:
+            for buffer_id in new_view_buffer_ids:
+                buffer = self.buffer_dict.get(buffer_id)
+                if buffer is None:
+                    continue
 
-                # Adjust buffer size to max view's size.
-                if len(buffer_views) > 0:
-                    max_view = max(buffer_views, key=lambda v: v.width * v.height)
+                # Views that will destroy by destroy_view_now are not counted.
+                buffer_views = [view for (key, view) in self.registry.buffer_views.get(buffer_id, {}).items()
+                                if key in view_infos]
 
-                    buffer.buffer_widget.resize(max_view.width, max_view.height)
-                # Adjust buffer size to emacs window size if not match view found.
+                if buffer.fit_to_view:
+                    self.resize_scheduler.request(buffer, views=buffer_views)
                 else:
-                    buffer.buffer_widget.resize(emacs_width, emacs_height)
+                    if len(buffer_views) > 0:
+                        # Adjust buffer size to max view's size.
+                        max_view = max(buffer_views, key=lambda v: v.width * v.height)
 
-                # Send resize signal to buffer.
-                buffer.resize_view()
+                        self.resize_scheduler.request(buffer, max_view.width, max_view.height)
+
+                # Decide embedding now, new view of direct embedding buffer must not wait relayout to show content.
+                self.update_view_embedding(buffer)
 
         # NOTE:
         # When you do switch buffer or kill buffer in Emacs, will call Python function 'update_views.
@@ -278,6 +395,38 @@ class EAF(object):
         # Then screen won't flick.
         self.destroy_view_now()
 
+        # Only update buffers that views change, update_views is hot path.
+        for buffer_id in changed_buffer_ids:
+            self.update_resource_info(buffer_id)
+
+    def update_view_embedding(self, buffer):
+        ''' Embed buffer widget directly in single view of buffer, fallback to QGraphicsScene if buffer has several views.
+
+        Called when views of buffer change, after buffer relayout and when aspect ratio change.
+        Buffer that wait relayout use QGraphicsScene, so all views show scaled rendering during drag.'''
+        global destroy_view_list
+
+        views = self.registry.get_buffer_views(buffer.buffer_id)
+        alive_views = [view for view in views if view.view_info not in destroy_view_list]
+
+        if buffer.direct_embedding and not buffer.fit_to_view and buffer.aspect_ratio == 0 and len(alive_views) == 1 and \
+           not self.resize_scheduler.is_pending(buffer.buffer_id):
+            direct_view = alive_views[0]
+        else:
+            direct_view = None
+
+        # Widget must leave old view before enter new view.
+        for view in views:
+            if view is not direct_view:
+                view.embed_scene()
+
+        if direct_view is not None:
+            direct_view.embed_direct()
+        elif self.resize_scheduler.is_pending(buffer.buffer_id):
+            # View that just leave direct embedding skipped drag rendering.
+            for view in alive_views:
+                view.set_drag_render(True)
+
     def destroy_view_later(self, key):
         '''Just record view id in global list 'destroy_view_list', and not destroy old view immediately.'''
         global destroy_view_list
@@ -289,75 +438,88 @@ class EAF(object):
         global destroy_view_list
 
         for key in destroy_view_list:
-            if key in self.view_dict:
-                self.view_dict[key].destroy_view()
-            self.view_dict.pop(key, None)
+            view = self.registry.remove_view(key)
+            if view is not None:
+                view.destroy_view()
 
         destroy_view_list = []
 
     def button_press_on_eaf_window(self):
-        for key in self.buffer_dict:
-            buffer_widget = self.buffer_dict[key].buffer_widget
-
-            if hasattr(buffer_widget, "is_button_press") and buffer_widget.is_button_press:
-                return True
-
-        return False
+        return self.registry.has_pressed_widget()
 
     @PostGui()
     def kill_buffer(self, buffer_id):
         ''' Kill all view based on buffer_id and clean buffer from buffer dict.'''
         # Kill all view base on buffer_id.
-        for key in list(self.view_dict):
-            if buffer_id == self.view_dict[key].buffer_id:
-                self.destroy_view_later(key)
-
-        # Clean buffer from buffer dict.
-        if buffer_id in self.buffer_dict:
+        for key in self.registry.get_buffer_view_keys(buffer_id):
+            # Buffer widget is destroyed before view, take it out of direct embedding view first.
+            self.view_dict[key].embed_scene()
+            self.destroy_view_later(key)
+
+        # Clean buffer from buffer registry.
+        buffer = self.registry.remove_buffer(buffer_id)
+        if buffer is not None:
             # Save buffer session.
-            self.save_buffer_session(self.buffer_dict[buffer_id])
+            self.save_buffer_session(buffer)
 
-            self.buffer_dict[buffer_id].destroy_buffer()
-            self.buffer_dict.pop(buffer_id, None)
+            buffer.destroy_buffer()
 
-    @PostGui()
+        self.idle_buffer_manager.remove_buffer(buffer_id)
+        self.lazy_restore_manager.remove_buffer(buffer_id)
+        self.resource_monitor.remove_buffer(buffer_id)
+        self.theme_outdated_buffer_ids.discard(buffer_id)
+        log_pipeline.remove_buffer(buffer_id)
+        self.resize_scheduler.remove_buffer(buffer_id)
+
+        # Cancel background tasks of buffer, callback won't touch destroyed buffer.
+        cancel_background_tasks(buffer_id)
+        job_manager.cancel_buffer_jobs(buffer_id)
+
+    @PostGui(priority=PRIORITY_HOUSEKEEPING)
     def clip_buffer(self, buffer_id):
         '''Clip the image of buffer for display.'''
         eaf_config_dir = get_emacs_config_dir()
-        for key in list(self.view_dict):
-            view = self.view_dict[key]
-            if buffer_id == view.buffer_id:
-                view.screen_shot().save(os.path.join(eaf_config_dir, buffer_id + ".jpeg"))
+        for view in self.registry.get_buffer_views(buffer_id):
+            view.screen_shot().save(os.path.join(eaf_config_dir, buffer_id + ".jpeg"))
 
-    @PostGui()
+    @PostGui(priority=PRIORITY_HOUSEKEEPING)
     def ocr_buffer(self, buffer_id):
         import tempfile
 
-        for key in list(self.view_dict):
-            view = self.view_dict[key]
-            if buffer_id == view.buffer_id:
-                image_path = os.path.join(tempfile.gettempdir(), buffer_id + ".png")
-                view.screen_shot().save(image_path)
+        for view in self.registry.get_buffer_views(buffer_id):
+            image_path = os.path.join(tempfile.gettempdir(), buffer_id + ".png")
+            view.screen_shot().save(image_path)
 
-                thread = OCRThread(image_path)
-                self.thread_queue.append(thread)
-                thread.start()
+            message_to_emacs("Use PaddleOCR analyze screenshot, it's need few seconds to analyze...")
+            job_manager.submit("ocr", [sys.executable, "paddle_ocr.py", image_path],
+                               buffer_id=buffer_id,
+                               description=image_path,
+                               on_exit=lambda job, image_path=image_path: self.handle_ocr_result(job, image_path),
+                               cwd=os.path.join(os.path.dirname(__file__), "core"),
+                               stderr=subprocess.DEVNULL)
+
+        self.update_resource_info(buffer_id)
+
+    def handle_ocr_result(self, job, image_path):
+        if job.returncode == 0 and len(job.output) > 0:
+            eval_in_emacs("eaf-ocr-buffer-record", [adjust_ocr(job.output[-1])])
+            os.remove(image_path)
+        else:
+            # Fallback to EasyOCR, it run in Python process, so we run it in worker pool.
+            message_to_emacs("Use EasyOCR analyze screenshot, it's need few seconds to analyze...")
+            io_pool.submit(easy_ocr, (image_path, ), owner=job.buffer_id)
 
     @PostGui()
     def show_buffer_view(self, buffer_id):
         '''Show the single buffer view.'''
-        for key in list(self.view_dict):
-            view = self.view_dict[key]
-            if buffer_id == view.buffer_id:
-               view.try_show_top_view()
+        for view in self.registry.get_buffer_views(buffer_id):
+            view.try_show_top_view()
 
     @PostGui()
     def hide_buffer_view(self, buffer_id):
         '''Hide the single buffer view.'''
-        for key in list(self.view_dict):
-            view = self.view_dict[key]
-            if buffer_id == view.buffer_id:
-               view.try_hide_top_view()
+        for view in self.registry.get_buffer_views(buffer_id):
+            view.try_hide_top_view()
 
     @PostGui()
     def kill_emacs(self):
@@ -370,10 +532,19 @@ class EAF(object):
             self.kill_buffer(buffer_id)
 
     def build_buffer_function(self, name):
-        @PostGui()
-        def _do(*args):
+        # Consecutive scroll requests of same buffer and direction merge into one queue entry.
+        if name == "scroll_other_buffer":
+            post_gui = PostGui(coalesce=COALESCE_ACCUMULATE, coalesce_key=lambda args: args)
+        else:
+            post_gui = PostGui()
+
+        @post_gui
+        def _do(*args, trace_seq=None):
             buffer_id = args[0]
 
+            if trace_seq is not None:
+                key_tracer.dispatch(trace_seq)
+
             if type(buffer_id) == str and buffer_id in self.buffer_dict:
                 try:
                     getattr(self.buffer_dict[buffer_id], name)(*args[1:])
@@ -382,23 +553,213 @@ class EAF(object):
                     traceback.print_exc()
                     message_to_emacs("Got error with : " + name + " (" + buffer_id + ")")
 
-        setattr(self, name, _do)
+            if trace_seq is not None:
+                key_tracer.finish(trace_seq)
+
+        if name in ["send_key", "send_key_sequence", "send_key_batch"]:
+            # Start key trace in EPC thread, before request queue to Qt main thread.
+            def _trace(*args, emacs_time=None):
+                if key_tracer.enabled:
+                    _do(*args, trace_seq=key_tracer.begin(name, args[1] if len(args) > 1 else "", emacs_time))
+                else:
+                    _do(*args)
+
+            setattr(self, name, _trace)
+        else:
+            setattr(self, name, _do)
 
     def build_buffer_return_function(self, name):
-        def _do(*args):
+        def _call(resolve, args):
+            ''' Run in Qt main thread, resolve result of buffer function.'''
             buffer_id = args[0]
 
             if type(buffer_id) == str and buffer_id in self.buffer_dict:
+                buffer = self.buffer_dict[buffer_id]
+
                 try:
-                    return getattr(self.buffer_dict[buffer_id], name)(*args[1:])
+                    # Use async version if buffer provide it, such as execute_js_code_async,
+                    # result is resolved in callback, not need nested QEventLoop.
+                    if hasattr(buffer, name + "_async"):
+                        getattr(buffer, name + "_async")(*args[1:], callback=resolve)
+                    else:
+                        resolve(getattr(buffer, name)(*args[1:]))
                 except AttributeError:
                     import traceback
                     traceback.print_exc()
                     message_to_emacs("Got error with : " + name + " (" + buffer_id + ")")
-                    return None
+                    resolve(None)
+            else:
+                resolve(None)
+
+        def _do(*args):
+            # EPC call this function in EPC server thread, marshal it to Qt main thread and wait result.
+            return sync_call_bridge.call(name, lambda resolve: _call(resolve, args))
 
         setattr(self, name, _do)
 
+    def get_dispatcher_stats(self):
+        ''' Return queue depth and wait time metrics of main thread dispatcher, see MainThreadDispatcher.get_stats.'''
+        return main_thread_dispatcher.get_stats()
+
+    def get_sync_call_stats(self):
+        ''' Return latency and timeout metrics of sync calls, see SyncCallBridge.get_stats.'''
+        return sync_call_bridge.get_stats()
+
+    def get_job_list(self):
+        ''' Return jobs of external tools, see JobManager.get_job_list.'''
+        return job_manager.get_job_list()
+
+    def get_logs(self, count=200, level="debug", buffer_id=None):
+        ''' Return recent log records, see LogPipeline.get_records.'''
+        return log_pipeline.get_records(count, level, buffer_id or None)
+
+    def get_log_stats(self):
+        ''' Return metrics of log pipeline, see LogPipeline.get_stats.'''
+        return log_pipeline.get_stats()
+
+    def show_logs(self, count, level, buffer_id):
+        ''' Show recent log records in Emacs.'''
+        eval_in_emacs('eaf--show-logs', [log_pipeline.get_records(count, level, buffer_id or None)])
+
+    def get_stall_sites(self, count=20):
+        ''' Return top stall sites of Qt main thread, see StallWatchdog.get_stall_sites.'''
+        return self.stall_watchdog.get_stall_sites(count) if self.stall_watchdog is not None else []
+
+    def get_stall_history(self):
+        ''' Return recent stalls of Qt main thread, see StallWatchdog.get_stall_history.'''
+        return self.stall_watchdog.get_stall_history() if self.stall_watchdog is not None else []
+
+    def show_stall_sites(self, count):
+        ''' Show top stall sites of Qt main thread in Emacs.'''
+        eval_in_emacs('eaf--show-stall-sites', [self.get_stall_sites(count)])
+
+    def reset_stall_sites(self):
+        if self.stall_watchdog is not None:
+            self.stall_watchdog.reset()
+
+    def show_job_list(self):
+        ''' Show jobs of external tools in Emacs.'''
+        eval_in_emacs('eaf--show-job-list', [job_manager.get_job_list()])
+
+    def cancel_job(self, job_id):
+        ''' Cancel job of external tool.'''
+        if job_manager.cancel(int(job_id)):
+            message_to_emacs("Cancelled job {}".format(job_id))
+
+    def get_resize_stats(self):
+        ''' Return relayout and drag fps metrics, see ResizeScheduler.get_stats.'''
+        return self.resize_scheduler.get_stats()
+
+    def get_worker_pool_stats(self):
+        ''' Return queue metrics of worker pools, see WorkerPool.get_stats.'''
+        return get_worker_pool_stats()
+
+    def invalidate_emacs_func_cache(self, func_names):
+        ''' Drop cached results of Emacs functions FUNC_NAMES, Emacs call this when results changed.'''
+        for func_name in func_names:
+            invalidate_emacs_func_cache(func_name)
+
+    def get_emacs_func_cache_stats(self):
+        ''' Return metrics of Emacs function cache, see EmacsFuncCache.get_stats.'''
+        return emacs_func_cache.get_stats()
+
+    def get_window_coordinate(self, pid):
+        ''' Return [x, y] of window PID from cached window table of compositor, or nil if it's not found.'''
+        client = get_compositor_client()
+        if client is None:
+            return False
+
+        try:
+            window = client.get_window_by_pid(pid)
+        except (OSError, ValueError, KeyError):
+            return False
+
+        return [window["x"], window["y"]] if window is not None else False
+
+    def get_compositor_stats(self):
+        ''' Return query count, fetch count and event count of compositor IPC client.'''
+        client = get_compositor_client()
+        return client.get_stats() if client is not None else False
+
+    def send_key_traced(self, buffer_id, event_string, emacs_time):
+        ''' Send key with time that Emacs call `eaf-send-key', Emacs use this interface when key trace is enabled.'''
+        self.send_key(buffer_id, event_string, emacs_time=emacs_time)
+
+    def enable_key_trace(self):
+        key_tracer.enable()
+
+    def disable_key_trace(self):
+        key_tracer.disable()
+
+    def get_key_trace_stats(self):
+        ''' Return latency of key-send stages, see KeyTracer.get_stats.'''
+        return key_tracer.get_stats()
+
+    def dump_key_trace(self):
+        ''' Dump key trace as Chrome trace-event JSON file, return file path.'''
+        return key_tracer.dump_chrome_trace(os.path.join(get_emacs_config_dir(), "key_trace.json"))
+
+    def start_epc_record(self, path=""):
+        ''' Record EPC calls from Emacs to PATH, replay record with benchmarks/replay_epc.py.
+
+        Existing buffers are saved in header, replayer create them before replay calls.'''
+        path = path or os.path.join(get_emacs_config_dir(), "epc_record.jsonl")
+        buffers = [[buffer.buffer_id, buffer.url, buffer.module_path, buffer.arguments]
+                   for buffer in self.buffer_dict.values()]
+
+        if epc_recorder.start(path, {"emacs_width": emacs_width, "emacs_height": emacs_height, "buffers": buffers}):
+            message_to_emacs("Recording EPC calls to {}".format(path))
+        else:
+            message_to_emacs("EPC record is already started.")
+
+    def stop_epc_record(self):
+        ''' Stop record EPC calls.'''
+        call_count = epc_recorder.call_count
+        if epc_recorder.stop():
+            message_to_emacs("Recorded {} EPC calls.".format(call_count))
+
+    def start_profiler(self, interval_ms=10):
+        ''' Start sampling Python stacks of all threads every INTERVAL_MS milliseconds.'''
+        if sampling_profiler.start(interval_ms / 1000.0):
+            message_to_emacs("Profiler started.")
+        else:
+            message_to_emacs("Profiler is already running.")
+
+    def stop_profiler(self, output_format="collapsed"):
+        ''' Stop profiler and dump samples to EAF config directory, return file path.'''
+        if not sampling_profiler.stop():
+            message_to_emacs("Profiler is not running.")
+            return False
+
+        path = sampling_profiler.dump(get_emacs_config_dir(), output_format)
+        message_to_emacs("Profile saved to {}".format(path))
+        return path
+
+    def get_profiler_stats(self):
+        ''' Return running state, sample count and unique stack count of profiler.'''
+        return sampling_profiler.get_stats()
+
+    @PostGui()
+    def update_theme(self, theme_mode, foreground, background):
+        ''' Update theme of all buffers with theme that Emacs broadcast.
+
+        Visible buffers are updated now, hidden buffers are updated when some view of them show.'''
+        set_emacs_theme(theme_mode, foreground, background)
+
+        view_buffer_ids = self.registry.get_view_buffer_ids()
+        for (buffer_id, buffer) in list(self.buffer_dict.items()):
+            if buffer_id in view_buffer_ids:
+                self.update_buffer_theme(buffer)
+            else:
+                self.theme_outdated_buffer_ids.add(buffer_id)
+
+    def update_buffer_theme(self, buffer):
+        try:
+            buffer.update_theme()
+        except Exception:
+            import traceback
+            traceback.print_exc()
+
     @PostGui()
     def eval_function(self, buffer_id, function_name, event_string):
         ''' Execute function and do not return anything. '''
@@ -412,6 +773,56 @@ class EAF(object):
                 traceback.print_exc()
                 message_to_emacs("Cannot execute function: " + function_name + " (" + buffer_id + ")")
 
+    def update_resource_info(self, buffer_id=None):
+        ''' Push buffer information to resource monitor, must call in Qt main thread.
+
+        Update all buffers if buffer_id is None.'''
+        buffer_ids = list(self.buffer_dict) if buffer_id is None else [buffer_id]
+
+        for buffer_id in buffer_ids:
+            if buffer_id not in self.buffer_dict:
+                continue
+
+            buffer = self.buffer_dict[buffer_id]
+            web_page = getattr(buffer.buffer_widget, "web_page", None)
+
+            self.resource_monitor.update_buffer_info(buffer_id, {
+                "app": os.path.basename(os.path.dirname(buffer.module_path)),
+                "title": buffer.title or buffer.url,
+                "pid": web_page.renderProcessPid() if web_page is not None else 0,
+                "views": len(self.registry.get_buffer_views(buffer_id)),
+                "scripts": web_page.scripts().count() if web_page is not None else 0,
+                "threads": job_manager.running_job_count(buffer_id),
+                "stage": self.idle_buffer_manager.get_stage(buffer_id)
+            })
+
+    def get_resource_table(self):
+        ''' Return resource table of EAF process and buffers, see ResourceMonitor.get_resource_table.'''
+        return self.resource_monitor.get_resource_table()
+
+    @PostGui(priority=PRIORITY_HOUSEKEEPING)
+    def show_resource_dashboard(self):
+        ''' Refresh buffer information and show resource dashboard in Emacs.'''
+        self.update_resource_info()
+
+        # Placeholder buffers of restored session are listed as unloaded, they have no process and views yet.
+        resource_table = self.resource_monitor.get_resource_table()
+        for (buffer_id, url, module_path, title) in self.lazy_restore_manager.get_placeholders():
+            resource_table.append([buffer_id, os.path.basename(os.path.dirname(module_path)), title or url,
+                                   0, 0, 0, 0.0, 0, 0, 0, "unloaded"])
+
+        eval_in_emacs('eaf--show-resource-dashboard', [resource_table])
+
+    @PostGui(priority=PRIORITY_HOUSEKEEPING)
+    def report_renderer_memory(self):
+        ''' Report renderer memory of browser buffers to Emacs.'''
+        memory_info = []
+        for (buffer_id, pid, rss, stage) in self.idle_buffer_manager.get_renderer_memory_info():
+            buffer = self.buffer_dict[buffer_id]
+            memory_info.append([buffer_id, buffer.title or buffer.url, pid, rss // 1024, stage])
+
+        eval_in_emacs('eaf--show-renderer-memory', [memory_info])
+
     def get_emacs_wsl_window_id(self):
         if platform.system() == "Windows":
             return gw.getActiveWindow()._hWnd
@@ -463,20 +874,29 @@ class EAF(object):
 
     def save_buffer_session(self, buf):
         ''' Save buffer session to file.'''
-        # Create config file it not exist.
-        if not os.path.exists(self.session_file):
-            basedir = os.path.dirname(self.session_file)
-            if not os.path.exists(basedir):
-                os.makedirs(basedir)
+        # Discarded buffer has no page content, use session data that captured before discard.
+        buf_session_data = self.idle_buffer_manager.get_session_data(buf.buffer_id)
+        if buf_session_data is None:
+            buf_session_data = buf.save_session_data()
+
+        # Write session file in worker pool, don't block Qt main thread.
+        # NOTE: session data must save even buffer is killed, so we don't set owner.
+        if buf_session_data != "":
+            io_pool.submit(self.write_session_file, (buf.module_path, buf.url, buf_session_data))
 
-            with open(self.session_file, 'a'):
-                os.utime(self.session_file, None)
+    def write_session_file(self, module_path, url, buf_session_data):
+        with self.session_file_lock:
+            # Create config file it not exist.
+            if not os.path.exists(self.session_file):
+                basedir = os.path.dirname(self.session_file)
+                if not os.path.exists(basedir):
+                    os.makedirs(basedir)
 
-            print("Create session file %s" % (self.session_file))
+                with open(self.session_file, 'a'):
+                    os.utime(self.session_file, None)
+
+                print("Create session file %s" % (self.session_file))
 
-        # Save buffer session to file.
-        buf_session_data = buf.save_session_data()
-        if buf_session_data != "":
             with open(self.session_file, "r+") as session_file:
                 # Init session dict.
                 session_dict = {}
@@ -486,90 +906,93 @@ class EAF(object):
                     pass
 
                 # Init module path dict.
-                if buf.module_path not in session_dict:
-                    session_dict[buf.module_path] = {}
+                if module_path not in session_dict:
+                    session_dict[module_path] = {}
 
                 # Update session data.
-                session_dict[buf.module_path].update({buf.url: buf_session_data})
+                session_dict[module_path].update({url: buf_session_data})
 
                 # Clean session file and update new content.
                 session_file.seek(0)
                 session_file.truncate(0)
                 json.dump(session_dict, session_file)
 
-                print("Saved session: ", buf.module_path, buf.url, buf_session_data)
+                print("Saved session: ", module_path, url, buf_session_data)
 
     def restore_buffer_session(self, buf):
         ''' Restore buffer session from file.'''
-        if os.path.exists(self.session_file):
-            with open(self.session_file, "r+") as session_file:
-                session_dict = {}
-                try:
-                    session_dict = json.load(session_file)
-                except ValueError:
-                    pass
+        def restore(session_data):
+            if session_data is not None:
+                buf.restore_session_data(session_data)
+
+        try:
+            session_file_size = os.path.getsize(self.session_file)
+        except OSError:
+            return
+
+        if session_file_size <= SESSION_FILE_SYNC_RESTORE_SIZE:
+            restore(self.read_session_file(buf.module_path, buf.url))
+        else:
+            # Parse big session file in worker pool, restore session data in Qt main thread.
+            io_pool.submit(self.read_session_file, (buf.module_path, buf.url), callback=restore, owner=buf.buffer_id)
+
+    def read_session_file(self, module_path, url):
+        with self.session_file_lock:
+            if os.path.exists(self.session_file):
+                with open(self.session_file, "r") as session_file:
+                    session_dict = {}
+                    try:
+                        session_dict = json.load(session_file)
+                    except ValueError:
+                        pass
 
-                if buf.module_path in session_dict:
-                    if buf.url in session_dict[buf.module_path]:
-                        buf.restore_session_data(session_dict[buf.module_path][buf.url])
+                    if module_path in session_dict:
+                        return session_dict[module_path].get(url)
+
+        return None
 
     def cleanup(self):
-        '''Do some cleanup before exit python process.'''
+        '''Do some cleanup before exit python process.
+
+        Emacs call cleanup synchronously, we wait requests that queued before cleanup (such as kill_buffer) finish in Qt main thread,
+        then shutdown_worker_pools wait session files written, so session data is not lost when Emacs stop process.'''
+        sync_call_bridge.call("cleanup", lambda resolve: resolve(None))
+
+        self.resource_monitor.stop()
+        if self.stall_watchdog is not None:
+            self.stall_watchdog.stop()
+        job_manager.shutdown()
+        shutdown_worker_pools()
         close_epc_client()
 
+        if self.server_socket_path is not None and os.path.exists(self.server_socket_path):
+            os.remove(self.server_socket_path)
+
 OCR_ADJUST_DICT = {
     " ,": ",",
     "一一一": " ── "
 }
 
-class OCRThread(QThread):
-
-    def __init__(self, image_path):
-        QThread.__init__(self)
-
-        self.image_path = image_path
-
-    def adjust_ocr(self, ocr_string):
-        for char in OCR_ADJUST_DICT:
-            ocr_string = ocr_string.replace(char, OCR_ADJUST_DICT[char])
-
-        return ocr_string
-
-    def run(self):
-        try:
-            message_to_emacs("Use PaddleOCR analyze screenshot, it's need few seconds to analyze...")
-            import os
-            python_command = get_emacs_var("eaf-python-command")
-            command_string = "{} paddle_ocr.py {}".format(python_command, self.image_path)
-            cwd = os.path.join(os.path.dirname(__file__), "core")
-
-            import subprocess
-            process = subprocess.Popen(command_string, cwd=cwd, shell=True, text=True,
-                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            process.wait()
-            string = process.stdout.readlines()[-1]    # type: ignore
-
-            eval_in_emacs("eaf-ocr-buffer-record", [self.adjust_ocr(string)])
-        except:
-            import traceback
-            traceback.print_exc()
+def adjust_ocr(ocr_string):
+    for char in OCR_ADJUST_DICT:
+        ocr_string = ocr_string.replace(char, OCR_ADJUST_DICT[char])
 
-            message_to_emacs("Use EasyOCR analyze screenshot, it's need few seconds to analyze...")
+    return ocr_string
 
-            try:
-                import easyocr
-                reader = easyocr.Reader(['ch_sim','en'])
-                result = reader.readtext(self.image_path)
-                string = ''.join(list(map(lambda r: r[1], result)))
-                eval_in_emacs("eaf-ocr-buffer-record", [self.adjust_ocr(string)])
-            except:
-                import traceback
-                traceback.print_exc()
+def easy_ocr(image_path):
+    try:
+        import easyocr
+        reader = easyocr.Reader(['ch_sim','en'])
+        result = reader.readtext(image_path)
+        string = ''.join(list(map(lambda r: r[1], result)))
+        eval_in_emacs("eaf-ocr-buffer-record", [adjust_ocr(string)])
+    except:
+        import traceback
+        traceback.print_exc()
 
-                message_to_emacs("Please use pip3 install PaddleOCR or EasyOCR first.")
+        message_to_emacs("Please use pip3 install PaddleOCR or EasyOCR first.")
 
-        import os
-        os.remove(self.image_path)
+    os.remove(image_path)
 
 if __name__ == "__main__":
     import sys